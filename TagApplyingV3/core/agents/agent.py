@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import json
+import os
 import re
 import time
 from pathlib import Path
@@ -114,22 +115,27 @@ def _fallback_view_code(event_name: str, params: Dict[str, Any]) -> Dict[str, st
     }
 
 
-def llm_explain_mapping(item: Dict[str, Any], top: Dict[str, Any], snippet: str) -> Dict[str, Any]:
-    """
-    Use Vegas LLM to explain the mapping between spec item and code location.
-    Returns a dict with explanation, suggested event name, params, and code recommendations.
-    """
-    try:
-        vegas_llm = VegasLLMWrapper()
-        
-        action = (item.get("action") or "").lower()
-        description = item.get("description") or "Unknown KPI"
-        adobe_var = item.get("adobe_var") or ""
-        adobe_value = item.get("adobe_value") or ""
-        target_terms = item.get("target_terms") or ""
-        
-        # Construct the prompt for Vegas LLM
-        prompt = f"""You are an expert in analyzing user interactions and mapping them to Adobe Analytics tracking.
+def _fallback_explanation(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "kpi": item.get("description", "Unknown KPI"),
+        "why_location": "Matched by visible label/terms and nearby onClick.",
+        "suggested_event_name": item.get("adobe_value") or "custom_event",
+        "suggested_params": {},
+        "implementation_note": "Call track(eventName, params) inside the handler.",
+        "risks": [],
+        "code": {},
+    }
+
+
+def _explain_prompt(item: Dict[str, Any], top: Dict[str, Any], snippet: str) -> str:
+    action = (item.get("action") or "").lower()
+    description = item.get("description") or "Unknown KPI"
+    adobe_var = item.get("adobe_var") or ""
+    adobe_value = item.get("adobe_value") or ""
+    target_terms = item.get("target_terms") or ""
+    
+    # Construct the prompt for Vegas LLM
+    return f"""You are an expert in analyzing user interactions and mapping them to Adobe Analytics tracking.
 
 Given the following information:
 - KPI Description: {description}
@@ -160,12 +166,16 @@ Please provide a JSON response with the following structure:
 
 Respond with ONLY the JSON, no additional text."""
 
-        response = vegas_llm.invoke(prompt)
+
+def _parse_explanation(item: Dict[str, Any], response: Any) -> Dict[str, Any]:
+    """Explanation dict from an LLM response (fallback if it failed or can't be parsed)"""
+    try:
+        if isinstance(response, Exception):
+            raise response
         
         # Parse the response - handle both string and object responses
         if isinstance(response, str):
             # Try to extract JSON from the response
-            import re
             json_match = re.search(r'\{.*\}', response, re.DOTALL)
             if json_match:
                 result = json.loads(json_match.group())
@@ -179,45 +189,85 @@ Respond with ONLY the JSON, no additional text."""
     except Exception as e:
         logging.warning(f"Vegas LLM call failed: {e}. Using fallback explanation.")
         # Return a fallback explanation if LLM fails
-        return {
-            "kpi": item.get("description", "Unknown KPI"),
-            "why_location": "Matched by visible label/terms and nearby onClick.",
-            "suggested_event_name": item.get("adobe_value") or "custom_event",
-            "suggested_params": {},
-            "implementation_note": "Call track(eventName, params) inside the handler.",
-            "risks": [],
-            "code": {},
-        }
+        return _fallback_explanation(item)
+
+
+def llm_explain_mapping(item: Dict[str, Any], top: Dict[str, Any], snippet: str) -> Dict[str, Any]:
+    """
+    Use Vegas LLM to explain the mapping between spec item and code location.
+    Returns a dict with explanation, suggested event name, params, and code recommendations.
+    """
+    return llm_explain_mappings([(item, top, snippet)])[0]
+
+
+def llm_explain_mappings(
+    jobs: List[Tuple[Dict[str, Any], Dict[str, Any], str]],
+    max_concurrency: int | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    llm_explain_mapping for many (item, top, snippet) triples, with the
+    requests fanned out concurrently (at most max_concurrency in flight).
+    """
+    if not jobs:
+        return []
+    try:
+        prompts = [_explain_prompt(item, top, snippet) for item, top, snippet in jobs]
+        responses = VegasLLMWrapper.shared().invoke_many(prompts, max_concurrency=max_concurrency, stage="explain_mapping")
+    except Exception as e:
+        responses = [e] * len(jobs)
+    return [_parse_explanation(item, response) for (item, _, _), response in zip(jobs, responses)]
 
 
 
 def load_repo_text_map(repo_path: str, react_files: List[str]) -> Dict[str, List[str]]:
-    text_map = {}
-    for f in react_files:
-        text_map[f] = FileHandler.read_file_content(f).splitlines()
-    return text_map
+    # parallel, size-aware load (oversized/binary/minified files map to [])
+    return FileHandler.load_files(react_files)
+
+
+def _stream_spec_default() -> bool:
+    """SPEC_STREAMING=1 streams large specs through the read-only Excel reader."""
+    return (os.getenv("SPEC_STREAMING") or "").strip().lower() in {"1", "true", "yes"}
 
 
 def build_unified(
     excel_path: str,
     repo_path: str,
     use_llm: bool = True,
+    stream_spec: bool | None = None,
 ) -> Dict[str, Any]:
-    # 1) parse spec
     excel_tool = ExcelReaderTool()
-    ex = excel_tool._run(excel_path, use_llm=use_llm)
-    if ex.get("status") != "success":
-        raise RuntimeError(f"ExcelReader failed: {ex}")
+    repo_tool = RepoMatcherTool()
+    if stream_spec is None:
+        stream_spec = _stream_spec_default()
+
+    if stream_spec:
+        # 1+2) parse spec and scan repo chunk by chunk: matching starts on the
+        # first rows while the rest of the workbook is still being read
+        spec_items: List[Dict[str, Any]] = []
+
+        def _numbered_items():
+            for i, it in enumerate(excel_tool.iter_spec_items(excel_path, use_llm=use_llm)):
+                it["item_index"] = i
+                spec_items.append(it)
+                yield it
+
+        rm = {"suggestions": list(repo_tool.iter_suggestions(repo_path, _numbered_items(), use_embeddings=use_llm))}
+        if not spec_items:
+            raise RuntimeError("ExcelReader failed: No valid rows found in the Excel file.")
+    else:
+        # 1) parse spec
+        ex = excel_tool._run(excel_path, use_llm=use_llm)
+        if ex.get("status") != "success":
+            raise RuntimeError(f"ExcelReader failed: {ex}")
 
-    spec_items = ex["spec_items"]
-    for i, it in enumerate(spec_items):
-        it["item_index"] = i
+        spec_items = ex["spec_items"]
+        for i, it in enumerate(spec_items):
+            it["item_index"] = i
 
-    # 2) scan repo
-    repo_tool = RepoMatcherTool()
-    rm = repo_tool._run(repo_path, spec_items, use_embeddings=use_llm)
-    if rm.get("status") != "success":
-        raise RuntimeError(f"RepoMatcher failed: {rm}")
+        # 2) scan repo
+        rm = repo_tool._run(repo_path, spec_items, use_embeddings=use_llm)
+        if rm.get("status") != "success":
+            raise RuntimeError(f"RepoMatcher failed: {rm}")
 
     # Index file contents for snippets
     files = [s["matches"][0]["file"] for s in rm["suggestions"] if s.get("matches")]
@@ -246,7 +296,23 @@ def build_unified(
         helper_path = helper_path.rsplit(".", 1)[0] + ".js"
     unified["helper_file"] = {"path": helper_path, "contents": helper_contents}
 
-    for item, sug in zip(spec_items, rm["suggestions"]):
+    # add snippets, then 4) all LLM explanations in one concurrent fan-out
+    snippets: Dict[int, str] = {}
+    for n, (_, sug) in enumerate(zip(spec_items, rm["suggestions"])):
+        if sug.get("matches"):
+            top = sug["matches"][0]
+            lines = text_map.get(top["file"]) or FileHandler.read_file_content(top["file"]).splitlines()
+            snippets[n] = take_window(lines, top["line"], radius=6)
+
+    explanations: Dict[int, Dict[str, Any]] = {}
+    if use_llm and snippets:
+        order = sorted(snippets)
+        explained = llm_explain_mappings([
+            (spec_items[n], rm["suggestions"][n]["matches"][0], snippets[n]) for n in order
+        ])
+        explanations = dict(zip(order, explained))
+
+    for n, (item, sug) in enumerate(zip(spec_items, rm["suggestions"])):
         row: Dict[str, Any] = {
             "sheet": item.get("sheet"),
             "row_index": item.get("row_index"),
@@ -262,15 +328,11 @@ def build_unified(
             row["top_match"] = top
 
             # add snippet
-            file = top["file"]
-            line = top["line"]
-            lines = text_map.get(file) or FileHandler.read_file_content(file).splitlines()
-            snippet = take_window(lines, line, radius=6)
-            row["snippet"] = snippet
+            row["snippet"] = snippets[n]
 
             # 4) LLM explanation + event details (ask it to return JS code if possible)
             if use_llm:
-                expl = llm_explain_mapping(item, top, snippet)  # system prompt is updated in openai_utils to produce JS
+                expl = explanations[n]
             else:
                 expl = {
                     "kpi": row["kpi"],
@@ -6,7 +6,7 @@ This script:
 1. Reads tagging_report.json (same as tracking tagging)
 2. For each file, identifies interactive elements (buttons, divs with onClick)
 3. Uses LLM to generate appropriate data-track values
-4. Applies data-track attributes to elements
+4. Splices data-track attributes into the file locally (exact offsets, no LLM)
 5. Generates comprehensive report
 """
 
@@ -18,8 +18,10 @@ from typing import Dict, Any, List, Tuple
 from dotenv import load_dotenv
 
 from tools.data_track_extractor import ElementExtractor, ValueSanitizer, InteractiveElement
-from tools.data_track_applier import DataTrackApplier
+from tools.data_track_applier import DataTrackApplier, DataTrackSplicer
 from tools.vegas_llm_utils import VegasLLMWrapper
+from tools.persistent_index import PersistentRepoIndex, index_disabled_by_env
+from tools.llm_telemetry import LLMTelemetry
 
 CORE_DIR = Path(__file__).resolve().parent
 OUTPUTS_DIR = CORE_DIR / "outputs"
@@ -37,6 +39,95 @@ def _write_text(p: Path, text: str):
     p.write_text(text, encoding="utf-8", newline="")
 
 
+def _resolve_target(file_path: str, repo: Path) -> Path:
+    target = Path(file_path)
+    if not target.is_absolute():
+        target = (repo / target).resolve()
+    return target
+
+
+def _load_elements(target: Path, src: str, repo_index) -> List[InteractiveElement]:
+    """Interactive elements of a file, reused from the repo index when unchanged"""
+    elements = None
+    if repo_index is not None:
+        # reuse the elements persisted for this file if it hasn't changed
+        repo_index.refresh([target], prune=False)
+        elements = repo_index.elements(target)
+    if elements is None:
+        extractor = ElementExtractor(str(target), src)
+        elements = extractor.extract_all_interactive_elements()
+    return elements
+
+
+def _value_candidates(elements: List[InteractiveElement], skip_if_already: bool) -> List[Tuple[int, str]]:
+    """(element index, extracted text) for elements that need a value"""
+    sanitizer = ValueSanitizer()
+    return [
+        (elem_idx, sanitizer.extract_text_from_element(elem))
+        for elem_idx, elem in enumerate(elements)
+        if not (elem.has_data_track and skip_if_already)
+    ]
+
+
+def _element_payload(elem: InteractiveElement) -> Dict[str, Any]:
+    return {
+        "element_type": elem.element_type.value,
+        "line_number": elem.line_number,
+        "html_snippet": elem.element_html
+    }
+
+
+def _prefetch_llm_values(
+    files_to_process: List[Dict[str, Any]],
+    repo: Path,
+    repo_index,
+    applier: DataTrackApplier,
+    skip_if_already: bool,
+) -> Dict[str, Tuple[str, Dict[int, Tuple[str, str, str]]]]:
+    """
+    Generate the data-track values of every file up front, with all LLM
+    requests fanned out together instead of one file after another
+    
+    Returns:
+        {target path: (source the values were generated for, {element index: value})}
+    """
+    jobs = []
+    for file_info in files_to_process:
+        file_path = file_info.get("file")
+        if not file_path:
+            continue
+        target = _resolve_target(file_path, repo)
+        if not target.exists():
+            continue
+        try:
+            src = _read_text(target)
+            elements = _load_elements(target, src, repo_index)
+        except Exception:
+            continue  # reported by the main loop
+        candidates = _value_candidates(elements, skip_if_already)
+        if candidates:
+            jobs.append((target, src, elements, candidates))
+    
+    if not jobs:
+        return {}
+    
+    total = sum(len(candidates) for _, _, _, candidates in jobs)
+    print(f"🤖 Generating {total} data-track values for {len(jobs)} files concurrently...")
+    values = applier.generate_values_for_files([
+        {
+            "file_content": src,
+            "file_path": str(target.relative_to(repo)),
+            "elements": [_element_payload(elements[elem_idx]) for elem_idx, _ in candidates],
+            "extracted_texts": [text for _, text in candidates],
+        }
+        for target, src, elements, candidates in jobs
+    ])
+    return {
+        str(target): (src, {elem_idx: value for (elem_idx, _), value in zip(candidates, file_values)})
+        for (target, src, _, candidates), file_values in zip(jobs, values)
+    }
+
+
 def apply_data_track_attributes_smart(
     tagging_report_path: str | Path,
     repo_root: str | Path,
@@ -59,14 +150,16 @@ def apply_data_track_attributes_smart(
     """
     
     # Initialize clients
+    telemetry_mark = LLMTelemetry.shared().mark()
     if use_llm:
-        llm_client = VegasLLMWrapper()
+        llm_client = VegasLLMWrapper.shared()
         applier = DataTrackApplier(llm_client)
     else:
         applier = None
     
     report_path = Path(tagging_report_path).resolve()
     repo = Path(str(repo_root)).resolve()
+    repo_index = None if index_disabled_by_env() else PersistentRepoIndex.open(repo)
     
     # Load tagging report
     with open(report_path, 'r', encoding='utf-8') as f:
@@ -102,6 +195,14 @@ def apply_data_track_attributes_smart(
     print(f"🔄 Skip already tagged: {skip_if_already}")
     print("")
     
+    # LLM values for all files in one concurrent fan-out
+    prefetched: Dict[str, Tuple[str, Dict[int, Tuple[str, str, str]]]] = {}
+    if use_llm and applier:
+        try:
+            prefetched = _prefetch_llm_values(files_to_process, repo, repo_index, applier, skip_if_already)
+        except Exception as e:
+            print(f"⚠️  Concurrent value generation failed ({e}), generating per file")
+    
     for idx, file_info in enumerate(files_to_process, 1):
         file_path = file_info.get("file")
         
@@ -112,9 +213,7 @@ def apply_data_track_attributes_smart(
             continue
         
         # Resolve file path
-        target = Path(file_path)
-        if not target.is_absolute():
-            target = (repo / target).resolve()
+        target = _resolve_target(file_path, repo)
         
         if not target.exists():
             print(f"[{idx}/{len(files_to_process)}] ✗ File not found: {file_path}")
@@ -138,8 +237,7 @@ def apply_data_track_attributes_smart(
             
             # Step 1: Extract interactive elements
             print(f"  🔍 Extracting interactive elements...")
-            extractor = ElementExtractor(str(target), src)
-            elements = extractor.extract_all_interactive_elements()
+            elements = _load_elements(target, src, repo_index)
             
             if not elements:
                 print(f"  ℹ️  No interactive elements found")
@@ -159,44 +257,47 @@ def apply_data_track_attributes_smart(
             elements_to_modify = []
             sanitizer = ValueSanitizer()
             
-            for elem_idx, elem in enumerate(elements):
-                # Skip if already has data-track
-                if elem.has_data_track:
-                    if skip_if_already:
-                        print(f"    ⊘ Element {elem_idx + 1}: Already has data-track")
-                        stats["total_elements_skipped"] += 1
-                        file_log["elements_skipped"] += 1
-                        
-                        detail = {
-                            "line": elem.line_number,
-                            "element_type": elem.element_type.value,
-                            "status": "skipped",
-                            "reason": "Already has data-track attribute"
-                        }
-                        file_log["details"].append(detail)
-                        continue
-                
-                # Generate value using LLM if enabled
-                if use_llm and applier:
-                    extracted_text = sanitizer.extract_text_from_element(elem)
-                    print(f"    🤖 Element {elem_idx + 1}: Generating value from '{extracted_text[:30]}'...")
-                    
-                    value, reasoning, confidence = applier.generate_value_with_llm(
+            # Elements that need a value (skip those already tagged)
+            candidates = _value_candidates(elements, skip_if_already)
+            
+            # Generate values using LLM if enabled - prefetched for all files,
+            # or one batched call if the file changed since the prefetch
+            generated: Dict[int, Tuple[str, str, str]] = {}
+            if use_llm and applier and candidates:
+                prefetched_src, prefetched_values = prefetched.get(str(target), (None, None))
+                if prefetched_src == src:
+                    generated = prefetched_values
+                else:
+                    print(f"    🤖 Generating {len(candidates)} values in one batched request...")
+                    values = applier.generate_values_with_llm(
                         file_content=src,
                         file_path=str(target.relative_to(repo)),
-                        element={
-                            "element_type": elem.element_type.value,
-                            "line_number": elem.line_number,
-                            "html_snippet": elem.element_html
-                        },
-                        extracted_text=extracted_text
+                        elements=[_element_payload(elements[elem_idx]) for elem_idx, _ in candidates],
+                        extracted_texts=[text for _, text in candidates]
                     )
-                else:
-                    # Fallback: simple sanitization of extracted text
-                    extracted_text = sanitizer.extract_text_from_element(elem)
-                    value = sanitizer.sanitize(extracted_text)
-                    reasoning = "Sanitized from extracted text"
-                    confidence = "medium"
+                    generated = {elem_idx: value for (elem_idx, _), value in zip(candidates, values)}
+            else:
+                # Fallback: simple sanitization of extracted text
+                for elem_idx, extracted_text in candidates:
+                    generated[elem_idx] = (sanitizer.sanitize(extracted_text), "Sanitized from extracted text", "medium")
+            
+            for elem_idx, elem in enumerate(elements):
+                # Skip if already has data-track
+                if elem_idx not in generated:
+                    print(f"    ⊘ Element {elem_idx + 1}: Already has data-track")
+                    stats["total_elements_skipped"] += 1
+                    file_log["elements_skipped"] += 1
+                    
+                    detail = {
+                        "line": elem.line_number,
+                        "element_type": elem.element_type.value,
+                        "status": "skipped",
+                        "reason": "Already has data-track attribute"
+                    }
+                    file_log["details"].append(detail)
+                    continue
+                
+                value, reasoning, confidence = generated[elem_idx]
                 
                 # Validate value
                 if not sanitizer.is_valid_value(value):
@@ -217,9 +318,12 @@ def apply_data_track_attributes_smart(
                 
                 elements_to_modify.append({
                     "line_number": elem.line_number,
+                    "column_start": elem.column_start,
+                    "offset": elem.offset,
                     "element_type": elem.element_type.value,
                     "data_track_value": value,
                     "current_html": elem.element_html,
+                    "has_data_track": elem.has_data_track,
                     "reasoning": reasoning,
                     "confidence": confidence
                 })
@@ -248,23 +352,17 @@ def apply_data_track_attributes_smart(
             
             print(f"  ✏️  Applying {len(elements_to_modify)} data-track attributes...")
             
-            if use_llm and applier:
-                updated_src, mod_log = applier.apply_data_track_with_llm(
-                    file_content=src,
-                    file_path=str(target.relative_to(repo)),
-                    elements_to_modify=elements_to_modify
-                )
-            else:
-                # Fallback: simple regex replacement
-                updated_src = src
-                mod_log = []
-                for elem_info in elements_to_modify:
-                    # Try to find and replace element with data-track
-                    # This is a simple fallback, LLM version is much better
-                    line_num = elem_info["line_number"]
-                    if line_num <= len(src.split('\n')):
-                        # Simple approach: this would need more sophisticated handling
-                        pass
+            # Local splice at extractor offsets - no LLM round-trip, no truncation
+            updated_src, mod_log = DataTrackSplicer.apply(src, elements_to_modify)
+            file_log["modifications"] = mod_log
+            
+            not_applied = [m for m in mod_log if m.get("status") != "applied"]
+            for m in not_applied:
+                print(f"    ⚠️  Line {m.get('line')}: {m.get('reason')}")
+            file_log["elements_modified"] -= len(not_applied)
+            file_log["elements_skipped"] += len(not_applied)
+            stats["total_elements_modified"] -= len(not_applied)
+            stats["total_elements_skipped"] += len(not_applied)
             
             # Step 4: Check if changes were made
             if updated_src == src:
@@ -327,13 +425,24 @@ def apply_data_track_attributes_smart(
                 "error": str(e)
             })
     
+    if repo_index is not None:
+        try:
+            repo_index.save()
+        except Exception as e:
+            print(f"⚠️  Could not save repo index: {e}")
+    
+    if applier is not None:
+        stats["llm_traffic"] = applier.client.traffic_stats()
+    telemetry = LLMTelemetry.shared().summary(since=telemetry_mark)
+    
     # Save report
     try:
         report_file = OUTPUTS_DIR / "data_track_report.json"
         with open(report_file, 'w', encoding='utf-8') as f:
             json.dump({
                 "logs": logs,
-                "stats": stats
+                "stats": stats,
+                "llm_telemetry": telemetry
             }, f, indent=2, ensure_ascii=False)
         print(f"\n📋 Report saved: {report_file}")
     except Exception:
@@ -350,6 +459,8 @@ def apply_data_track_attributes_smart(
     print(f"✏️  Elements modified:       {stats['total_elements_modified']}")
     print(f"⊘ Elements skipped:         {stats['total_elements_skipped']}")
     print(f"💾 Backups created:         {stats['backup_created']}")
+    for stage, agg in telemetry["stages"].items():
+        print(f"🤖 LLM {stage + ':':<21}{agg['calls']} calls, {agg['total_tokens']} tokens, p95 {agg['latency_ms'].get('p95', '-')} ms")
     print("")
     
     if fail_count == 0 and success_count > 0:
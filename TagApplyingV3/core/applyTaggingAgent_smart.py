@@ -11,10 +11,14 @@ This version:
 from pathlib import Path
 from typing import Dict, Any, List, Tuple, Optional
 import json
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 from tools.vegas_llm_utils import VegasLLMWrapper
+from tools.llm_rate_limiter import is_throttle_error
 from tools.smart_prompt_builder import SmartPromptBuilder
+from tools.patch_applier import PatchApplier, PatchError
 
 
 def _read_text(p: Path) -> str:
@@ -28,6 +32,22 @@ def _write_text(p: Path, text: str):
     p.write_text(text, encoding="utf-8", newline="")
 
 
+def _debug_dump(kind: str, target_file_path: str, text: str):
+    """
+    Write a prompt or source snapshot to APPLY_DEBUG_DIR (no-op when unset)
+
+    One file per kind and target file, so parallel workers never share one.
+    """
+    debug_dir = os.getenv("APPLY_DEBUG_DIR")
+    if not debug_dir:
+        return
+    name = re.sub(r"[^\w.-]+", "_", target_file_path).strip("_")
+    try:
+        _write_text(Path(debug_dir) / f"{kind}-{name}.txt", text)
+    except OSError as e:
+        print(f"  ⚠️  Debug dump failed: {e}")
+
+
 def _extract_json(text: str) -> Dict[str, Any]:
     """Extract JSON from LLM response"""
     if not text:
@@ -59,28 +79,21 @@ def _extract_json(text: str) -> Dict[str, Any]:
     return {}
 
 
-def check_tagging_with_llm(
-    client: VegasLLMWrapper,
+def _llm_error_reason(e: Exception) -> str:
+    """Failure reason for the log; throttling is reported as such, not as a generic error"""
+    if is_throttle_error(e):
+        return f"LLM throttled (rate limit/quota): {str(e)}"
+    return f"LLM error: {str(e)}"
+
+
+def _tagging_check_prompt(
     framework_content: str,
     target_file_content: str,
     tracking_function: str,
     instruction: Dict[str, Any]
-) -> Tuple[bool, str]:
-    """
-    Use LLM to intelligently detect if tagging already exists
-    
-    LLM reads:
-    1. Tagging framework (what functions exist)
-    2. Target file (what's currently there)
-    3. Instruction (what we want to add)
-    
-    LLM decides: "Is this tagging already present?"
-    
-    Returns:
-        (already_tagged: bool, reason: str)
-    """
-    
-    prompt = f"""You are a code analysis expert.
+) -> str:
+    """Prompt asking the LLM whether `instruction` is already tagged in the file"""
+    return f"""You are a code analysis expert.
 
 ## TAGGING FRAMEWORK
 This is the Tagging framework that defines available functions:
@@ -128,24 +141,79 @@ or
   "reason": "No trackPageLoad found in file"
 }}
 """
+
+
+def _parse_tagging_check(response) -> Tuple[bool, str]:
+    """(already_tagged, reason) from an LLM response, or the exception it raised"""
+    if isinstance(response, Exception):
+        print(f"  ⚠️  LLM check failed ({response}), proceeding with tagging")
+        return (False, f"LLM check failed: {str(response)}")
+    
+    result = _extract_json(response)
+    if not result:
+        return (False, "Could not parse LLM response - assuming needs tagging")
+    
+    already_tagged = result.get("already_tagged", False)
+    reason = result.get("reason", "LLM decision")
+    
+    return (already_tagged, reason)
+
+
+def check_tagging_with_llm(
+    client: VegasLLMWrapper,
+    framework_content: str,
+    target_file_content: str,
+    tracking_function: str,
+    instruction: Dict[str, Any]
+) -> Tuple[bool, str]:
+    """
+    Use LLM to intelligently detect if tagging already exists
+    
+    LLM reads:
+    1. Tagging framework (what functions exist)
+    2. Target file (what's currently there)
+    3. Instruction (what we want to add)
+    
+    LLM decides: "Is this tagging already present?"
+    
+    Returns:
+        (already_tagged: bool, reason: str)
+    """
+    return check_tagging_many_with_llm(
+        client, framework_content, target_file_content, [(tracking_function, instruction)]
+    )[0]
+
+
+def check_tagging_many_with_llm(
+    client: VegasLLMWrapper,
+    framework_content: str,
+    target_file_content: str,
+    checks: List[Tuple[str, Dict[str, Any]]],
+    max_concurrency: Optional[int] = None,
+    target_file_path: Optional[str] = None
+) -> List[Tuple[bool, str]]:
+    """
+    check_tagging_with_llm for several (tracking_function, instruction) pairs
+    of one file, sent concurrently instead of one round-trip after another
+    
+    target_file_path only names the prompt dumps (see _debug_dump).
+    
+    Returns:
+        (already_tagged, reason) per check, in order
+    """
+    prompts = [
+        _tagging_check_prompt(framework_content, target_file_content, func, instruction)
+        for func, instruction in checks
+    ]
+    if target_file_path:
+        for n, prompt in enumerate(prompts, 1):
+            _debug_dump(f"check_prompt{n}", target_file_path, prompt)
     
     try:
-        with open("prompt.txt", 'w', encoding='utf-8') as f:
-            f.write(prompt)
-        response = client.invoke(prompt)
-        result = _extract_json(response)
-        
-        if not result:
-            return (False, "Could not parse LLM response - assuming needs tagging")
-        
-        already_tagged = result.get("already_tagged", False)
-        reason = result.get("reason", "LLM decision")
-        
-        return (already_tagged, reason)
-        
+        responses = client.invoke_many(prompts, max_concurrency=max_concurrency, stage="check_tagging")
     except Exception as e:
-        print(f"  ⚠️  LLM check failed ({e}), proceeding with tagging")
-        return (False, f"LLM check failed: {str(e)}")
+        responses = [e] * len(prompts)
+    return [_parse_tagging_check(r) for r in responses]
 
 
 def has_tagging_already_simple(file_content: str, tracking_function: str) -> bool:
@@ -164,25 +232,35 @@ def _ai_edit_file_smart(
     instruction: Dict[str, Any],
     anchor_line: int,
     snippet: Optional[str] = None,
+    instructions: Optional[List[Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """
     Call LLM with smart prompt that includes Tagging framework context
+    
+    When `instructions` is given, all of them are applied to the file in one
+    multi-instruction edit and `instruction`/`anchor_line`/`snippet` are ignored.
     """
     
     # Build intelligent prompt
-    prompt = prompt_builder.build_intelligent_prompt(
-        target_file_path=target_file_path,
-        target_file_content=file_content,
-        instruction=instruction,
-        anchor_line=anchor_line,
-        snippet=snippet
-    )
+    if instructions:
+        prompt = prompt_builder.build_multi_instruction_prompt(
+            target_file_path=target_file_path,
+            target_file_content=file_content,
+            instructions=instructions
+        )
+    else:
+        prompt = prompt_builder.build_intelligent_prompt(
+            target_file_path=target_file_path,
+            target_file_content=file_content,
+            instruction=instruction,
+            anchor_line=anchor_line,
+            snippet=snippet
+        )
     
     try:
         # Call Vegas LLM
-        with open("smart_prompt.txt", 'w', encoding='utf-8') as f:
-            f.write(prompt)
-        response_text = client.invoke(prompt)
+        _debug_dump("smart_prompt", target_file_path, prompt)
+        response_text = client.invoke(prompt, stage="edit_file")
         
         # Extract JSON
         result = _extract_json(response_text)
@@ -207,7 +285,7 @@ def _ai_edit_file_smart(
     except Exception as e:
         return {
             "applied": False,
-            "reason": f"LLM error: {str(e)}",
+            "reason": _llm_error_reason(e),
             "updated_file": file_content,
             "import_added": False,
             "hook_added": False,
@@ -215,12 +293,367 @@ def _ai_edit_file_smart(
         }
 
 
+def _ai_patch_file_smart(
+    client: VegasLLMWrapper,
+    prompt_builder: SmartPromptBuilder,
+    target_file_path: str,
+    file_content: str,
+    instructions: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Call LLM with the patch protocol: it returns anchored operations, which
+    are applied locally by PatchApplier to produce updated_file
+    
+    Sets "patch_failed" when the operations can't be anchored, so the caller
+    can fall back to a full-file edit.
+    """
+    prompt = prompt_builder.build_patch_prompt(
+        target_file_path=target_file_path,
+        target_file_content=file_content,
+        instructions=instructions
+    )
+    
+    unchanged = {
+        "applied": False,
+        "updated_file": file_content,
+        "import_added": False,
+        "hook_added": False,
+        "tracking_added": False
+    }
+    
+    try:
+        _debug_dump("patch_prompt", target_file_path, prompt)
+        response_text = client.invoke(prompt, stage="patch_file")
+    except Exception as e:
+        return {**unchanged, "reason": _llm_error_reason(e)}
+    
+    result = _extract_json(response_text)
+    if not result or not isinstance(result, dict):
+        return {**unchanged, "reason": "Could not extract JSON from LLM response", "patch_failed": True}
+    
+    operations = result.get("operations") or []
+    if not result.get("applied") or not operations:
+        return {**unchanged, **result, "updated_file": file_content}
+    
+    try:
+        updated, op_log = PatchApplier(file_content).apply(operations)
+    except PatchError as e:
+        return {**unchanged, "reason": f"Patch could not be applied: {e}", "patch_failed": True}
+    
+    result["updated_file"] = updated
+    result["operations_log"] = op_log
+    return result
+
+
+def _new_item_result() -> Dict[str, Any]:
+    """Per-item outcome merged into the run totals in spec order"""
+    return {
+        "outcome": None,  # "ok" | "fail" | "skipped"
+        "log": None,
+        "stats": {
+            "processed": 0,
+            "success": 0,
+            "failed": 0,
+            "skipped_already_tagged": 0,
+            "import_added": 0,
+            "hook_added": 0,
+            "tracking_added": 0,
+        },
+    }
+
+
+def _resolve_target(it: Dict[str, Any], repo: Path) -> Optional[Path]:
+    """Resolve the item's target file against the repo root"""
+    file_hint = it.get("file") or it.get("file_path")
+    if not file_hint:
+        return None
+    target = Path(file_hint)
+    if not target.is_absolute():
+        target = (repo / target).resolve()
+    return target
+
+
+def _item_instruction(it: Dict[str, Any]) -> Dict[str, Any]:
+    """Instruction dict for one spec item (as sent to the prompt builder)"""
+    tracking_func = it.get("suggested_event_name") or it.get("event") or "trackPageLoad"
+    return {
+        "action": (it.get("action") or "").lower().strip() or "page_load",
+        "event": tracking_func,
+        "params": it.get("suggested_params") or it.get("params") or {},
+        "description": it.get("description") or "",
+        "anchor_line": int((it.get("top_match") or {}).get("line") or 1),
+        "snippet": it.get("snippet"),
+    }
+
+
+def _plan_file_edits(items: List[Dict[str, Any]], repo: Path) -> List[Dict[str, Any]]:
+    """
+    Planning stage: merge spec items that target the same file
+    
+    Each plan is {"target": Path | None, "entries": [(idx, item), ...]} in
+    first-seen order. All entries of a plan are applied with ONE LLM edit and
+    ONE write, so later items can't clobber earlier ones and writes to a file
+    are never concurrent.
+    """
+    plans: Dict[str, Dict[str, Any]] = {}
+    for idx, it in enumerate(items, 1):
+        target = _resolve_target(it, repo)
+        key = str(target) if target else f"__no_file__{idx}"
+        plan = plans.setdefault(key, {"target": target, "entries": []})
+        plan["entries"].append((idx, it))
+    return list(plans.values())
+
+
+def _process_file_plan(
+    plan: Dict[str, Any],
+    total: int,
+    client: VegasLLMWrapper,
+    prompt_builder: SmartPromptBuilder,
+    repo: Path,
+    dry_run: bool,
+    skip_if_tagged: bool,
+    edit_mode: str = "full",
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Process all spec items for one file: pre-check each, one LLM edit, one write
+    
+    Returns (idx, item result) pairs (see _new_item_result) instead of mutating
+    shared counters, so plans can run on worker threads.
+    """
+    entries = plan["entries"]
+    target = plan["target"]
+    results = {idx: _new_item_result() for idx, _ in entries}
+    
+    def _fail_all(idxs) -> List[Tuple[int, Dict[str, Any]]]:
+        for idx in idxs:
+            results[idx]["outcome"] = "fail"
+            results[idx]["stats"]["failed"] += 1
+        return sorted(results.items())
+    
+    label = ", ".join(str(idx) for idx, _ in entries)
+    print(f"\n[{label}/{total}] Processing...")
+    
+    # Resolve target file
+    print(entries[0][1].get("file") or entries[0][1].get("file_path"))
+    if target is None:
+        print(f"✗ No file path in item")
+        return _fail_all(results)
+    
+    if not target.exists():
+        print(f"✗ File not found: {target}")
+        return _fail_all(results)
+    
+    try:
+        print(target)
+
+        src = _read_text(target)
+        _debug_dump("current_file", str(target.relative_to(repo)), src)
+        
+    except Exception as e:
+        print(f"✗ Read failed: {e}")
+        return _fail_all(results)
+    
+    # NEW: Pre-check for existing tagging (idempotency) - SMART CHECK
+    pending: List[Tuple[int, Dict[str, Any], Dict[str, Any]]] = []
+    instructions = {idx: _item_instruction(it) for idx, it in entries}
+    
+    # STEP 1: Quick filter - is function name even present?
+    to_check = []
+    if skip_if_tagged:
+        for idx, it in entries:
+            tracking_func = instructions[idx]["event"]
+            if not has_tagging_already_simple(src, tracking_func):
+                print(f"  ℹ️  Function '{tracking_func}' not found, will proceed to LLM")
+            else:
+                print(f"  🔍 Checking if '{tracking_func}' is already properly tagged (using LLM)...")
+                to_check.append(idx)
+    
+    # STEP 2: Use LLM to intelligently check if already tagged - all checks
+    # of this file in flight together
+    decisions: Dict[int, Tuple[bool, str]] = {}
+    if to_check:
+        # Read framework for context (once per file)
+        framework_path = repo / "src" / "pages" / "ExpressStore" / "Tagging" / "index.js"
+        framework_content = _read_text(framework_path) if framework_path.exists() else ""
+        
+        # LLM check: Pass both framework + target file
+        checks = [
+            (
+                instructions[idx]["event"],
+                {
+                    "action": instructions[idx]["action"],
+                    "event": instructions[idx]["event"],
+                    "params": instructions[idx]["params"]
+                }
+            )
+            for idx in to_check
+        ]
+        decisions = dict(zip(to_check, check_tagging_many_with_llm(
+            client=client,
+            framework_content=framework_content,
+            target_file_content=src,
+            checks=checks,
+            target_file_path=str(target.relative_to(repo)),
+        )))
+    
+    for idx, it in entries:
+        instruction = instructions[idx]
+        
+        if idx in decisions:
+            already_tagged, reason = decisions[idx]
+            
+            if already_tagged:
+                print(f"⊘ SKIPPED: {reason}")
+                results[idx]["log"] = {
+                    **it,
+                    "result": {
+                        "applied": False,
+                        "reason": f"Skipped (LLM detected): {reason}",
+                        "skipped": True
+                    }
+                }
+                results[idx]["outcome"] = "skipped"
+                results[idx]["stats"]["skipped_already_tagged"] += 1
+                continue
+            else:
+                print(f"  ✓ LLM confirmed: {reason} - Will apply tagging")
+        
+        pending.append((idx, it, instruction))
+    
+    if not pending:
+        return sorted(results.items())
+    
+    print(f"  File: {target.name}")
+    for _, _, instruction in pending:
+        print(f"  Event: {instruction['event']}")
+        print(f"  Action: {instruction['action']}")
+    
+    # Call improved LLM with framework context - one edit for all pending items
+    first = pending[0][2]
+    result = None
+    if edit_mode == "patch":
+        result = _ai_patch_file_smart(
+            client=client,
+            prompt_builder=prompt_builder,
+            target_file_path=str(target.relative_to(repo)),
+            file_content=src,
+            instructions=[ins for _, _, ins in pending],
+        )
+        if result.get("patch_failed"):
+            print(f"  ⚠️  {result.get('reason')} - falling back to full-file edit")
+            result = None
+    
+    if result is None:
+        result = _ai_edit_file_smart(
+            client=client,
+            prompt_builder=prompt_builder,
+            target_file_path=str(target.relative_to(repo)),
+            file_content=src,
+            instruction={
+                "action": first["action"],
+                "event": first["event"],
+                "params": first["params"]
+            },
+            anchor_line=first["anchor_line"],
+            snippet=first["snippet"],
+            instructions=[ins for _, _, ins in pending] if len(pending) > 1 else None,
+        )
+    
+    applied = result.get("applied", False)
+    reason = result.get("reason", "No changes")
+    new_src = result.get("updated_file", src)
+    
+    print(f"  Result: {reason}")
+    
+    # Per-instruction outcome when the LLM reports it (multi-instruction edits);
+    # items it does not mention follow the overall result
+    item_reasons: Dict[int, str] = {}
+    item_applied: Dict[int, bool] = {idx: bool(applied) for idx, _, _ in pending}
+    for entry in result.get("instructions") or []:
+        if isinstance(entry, dict) and isinstance(entry.get("index"), int):
+            n = entry["index"]
+            if not 1 <= n <= len(pending):
+                continue
+            idx = pending[n - 1][0]
+            if entry.get("reason"):
+                item_reasons[idx] = entry["reason"]
+            if "applied" in entry:
+                item_applied[idx] = bool(entry["applied"])
+    
+    # Track what was added: a tracking call per applied item, the import and
+    # hook (added once per file) to the first applied item
+    applied_items = [idx for idx, _, _ in pending if item_applied[idx]]
+    if result.get("tracking_added"):
+        for idx in applied_items:
+            results[idx]["stats"]["tracking_added"] += 1
+    if applied_items:
+        first_stats = results[applied_items[0]]["stats"]
+        if result.get("import_added"):
+            first_stats["import_added"] += 1
+        if result.get("hook_added"):
+            first_stats["hook_added"] += 1
+    
+    # No changes
+    if not applied or new_src == src:
+        print(f"  ⊘ No changes needed")
+        for idx, it, _ in pending:
+            results[idx]["log"] = {**it, "result": {"applied": False, "reason": item_reasons.get(idx, reason)}}
+            results[idx]["outcome"] = "ok"
+            results[idx]["stats"]["processed"] += 1
+        return sorted(results.items())
+    
+    # Dry run
+    if dry_run:
+        print(f"  [DRY-RUN] Would update file")
+        for idx, it, _ in pending:
+            item_reason = item_reasons.get(idx, reason)
+            if item_applied[idx]:
+                item_reason = f"dry_run: {item_reason}"
+            results[idx]["log"] = {**it, "result": {"applied": item_applied[idx], "reason": item_reason}}
+            results[idx]["outcome"] = "ok"
+            results[idx]["stats"]["processed"] += 1
+        return sorted(results.items())
+    
+    # Write to file
+    try:
+        backup = target.with_suffix(target.suffix + ".taggingai.bak")
+        if not backup.exists():
+            _write_text(backup, src)
+        _write_text(target, new_src)
+        print(f"  ✓ Updated successfully")
+        for idx, it, _ in pending:
+            if not item_applied[idx]:
+                results[idx]["log"] = {**it, "result": {"applied": False, "reason": item_reasons.get(idx, reason)}}
+                results[idx]["outcome"] = "ok"
+                results[idx]["stats"]["processed"] += 1
+                continue
+            results[idx]["log"] = {
+                **it,
+                "result": {
+                    "applied": True,
+                    "reason": item_reasons.get(idx, reason),
+                    "backup": str(backup.name)
+                }
+            }
+            results[idx]["outcome"] = "ok"
+            results[idx]["stats"]["success"] += 1
+            results[idx]["stats"]["processed"] += 1
+    except Exception as e:
+        print(f"  ✗ Write failed: {e}")
+        _fail_all(idx for idx, _, _ in pending)
+    
+    return sorted(results.items())
+
+
 def ai_apply_from_json_smart(
     json_path: str | Path,
     repo_root: str | Path,
     model: str = "vegas",
     dry_run: bool = False,
     skip_if_tagged: bool = True,  # NEW: Skip already-tagged files
+    use_cache: Optional[bool] = None,
+    max_workers: int = 1,
+    edit_mode: str = "full",
 ) -> Tuple[int, int, Dict[str, Any]]:
     """
     Improved version: Read Tagging framework, let LLM decide
@@ -231,12 +664,20 @@ def ai_apply_from_json_smart(
         model: LLM model to use
         dry_run: Simulate without writing
         skip_if_tagged: Skip files that already have tagging (idempotency)
+        use_cache: Serve repeated prompts from the on-disk LLM cache
+                   (None = follow LLM_CACHE_DISABLE env)
+        max_workers: Files processed concurrently (max in-flight LLM requests).
+                     1 = serial. Items for the same file always run in order.
+        edit_mode: "full" - LLM returns the whole updated file
+                   "patch" - LLM returns anchored operations applied locally
+                   (falls back to "full" when they can't be anchored)
     
     Returns:
         (success_count, fail_count, statistics_dict)
     """
     
-    client = VegasLLMWrapper()
+    client = VegasLLMWrapper.shared(use_cache=use_cache)
+    telemetry_mark = client.telemetry.mark()
     js = Path(json_path).resolve()
     repo = Path(str(repo_root)).resolve()
     
@@ -300,167 +741,50 @@ def ai_apply_from_json_smart(
         "tracking_added": 0,
     }
     
-    for idx, it in enumerate(items, 1):
-        print(f"\n[{idx}/{len(items)}] Processing...")
-        
-        # Resolve target file
-        file_hint = it.get("file") or it.get("file_path")
-        print(file_hint)
-        if not file_hint:
-            print(f"✗ No file path in item")
-            fail += 1
-            stats["failed"] += 1
-            continue
-        
-        target = Path(file_hint)
-        if not target.is_absolute():
-            target = (repo / target).resolve()
-        
-        if not target.exists():
-            print(f"✗ File not found: {target}")
-            fail += 1
-            stats["failed"] += 1
-            continue
-        
-        try:
-            print(target)
-
-            src = _read_text(target)
-            with open(f"current_file{idx}.txt", 'w', encoding='utf-8') as f:
-                f.write(src)
-            
-        except Exception as e:
-            print(f"✗ Read failed: {e}")
-            fail += 1
-            stats["failed"] += 1
-            continue
-        
-        # NEW: Pre-check for existing tagging (idempotency) - SMART CHECK
-        tracking_func = it.get("suggested_event_name") or it.get("event") or "trackPageLoad"
-        
-        if skip_if_tagged:
-            # STEP 1: Quick filter - is function name even present?
-            if not has_tagging_already_simple(src, tracking_func):
-                print(f"  ℹ️  Function '{tracking_func}' not found, will proceed to LLM")
-            else:
-                # STEP 2: Use LLM to intelligently check if already tagged
-                print(f"  🔍 Checking if '{tracking_func}' is already properly tagged (using LLM)...")
-                
-                # Read framework for context
-                framework_path = repo / "src" / "pages" / "ExpressStore" / "Tagging" / "index.js"
-                framework_content = _read_text(framework_path) if framework_path.exists() else ""
-                
-                # Get instruction details
-                instruction = {
-                    "action": (it.get("action") or "").lower().strip() or "page_load",
-                    "event": tracking_func,
-                    "params": it.get("suggested_params") or it.get("params") or {}
-                }
-                
-                # LLM check: Pass both framework + target file
-                already_tagged, reason = check_tagging_with_llm(
-                    client=client,
-                    framework_content=framework_content,
-                    target_file_content=src,
-                    tracking_function=tracking_func,
-                    instruction=instruction
-                )
-                
-                if already_tagged:
-                    print(f"⊘ SKIPPED: {reason}")
-                    logs.append({
-                        **it,
-                        "result": {
-                            "applied": False,
-                            "reason": f"Skipped (LLM detected): {reason}",
-                            "skipped": True
-                        }
-                    })
-                    skipped += 1
-                    stats["skipped_already_tagged"] += 1
-                    continue
-                else:
-                    print(f"  ✓ LLM confirmed: {reason} - Will apply tagging")
-        
-        # Gather instruction
-        action = (it.get("action") or "").lower().strip() or "page_load"
-        event = tracking_func
-        params = it.get("suggested_params") or it.get("params") or {}
-        snippet = it.get("snippet")
-        anchor = int((it.get("top_match") or {}).get("line") or 1)
-        
-        print(f"  File: {target.name}")
-        print(f"  Event: {event}")
-        print(f"  Action: {action}")
-        
-        # Call improved LLM with framework context
-        
-        result = _ai_edit_file_smart(
-            client=client,
-            prompt_builder=prompt_builder,
-            target_file_path=str(target.relative_to(repo)),
-            file_content=src,
-            instruction={
-                "action": action,
-                "event": event,
-                "params": params
-            },
-            anchor_line=anchor,
-            snippet=snippet
-        )
-        
-        applied = result.get("applied", False)
-        reason = result.get("reason", "No changes")
-        new_src = result.get("updated_file", src)
-        
-        print(f"  Result: {reason}")
-        
-        # Track what was added
-        if result.get("import_added"):
-            stats["import_added"] += 1
-        if result.get("hook_added"):
-            stats["hook_added"] += 1
-        if result.get("tracking_added"):
-            stats["tracking_added"] += 1
-        
-        # No changes
-        if not applied or new_src == src:
-            print(f"  ⊘ No changes needed")
-            logs.append({**it, "result": {"applied": False, "reason": reason}})
-            ok += 1
-            stats["processed"] += 1
-            continue
-        
-        # Dry run
-        if dry_run:
-            print(f"  [DRY-RUN] Would update file")
-            logs.append({**it, "result": {"applied": True, "reason": f"dry_run: {reason}"}})
-            ok += 1
-            stats["processed"] += 1
-            continue
-        
-        # Write to file
-        try:
-            backup = target.with_suffix(target.suffix + ".taggingai.bak")
-            if not backup.exists():
-                _write_text(backup, src)
-            _write_text(target, new_src)
-            print(f"  ✓ Updated successfully")
-            logs.append({
-                **it,
-                "result": {
-                    "applied": True,
-                    "reason": reason,
-                    "backup": str(backup.name)
-                }
-            })
+    total = len(items)
+    results: Dict[int, Dict[str, Any]] = {}
+    
+    def _run_plan(plan: Dict[str, Any]) -> List[Tuple[int, Dict[str, Any]]]:
+        return _process_file_plan(plan, total, client, prompt_builder, repo, dry_run, skip_if_tagged, edit_mode)
+    
+    # Planning stage: one edit per file, even when several items target it
+    plans = _plan_file_edits(items, repo)
+    merged = sum(1 for plan in plans if len(plan["entries"]) > 1)
+    if merged:
+        print(f"🧩 Merged {len(items)} items into {len(plans)} file edits")
+    stats["file_edits"] = len(plans)
+    
+    workers = max(1, min(int(max_workers or 1), len(plans)))
+    
+    if workers == 1:
+        for plan in plans:
+            results.update(_run_plan(plan))
+    else:
+        print(f"⚡ Processing {len(plans)} files with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for plan_results in pool.map(_run_plan, plans):
+                results.update(plan_results)
+    
+    # Merge in spec order so logs and stats are deterministic
+    for idx in sorted(results):
+        res = results[idx]
+        for key, val in res["stats"].items():
+            stats[key] += val
+        if res["log"] is not None:
+            logs.append(res["log"])
+        if res["outcome"] == "ok":
             ok += 1
-            stats["success"] += 1
-            stats["processed"] += 1
-        except Exception as e:
-            print(f"  ✗ Write failed: {e}")
+        elif res["outcome"] == "skipped":
+            skipped += 1
+        else:
             fail += 1
-            stats["failed"] += 1
+    
+    cache_stats = client.cache_stats()
+    if cache_stats:
+        stats["llm_cache"] = cache_stats
+    traffic_stats = client.traffic_stats()
+    stats["llm_traffic"] = traffic_stats
+    telemetry = client.telemetry.summary(since=telemetry_mark)
     
     # Save logs
     try:
@@ -468,7 +792,8 @@ def ai_apply_from_json_smart(
         with open(log_file, 'w', encoding='utf-8') as f:
             json.dump({
                 "logs": logs,
-                "stats": stats
+                "stats": stats,
+                "llm_telemetry": telemetry
             }, f, indent=2, ensure_ascii=False)
         print(f"\n📋 Logs saved: {log_file}")
     except Exception:
@@ -484,6 +809,13 @@ def ai_apply_from_json_smart(
     print(f"  Imports added:        {stats['import_added']}")
     print(f"  Hooks added:          {stats['hook_added']}")
     print(f"  Tracking calls added: {stats['tracking_added']}")
+    if cache_stats:
+        print(f"  LLM cache hits:       {cache_stats['hits']} (misses: {cache_stats['misses']})")
+    if traffic_stats["requests"]:
+        concurrency = traffic_stats["concurrency"]
+        print(f"  LLM requests:         {traffic_stats['requests']} (throttled: {concurrency['throttled']}, concurrency limit: {concurrency['limit']})")
+    for stage, agg in telemetry["stages"].items():
+        print(f"  LLM {stage + ':':<18}{agg['calls']} calls, {agg['total_tokens']} tokens, p95 {agg['latency_ms'].get('p95', '-')} ms")
     print()
     
     return (ok, fail, stats)
@@ -501,6 +833,10 @@ if __name__ == "__main__":
     ap.add_argument("--model", default="vegas")
     ap.add_argument("--dry-run", action="store_true")
     ap.add_argument("--no-skip", action="store_true", help="Don't skip already-tagged files")
+    ap.add_argument("--no-cache", action="store_true", help="Bypass the on-disk LLM response cache")
+    ap.add_argument("--workers", type=int, default=1, help="Files to process concurrently (default: 1, serial)")
+    ap.add_argument("--edit-mode", choices=["full", "patch"], default="full",
+                    help="full: LLM returns whole file; patch: LLM returns anchored operations")
     
     args = ap.parse_args()
     
@@ -509,7 +845,10 @@ if __name__ == "__main__":
         repo_root=args.repo,
         model=args.model,
         dry_run=args.dry_run,
-        skip_if_tagged=not args.no_skip
+        skip_if_tagged=not args.no_skip,
+        use_cache=False if args.no_cache else None,
+        max_workers=args.workers,
+        edit_mode=args.edit_mode
     )
     
     print(f"\nFinal Result: {ok} processed, {fail} failed")
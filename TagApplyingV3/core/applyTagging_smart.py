@@ -207,7 +207,9 @@ def main():
             repo_path,
             model="vegas",
             dry_run=False,
-            skip_if_tagged=True
+            skip_if_tagged=True,
+            max_workers=int(os.getenv("TAGGING_WORKERS") or 1),
+            edit_mode=os.getenv("TAGGING_EDIT_MODE") or "full"
         )
     except Exception as e:
         print(f"\n✗ Error during application: {e}")
@@ -0,0 +1,59 @@
+"""
+Regression tests for PatchApplier
+
+Run from TagApplyingV3/core:
+    python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.patch_applier import PatchApplier, PatchError
+
+SOURCE = "import React from 'react';\n\nexport default function Page() {\n  return null;\n}\n"
+
+
+@pytest.mark.parametrize("operations", [
+    [None],
+    ["x"],
+    {"op": "insert_import", "code": "import x from 'y';"},
+    "insert_import",
+    [{"op": "insert_import", "code": "import x from 'y';"}, 42],
+    [{"op": "insert_import", "code": ["x"]}],
+    [{"op": "replace_text", "old": 5, "new": "y"}],
+    [{"op": "insert_in_function", "function": 1, "code": "track();"}],
+    [{"op": "insert_after_line", "line": "2", "code": "track();"}],
+])
+def test_malformed_operations_raise_patch_error(operations):
+    with pytest.raises(PatchError):
+        PatchApplier(SOURCE).apply(operations)
+
+
+def test_insert_import_applies():
+    updated, log = PatchApplier(SOURCE).apply([
+        {"op": "insert_import", "code": "import { track } from './track';"},
+    ])
+    assert "import { track } from './track';\n" in updated
+    assert log[0]["status"] == "applied"
+
+
+def test_insert_in_function_skips_multiline_destructured_props():
+    source = "const Page = ({\n  a,\n  b,\n}) => {\n  return null;\n};\n"
+    updated, _ = PatchApplier(source).apply([
+        {"op": "insert_in_function", "function": "Page", "code": "track();"},
+    ])
+    assert updated == "const Page = ({\n  a,\n  b,\n}) => {\n  track();\n  return null;\n};\n"
+
+
+@pytest.mark.parametrize("source", [
+    "const Page = () => (\n  <div>{x}</div>\n);\n",
+    "const Page = () => { go(); };\n",
+    "const Page = { a: () => {} };\n",
+])
+def test_insert_in_function_without_certain_body_raises(source):
+    with pytest.raises(PatchError):
+        PatchApplier(source).apply([{"op": "insert_in_function", "function": "Page", "code": "track();"}])
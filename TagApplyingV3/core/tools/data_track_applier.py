@@ -4,8 +4,10 @@ Smart Data-Track Attribute Applier
 Uses Vegas LLM to intelligently:
 1. Identify interactive elements
 2. Extract semantic values
-3. Generate and apply data-track attributes
-4. Preserve all other code
+3. Generate data-track attribute values
+
+Attributes are then inserted locally by DataTrackSplicer at the exact
+offsets found by ElementExtractor, preserving all other code byte-for-byte.
 """
 
 import json
@@ -198,6 +200,100 @@ For example:
 - Must be meaningful - describe the action
 - If text is very generic ("Click Here", "Submit"), use element context
 - Return valid JSON only
+"""
+        return prompt
+    
+    @staticmethod
+    def build_batch_value_generation_prompt(
+        file_content: str,
+        file_path: str,
+        elements: List[Dict[str, Any]]
+    ) -> str:
+        """
+        Build ONE prompt that generates data-track values for many elements
+        
+        The file is embedded once and every element is listed with its own
+        index, so cost scales with file size rather than elements × file size.
+        
+        Args:
+            file_content: Full file content
+            file_path: Path to file
+            elements: Element info dicts (element_type, line_number,
+                      html_snippet, extracted_text)
+        
+        Returns:
+            Prompt for LLM
+        """
+        element_lines = []
+        for n, element in enumerate(elements, 1):
+            element_lines.append(
+                f"{n}. Line {element.get('line_number', '?')} | "
+                f"{element.get('element_type', 'element')} | "
+                f"text: \"{element.get('extracted_text', '')}\" | "
+                f"html: {element.get('html_snippet', '')}"
+            )
+        elements_block = "\n".join(element_lines)
+        
+        prompt = f"""You are an analytics expert specializing in semantic labeling.
+
+## CONTEXT
+
+**File**: {file_path}
+
+## FILE CONTEXT (for understanding purpose):
+```javascript
+{file_content}
+```
+
+## ELEMENTS
+
+Generate a `data-track` attribute value for EACH of these {len(elements)} elements:
+
+{elements_block}
+
+## TASK
+
+Each value should:
+1. Be **semantic** - clearly indicate what the element does
+2. Be **concise** - brief but meaningful
+3. Use **kebab-case** - lowercase with hyphens, NO spaces or underscores
+4. Be **actionable** - describe the action/button purpose
+5. Have **max 50 characters**
+6. Use only **alphanumeric and hyphens**
+7. Be **unique within this file** - two elements should not share a value
+
+## EXAMPLES
+
+```
+Button with text "Pay Bill" → data-track="pay-bill"
+Div with text "Close Modal" → data-track="close-modal"
+Link to "/dashboard" → data-track="go-to-dashboard"
+Button with icon only → derive from handler name or surrounding context
+```
+
+## OUTPUT
+
+Return ONLY valid JSON (no markdown, no explanation), with one entry per
+element using the element number above as "index":
+```json
+{{
+  "values": [
+    {{
+      "index": 1,
+      "data_track_value": "pay-bill",
+      "reasoning": "Button allows user to pay their bill",
+      "confidence": "high|medium|low"
+    }}
+  ]
+}}
+```
+
+## CRITICAL RULES
+
+- Return exactly {len(elements)} entries, one per element index
+- Value must be kebab-case (no spaces, underscores, or special chars)
+- If text is very generic ("Click Here", "Submit"), use element context
+- Return valid JSON only
 """
         return prompt
     
@@ -416,7 +512,7 @@ class DataTrackApplier:
         )
         
         try:
-            response = self.client.invoke(prompt)
+            response = self.client.invoke(prompt, stage="detect_elements")
             result = self.extract_json_from_response(response)
             
             elements = result.get("elements", [])
@@ -453,7 +549,7 @@ class DataTrackApplier:
         )
         
         try:
-            response = self.client.invoke(prompt)
+            response = self.client.invoke(prompt, stage="generate_value")
             result = self.extract_json_from_response(response)
             
             value = result.get("data_track_value", "")
@@ -477,6 +573,117 @@ class DataTrackApplier:
             value = sanitizer.sanitize(extracted_text)
             return (value, f"Fallback due to LLM error: {e}", "low")
     
+    def generate_values_with_llm(
+        self,
+        file_content: str,
+        file_path: str,
+        elements: List[Dict[str, Any]],
+        extracted_texts: List[str],
+        batch_size: int = 40
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Generate data-track values for many elements of one file in batched calls
+        
+        Sends the file once per batch of `batch_size` elements instead of once
+        per element. Elements missing from the response, or with an invalid
+        value, fall back to the sanitized extracted text.
+        
+        Args:
+            file_content: File content
+            file_path: Path to file
+            elements: Element info dicts (element_type, line_number, html_snippet)
+            extracted_texts: Extracted text per element (same order as elements)
+            batch_size: Maximum elements per LLM request
+        
+        Returns:
+            List of (data_track_value, reasoning, confidence), one per element
+        """
+        return self.generate_values_for_files(
+            [{
+                "file_content": file_content,
+                "file_path": file_path,
+                "elements": elements,
+                "extracted_texts": extracted_texts,
+            }],
+            batch_size=batch_size
+        )[0]
+    
+    def generate_values_for_files(
+        self,
+        jobs: List[Dict[str, Any]],
+        batch_size: int = 40,
+        max_concurrency: Optional[int] = None
+    ) -> List[List[Tuple[str, str, str]]]:
+        """
+        generate_values_with_llm for several files, with every batch request
+        of every file in flight together (at most `max_concurrency` at once)
+        
+        Args:
+            jobs: Dicts with file_content, file_path, elements, extracted_texts
+            batch_size: Maximum elements per LLM request
+            max_concurrency: In-flight requests (default: LLM_MAX_CONCURRENCY)
+        
+        Returns:
+            Per job, the list of (data_track_value, reasoning, confidence)
+        """
+        batches = []  # (job index, extracted texts of the batch)
+        prompts = []
+        for job_idx, job in enumerate(jobs):
+            elements = job["elements"]
+            extracted_texts = job["extracted_texts"]
+            for start in range(0, len(elements), max(1, batch_size)):
+                batch = elements[start:start + batch_size]
+                texts = extracted_texts[start:start + batch_size]
+                batches.append((job_idx, texts))
+                prompts.append(self.prompt_builder.build_batch_value_generation_prompt(
+                    job["file_content"],
+                    job["file_path"],
+                    [{**element, "extracted_text": text} for element, text in zip(batch, texts)]
+                ))
+        
+        try:
+            responses = self.client.invoke_many(prompts, max_concurrency=max_concurrency, stage="generate_values")
+        except Exception as e:
+            responses = [e] * len(prompts)
+        
+        results: List[List[Tuple[str, str, str]]] = [[] for _ in jobs]
+        for (job_idx, texts), response in zip(batches, responses):
+            results[job_idx].extend(self._parse_batch_values(response, texts))
+        return results
+    
+    def _parse_batch_values(self, response, texts: List[str]) -> List[Tuple[str, str, str]]:
+        """Values for one batch from its LLM response (or the exception it raised)"""
+        sanitizer = ValueSanitizer()
+        by_index: Dict[int, Dict[str, Any]] = {}
+        error = None
+        try:
+            if isinstance(response, Exception):
+                raise response
+            result = self.extract_json_from_response(response)
+            for entry in result.get("values", []):
+                if isinstance(entry, dict) and isinstance(entry.get("index"), int):
+                    by_index[entry["index"]] = entry
+        except Exception as e:
+            print(f"  ⚠️  LLM batch value generation failed: {e}")
+            error = e
+        
+        results: List[Tuple[str, str, str]] = []
+        for n, text in enumerate(texts, 1):
+            entry = by_index.get(n)
+            if entry is None:
+                reason = f"Fallback due to LLM error: {error}" if error else "Fallback: element missing from LLM response"
+                results.append((sanitizer.sanitize(text), reason, "low"))
+                continue
+            
+            value = sanitizer.sanitize(entry.get("data_track_value", ""))
+            if not sanitizer.is_valid_value(value):
+                # Fallback to sanitized extracted text
+                value = sanitizer.sanitize(text)
+            
+            results.append((value, entry.get("reasoning", ""), entry.get("confidence", "low")))
+        
+        return results
+    
     def apply_data_track_with_llm(
         self,
         file_content: str,
@@ -504,7 +711,7 @@ class DataTrackApplier:
         )
         
         try:
-            response = self.client.invoke(prompt)
+            response = self.client.invoke(prompt, stage="apply_data_track")
             
             # LLM returns updated file content directly (not JSON)
             updated_content = response.strip()
@@ -524,3 +731,100 @@ class DataTrackApplier:
         except Exception as e:
             print(f"  ⚠️  LLM code generation failed: {e}")
             return (file_content, [{"status": "error", "reason": str(e)}])
+
+
+class DataTrackSplicer:
+    """
+    Inserts data-track attributes locally at exact offsets - no LLM round-trip
+    
+    ElementExtractor records the absolute offset (and line_number /
+    column_start) of the opening `<` for every element. The splicer inserts
+    ` data-track="value"` right after the tag name, and builds the new file
+    in one pass. All offsets refer to the ORIGINAL content, so earlier
+    insertions never shift later ones.
+    """
+    
+    TAG_NAME_PATTERN = re.compile(r'<([A-Za-z][\w.]*)')
+    
+    @staticmethod
+    def line_offsets(file_content: str) -> List[int]:
+        """Absolute offset of the start of each line (lines split the same way as ElementExtractor)"""
+        offsets = [0]
+        for line in file_content.split('\n'):
+            offsets.append(offsets[-1] + len(line) + 1)
+        return offsets
+    
+    @classmethod
+    def apply(
+        cls,
+        file_content: str,
+        elements_to_modify: List[Dict[str, Any]],
+        attribute: str = "data-track"
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Insert attributes for all elements in one pass
+        
+        Args:
+            file_content: Original file content
+            elements_to_modify: Dicts with line_number, column_start (or an
+                absolute "offset"), element_type, data_track_value, current_html
+                and optionally has_data_track (checked instead of current_html
+                when attribute is "data-track")
+            attribute: Attribute name to insert
+        
+        Returns:
+            (updated_file_content, modification_log)
+        """
+        offsets = cls.line_offsets(file_content)
+        edits: Dict[int, str] = {}
+        log: List[Dict[str, Any]] = []
+        
+        for elem in elements_to_modify:
+            entry = {
+                "line": elem.get("line_number"),
+                "element_type": elem.get("element_type"),
+                "data_track_value": elem.get("data_track_value"),
+            }
+            log.append(entry)
+            
+            pos = elem.get("offset")
+            if pos is None:
+                line_number = elem.get("line_number") or 0
+                if not 1 <= line_number < len(offsets):
+                    entry.update(status="skipped", reason=f"Line {line_number} out of range")
+                    continue
+                pos = offsets[line_number - 1] + (elem.get("column_start") or 0)
+            
+            match = cls.TAG_NAME_PATTERN.match(file_content, pos)
+            if not match:
+                entry.update(status="skipped", reason="No opening tag at recorded offset")
+                continue
+            
+            already = elem.get("has_data_track") if attribute == "data-track" else None
+            if already is None:
+                already = attribute in (elem.get("current_html") or "")
+            if already:
+                entry.update(status="skipped", reason=f"Element already has {attribute}")
+                continue
+            
+            insert_at = match.end()
+            if insert_at in edits:
+                entry.update(status="skipped", reason="Duplicate element offset")
+                continue
+            
+            value = str(elem.get("data_track_value", "")).replace('"', "&quot;")
+            edits[insert_at] = f' {attribute}="{value}"'
+            entry["status"] = "applied"
+        
+        if not edits:
+            return (file_content, log)
+        
+        pieces: List[str] = []
+        prev = 0
+        for insert_at in sorted(edits):
+            pieces.append(file_content[prev:insert_at])
+            pieces.append(edits[insert_at])
+            prev = insert_at
+        pieces.append(file_content[prev:])
+        
+        return ("".join(pieces), log)
@@ -9,11 +9,14 @@ No hardcoding - full LLM-driven analysis.
 
 import json
 import re
+from bisect import bisect_right
 from pathlib import Path
 from typing import Dict, Any, List, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from .jsx_scanner import scan_jsx_tags, JSXTag
+
 
 class ElementType(Enum):
     """Types of interactive elements"""
@@ -37,6 +40,7 @@ class InteractiveElement:
     has_data_track: bool
     attributes: Dict[str, str]
     parent_component: Optional[str] = None
+    offset: Optional[int] = None  # absolute offset of the opening "<"
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization"""
@@ -48,7 +52,8 @@ class InteractiveElement:
             "inner_text": self.inner_text,
             "has_data_track": self.has_data_track,
             "attributes": self.attributes,
-            "parent_component": self.parent_component
+            "parent_component": self.parent_component,
+            "offset": self.offset
         }
 
 
@@ -58,13 +63,26 @@ class ElementExtractor:
     
     Finds:
     - <button> elements
-    - Elements with onClick handlers
+    - Elements with onClick handlers (div, span, input, label, a)
     - <Link> components
-    - <a> anchor tags
     
-    Uses regex patterns - all values passed to LLM for final validation
+    One pass of the JSX tag scanner (tools/jsx_scanner.py) finds every tag,
+    including tags spanning several lines, while skipping strings, template
+    literals and comments. All values are passed to the LLM for final
+    validation.
     """
     
+    # lowercase tag name -> element type for tags that count only with an onClick handler
+    ONCLICK_TAG_TYPES = {
+        "div": ElementType.DIV,
+        "span": ElementType.SPAN,
+        "input": ElementType.INPUT,
+        "label": ElementType.CUSTOM,
+        "a": ElementType.ANCHOR,
+    }
+    ONCLICK_PATTERN = re.compile(r'\bonClick\w*\s*=')
+    MAX_HTML_LENGTH = 300
+    
     def __init__(self, file_path: str, file_content: str):
         """
         Initialize extractor with file content
@@ -77,156 +95,59 @@ class ElementExtractor:
         self.file_content = file_content
         self.lines = file_content.split('\n')
         self.elements: List[InteractiveElement] = []
+        
+        self._line_starts = [0]
+        for line in self.lines[:-1]:
+            self._line_starts.append(self._line_starts[-1] + len(line) + 1)
     
     def extract_all_interactive_elements(self) -> List[InteractiveElement]:
         """
         Extract all interactive elements from the file
         
         Returns:
-            List of InteractiveElement objects
+            List of InteractiveElement objects, in source order
         """
         self.elements = []
         
-        # Find all button elements
-        self._find_button_elements()
-        
-        # Find all onClick handlers (div, span, input, etc.)
-        self._find_onclick_elements()
-        
-        # Find Link and anchor components
-        self._find_routing_components()
-        
-        # Sort by line number
-        self.elements.sort(key=lambda x: (x.line_number, x.column_start))
+        for tag in scan_jsx_tags(self.file_content):
+            element_type = self._classify(tag)
+            if element_type is None:
+                continue
+            
+            attributes = self._parse_attributes(tag.attrs_text)
+            line_idx = bisect_right(self._line_starts, tag.start) - 1
+            
+            self.elements.append(InteractiveElement(
+                element_type=element_type,
+                line_number=line_idx + 1,
+                column_start=tag.start - self._line_starts[line_idx],
+                element_html=self.file_content[tag.start:tag.element_end][:self.MAX_HTML_LENGTH],
+                inner_text=self._inner_text(tag),
+                has_data_track='data-track' in attributes,
+                attributes=attributes,
+                offset=tag.start
+            ))
         
         return self.elements
     
-    def _find_button_elements(self):
-        """Find all <button> elements"""
-        # Pattern: <button ... >...</button>
-        # Matches: <button>, <button className="...">, <button onClick={...}>, etc.
-        pattern = r'<button\s+([^>]*)>([^<]*)</button>'
-        
-        for line_num, line in enumerate(self.lines, 1):
-            for match in re.finditer(pattern, line, re.IGNORECASE | re.DOTALL):
-                attributes_str = match.group(1)
-                inner_text = match.group(2).strip()
-                
-                # Parse attributes
-                attributes = self._parse_attributes(attributes_str)
-                has_data_track = 'data-track' in attributes
-                
-                element = InteractiveElement(
-                    element_type=ElementType.BUTTON,
-                    line_number=line_num,
-                    column_start=match.start(),
-                    element_html=match.group(0),
-                    inner_text=inner_text,
-                    has_data_track=has_data_track,
-                    attributes=attributes
-                )
-                
-                self.elements.append(element)
+    def _classify(self, tag: JSXTag) -> Optional[ElementType]:
+        """Element type for an interactive tag, None for everything else"""
+        name = tag.name.lower()
+        if name == "button":
+            return ElementType.BUTTON
+        if tag.name == "Link":
+            return ElementType.LINK
+        if name in self.ONCLICK_TAG_TYPES and self.ONCLICK_PATTERN.search(tag.attrs_text):
+            return self.ONCLICK_TAG_TYPES[name]
+        return None
     
-    def _find_onclick_elements(self):
-        """Find all elements with onClick handlers"""
-        # Pattern: elements with onClick={...} or onClick="..."
-        # Matches: <div onClick=...>, <span onClick=...>, <input onClick=...>
-        element_types = ['div', 'span', 'input', 'label', 'a']
-        
-        for elem_type in element_types:
-            # Self-closing: <element onClick=... />
-            self_closing_pattern = f'<{elem_type}\\s+([^>]*onClick[^>]*)\\s*/>'
-            
-            # Opening tag: <element onClick=...>
-            opening_pattern = f'<{elem_type}\\s+([^>]*onClick[^>]*)>'
-            
-            for line_num, line in enumerate(self.lines, 1):
-                # Self-closing elements
-                for match in re.finditer(self_closing_pattern, line, re.IGNORECASE):
-                    attributes_str = match.group(1)
-                    attributes = self._parse_attributes(attributes_str)
-                    has_data_track = 'data-track' in attributes
-                    
-                    element = InteractiveElement(
-                        element_type=ElementType(elem_type),
-                        line_number=line_num,
-                        column_start=match.start(),
-                        element_html=match.group(0),
-                        inner_text="",
-                        has_data_track=has_data_track,
-                        attributes=attributes
-                    )
-                    
-                    self.elements.append(element)
-                
-                # Opening tag (extract text from this and following lines)
-                for match in re.finditer(opening_pattern, line, re.IGNORECASE):
-                    attributes_str = match.group(1)
-                    attributes = self._parse_attributes(attributes_str)
-                    has_data_track = 'data-track' in attributes
-                    
-                    # Extract text until closing tag
-                    closing_tag = f'</{elem_type}>'
-                    closing_pos = line.find(closing_tag, match.end())
-                    
-                    inner_text = ""
-                    full_html = match.group(0)
-                    
-                    if closing_pos != -1:
-                        # Closing tag on same line
-                        inner_text = line[match.end():closing_pos].strip()
-                        full_html = line[match.start():closing_pos + len(closing_tag)]
-                    else:
-                        # Closing tag on next line
-                        inner_text = line[match.end():].strip()
-                        
-                        # Look for closing tag in next lines
-                        for next_line_idx in range(line_num, min(line_num + 10, len(self.lines))):
-                            next_line = self.lines[next_line_idx]
-                            closing_pos = next_line.find(closing_tag)
-                            
-                            if closing_pos != -1:
-                                if next_line_idx == line_num:
-                                    inner_text = next_line[:closing_pos].strip()
-                                break
-                    
-                    element = InteractiveElement(
-                        element_type=ElementType(elem_type),
-                        line_number=line_num,
-                        column_start=match.start(),
-                        element_html=full_html[:100],  # Truncate for storage
-                        inner_text=inner_text,
-                        has_data_track=has_data_track,
-                        attributes=attributes
-                    )
-                    
-                    self.elements.append(element)
-    
-    def _find_routing_components(self):
-        """Find Link and routing components"""
-        # Pattern: <Link ... >...</Link>
-        pattern = r'<Link\s+([^>]*)>([^<]*)</Link>'
-        
-        for line_num, line in enumerate(self.lines, 1):
-            for match in re.finditer(pattern, line):
-                attributes_str = match.group(1)
-                inner_text = match.group(2).strip()
-                
-                attributes = self._parse_attributes(attributes_str)
-                has_data_track = 'data-track' in attributes
-                
-                element = InteractiveElement(
-                    element_type=ElementType.LINK,
-                    line_number=line_num,
-                    column_start=match.start(),
-                    element_html=match.group(0),
-                    inner_text=inner_text,
-                    has_data_track=has_data_track,
-                    attributes=attributes
-                )
-                
-                self.elements.append(element)
+    def _inner_text(self, tag: JSXTag) -> str:
+        """Text between the opening and closing tag, nested tags removed"""
+        if tag.self_closing or tag.close_start is None:
+            return ""
+        inner = self.file_content[tag.end:tag.close_start]
+        inner = re.sub(r'<[^<>]*>', ' ', inner)
+        return re.sub(r'\s+', ' ', inner).strip()
     
     def _parse_attributes(self, attributes_str: str) -> Dict[str, str]:
         """
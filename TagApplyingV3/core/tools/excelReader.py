@@ -2,10 +2,13 @@
 from __future__ import annotations
 
 import re
+import json
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 
+import numpy as np
 import pandas as pd
 from langchain.tools import BaseTool
 
@@ -59,6 +62,46 @@ def _local_infer_action(texts: List[str]) -> Optional[str]:
                 return action
     return None
 
+def _norm_series(col: pd.Series) -> pd.Series:
+    """Column-wise _norm for already-stringified values."""
+    return col.str.replace(r"\s+", " ", regex=True).str.strip().str.lower()
+
+def _local_infer_actions(texts: List[pd.Series]) -> pd.Series:
+    """
+    Column-wise _local_infer_action: one vectorized keyword test per
+    (action, keyword) over the distinct texts instead of a Python loop per
+    row. Empty cells are skipped just like falsy values in the scalar version.
+    """
+    joined = texts[0]
+    for col in texts[1:]:
+        joined = joined + " " + col
+    joined = _norm_series(joined)
+
+    # specs repeat the same text a lot: test each distinct text once
+    codes, uniques = pd.factorize(joined)
+    padded = " " + pd.Series(uniques, dtype=object) + " "
+    conditions = [
+        np.logical_or.reduce([padded.str.contains(f" {k} ", regex=False).to_numpy() for k in keys])
+        for keys in ACTION_WORDS.values()
+    ]
+    actions = np.select(conditions, list(ACTION_WORDS.keys()), default="")
+    inferred = pd.Series(actions[codes], index=joined.index, dtype=object)
+    return inferred.mask(inferred == "", None)
+
+def _header_names(values: Tuple[Any, ...]) -> List[str]:
+    """Column names for a header row, like pandas: blanks -> "Unnamed: i", duplicates -> "name.1"."""
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for i, v in enumerate(values):
+        name = f"Unnamed: {i}" if v is None or str(v).strip() == "" else str(v)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
 def _phrases_in_quotes(text: str) -> List[str]:
     return [p.strip() for p in re.findall(r"[\"“”']([^\"“”']+)[\"“”']", str(text) or "") if p.strip()]
 
@@ -92,31 +135,108 @@ def _terms_from_row(description: str, component: Optional[str], adobe_val: Optio
             out.append(t)
     return out
 
-def vegas_llm_json_infer(row_payload: dict) -> dict:
+@lru_cache(maxsize=4096)
+def _cached_terms(description: str, component: Optional[str], adobe_val: Optional[str]) -> Tuple[str, ...]:
+    """_terms_from_row memoized: tech specs repeat the same description/component a lot."""
+    return tuple(_terms_from_row(description, component, adobe_val))
+
+INFER_PROMPT = (
+    "You are a senior analytics implementation engineer. "
+    "Given a Tech Spec row describing a UI element and analytics requirements, "
+    "return ONLY a JSON object with fields: "
+    "{action, page, target_terms}. "
+    "action ∈ {click, submit, view, back, exit, select, nav, general}. "
+    "page is a short page/screen name if obvious. "
+    "target_terms is a short list (1–4) of literal UI phrases users see/click. "
+    "No explanations."
+)
+
+BATCH_INFER_PROMPT = (
+    "You are a senior analytics implementation engineer. "
+    "Given a JSON array of Tech Spec rows, each describing a UI element and analytics requirements, "
+    "return ONLY a JSON array with one object per input row: "
+    "{row_index, action, page, target_terms}. "
+    "row_index must be copied from the input row. "
+    "action ∈ {click, submit, view, back, exit, select, nav, general}. "
+    "page is a short page/screen name if obvious. "
+    "target_terms is a short list (1–4) of literal UI phrases users see/click. "
+    "No explanations."
+)
+
+DEFAULT_INFER_BATCH_SIZE = 25
+
+_EMPTY_INFERENCE = {"action": None, "page": None, "target_terms": []}
+
+def _parse_llm_json(response: str) -> Any:
+    """json.loads that tolerates ```json fences around the payload."""
+    text = (response or "").strip()
+    m = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if m:
+        text = m.group(1).strip()
+    return json.loads(text)
+
+def _inference_fields(data: dict) -> dict:
+    return {
+        "action": data.get("action"),
+        "page": data.get("page"),
+        "target_terms": data.get("target_terms") or [],
+    }
+
+def vegas_llm_json_infer(row_payload: dict, llm: Optional[VegasLLMWrapper] = None) -> dict:
     """Infer action, page, and target_terms using Vegas LLM."""
-    prompt = (
-        "You are a senior analytics implementation engineer. "
-        "Given a Tech Spec row describing a UI element and analytics requirements, "
-        "return ONLY a JSON object with fields: "
-        "{action, page, target_terms}. "
-        "action ∈ {click, submit, view, back, exit, select, nav, general}. "
-        "page is a short page/screen name if obvious. "
-        "target_terms is a short list (1–4) of literal UI phrases users see/click. "
-        "No explanations."
-    )
-    llm = VegasLLMWrapper()
+    llm = llm or VegasLLMWrapper.shared()
     user_msg = str(row_payload)
-    response = llm.invoke(f"{prompt}\nInput: {user_msg}")
+    response = llm.invoke(f"{INFER_PROMPT}\nInput: {user_msg}", stage="excel_infer")
     try:
-        import json
-        data = json.loads(response)
-        return {
-            "action": data.get("action"),
-            "page": data.get("page"),
-            "target_terms": data.get("target_terms") or [],
-        }
+        return _inference_fields(_parse_llm_json(response))
     except Exception:
-        return {"action": None, "page": None, "target_terms": []}
+        return dict(_EMPTY_INFERENCE)
+
+def vegas_llm_json_infer_batch(
+    row_payloads: List[dict],
+    llm: Optional[VegasLLMWrapper] = None,
+    batch_size: int = DEFAULT_INFER_BATCH_SIZE,
+) -> Dict[int, dict]:
+    """
+    Infer action, page, and target_terms for many rows, `batch_size` rows per request.
+
+    Rows are sent as a JSON array and answers are mapped back by `row_index`,
+    so row_index must be unique within `row_payloads` (one sheet at a time).
+    Rows missing from an answer (or a batch that fails to parse) get empty
+    inferences and fall back to local heuristics in the caller.
+    """
+    llm = llm or VegasLLMWrapper.shared()
+    batch_size = max(1, int(batch_size))
+    out: Dict[int, dict] = {}
+
+    for start in range(0, len(row_payloads), batch_size):
+        batch = row_payloads[start:start + batch_size]
+        wanted = {p["row_index"] for p in batch}
+        user_msg = json.dumps(batch, ensure_ascii=False, default=str)
+        try:
+            response = llm.invoke(f"{BATCH_INFER_PROMPT}\nInput: {user_msg}", stage="excel_infer")
+            data = _parse_llm_json(response)
+            if isinstance(data, dict):
+                data = data.get("rows") or data.get("items") or [data]
+            for entry in data if isinstance(data, list) else []:
+                if not isinstance(entry, dict):
+                    continue
+                try:
+                    ridx = int(entry.get("row_index"))
+                except (TypeError, ValueError):
+                    continue
+                if ridx in wanted:
+                    out[ridx] = _inference_fields(entry)
+        except Exception as e:
+            logger.warning(f"[ExcelReader] Batch inference failed for rows {min(wanted)}-{max(wanted)}: {e}")
+
+        missing = wanted - out.keys()
+        if missing:
+            logger.info(f"[ExcelReader] LLM returned no inference for {len(missing)} row(s); using local heuristics.")
+            for ridx in missing:
+                out[ridx] = dict(_EMPTY_INFERENCE)
+
+    return out
 
 class ExcelReaderTool(BaseTool):
     """
@@ -124,14 +244,18 @@ class ExcelReaderTool(BaseTool):
     
     Optional Vegas LLM inference improves action/page/target_terms.
 
-    _run(excel_path: str, use_llm: bool = False)
+    _run(excel_path: str, use_llm: bool = False, batch_size: int = 25)
+
+    With use_llm=True, rows are inferred `batch_size` rows per LLM request
+    through a single shared client. iter_spec_items() streams items from a
+    read-only workbook for specs too large to load sheet by sheet.
     """
     name: str = "excel_reader"
     description: str = "Normalize tech spec Excel into actionable spec_items (with optional Vegas LLM inference)."
 
-    def _run(self, excel_path: str, use_llm: bool = False) -> Dict[str, Any]:
+    def _run(self, excel_path: str, use_llm: bool = False, batch_size: int = DEFAULT_INFER_BATCH_SIZE) -> Dict[str, Any]:
         try:
-            items, sheets = self._parse_excel_any_layout(excel_path, use_llm=use_llm)
+            items, sheets = self._parse_excel_any_layout(excel_path, use_llm=use_llm, batch_size=batch_size)
             return {
                 "status": "success",
                 "sheets_parsed": sheets,
@@ -144,7 +268,7 @@ class ExcelReaderTool(BaseTool):
 
     # ---- parsing ----
 
-    def _parse_excel_any_layout(self, excel_path: str, use_llm: bool) -> Tuple[List[Dict[str, Any]], List[str]]:
+    def _parse_excel_any_layout(self, excel_path: str, use_llm: bool, batch_size: int = DEFAULT_INFER_BATCH_SIZE) -> Tuple[List[Dict[str, Any]], List[str]]:
         path = Path(excel_path)
         if not path.exists():
             raise FileNotFoundError(f"Excel file not found: {excel_path}")
@@ -152,6 +276,7 @@ class ExcelReaderTool(BaseTool):
         xls = pd.ExcelFile(str(path))
         parsed: List[Dict[str, Any]] = []
         parsed_sheets: List[str] = []
+        llm = VegasLLMWrapper.shared() if use_llm else None
 
         for sheet in xls.sheet_names:
             df = pd.read_excel(xls, sheet_name=sheet)
@@ -165,55 +290,174 @@ class ExcelReaderTool(BaseTool):
 
             parsed_sheets.append(sheet)
 
-            for ridx, row in df.iterrows():
-                desc = str(row.get(colmap["description"], "")).strip() if colmap["description"] else ""
-                comp = str(row.get(colmap["component"], "")).strip() if colmap["component"] else None
-                act  = str(row.get(colmap["action"], "")).strip() if colmap["action"] else None
-                page = str(row.get(colmap["page"], "")).strip() if colmap["page"] else None
-                avar = str(row.get(colmap["adobe_var"], "")).strip() if colmap["adobe_var"] else None
-                aval = str(row.get(colmap["adobe_val"], "")).strip() if colmap["adobe_val"] else None
-                shot = str(row.get(colmap["screenshot"], "")).strip() if colmap["screenshot"] else None
+            rows = self._normalize_sheet(df, colmap)
 
-                if not desc and not comp and not aval:
-                    continue
-
-                page = page or _extract_page_from_brackets(desc)
-
-                if use_llm:
-                    inferred = vegas_llm_json_infer({
-                        "sheet": sheet,
-                        "row_index": ridx + 2,
-                        "description": desc,
-                        "component": comp,
-                        "action_hint": act,
-                        "page_hint": page,
-                        "adobe_var": avar,
-                        "adobe_value": aval,
-                    })
-                    action = inferred.get("action") or _local_infer_action([act, desc, aval])
-                    terms  = inferred.get("target_terms") or _terms_from_row(desc or comp or "", comp, aval)
-                    page   = inferred.get("page") or page
-                else:
-                    action = _local_infer_action([act, desc, aval])
-                    terms  = _terms_from_row(desc or comp or "", comp, aval)
-
-                parsed.append({
-                    "sheet": sheet,
-                    "row_index": (ridx + 2),
-                    "description": desc or (comp or ""),
-                    "component": comp or None,
-                    "action": action,
-                    "page": page or None,
-                    "adobe_var": avar or None,
-                    "adobe_value": aval or None,
-                    "screenshot": shot or None,
-                    "target_terms": terms,
-                })
+            parsed.extend(self._items_from_rows(sheet, rows, use_llm, llm, batch_size))
 
         if not parsed:
             raise ValueError("No valid rows found in the Excel file.")
         return parsed, parsed_sheets
 
+    def iter_spec_items(
+        self,
+        excel_path: str,
+        use_llm: bool = False,
+        batch_size: int = DEFAULT_INFER_BATCH_SIZE,
+        chunk_rows: int = 500,
+        header_scan_rows: int = 10,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of _parse_excel_any_layout for very large workbooks.
+
+        Sheets are read with openpyxl in read-only mode, `chunk_rows` rows at a
+        time, so memory stays bounded and callers receive the first spec items
+        before the rest of the workbook is parsed. The header row is the first
+        of the first `header_scan_rows` rows in which _detect_columns finds a
+        known column. row_index is the Excel row number; blank rows are skipped.
+        """
+        from openpyxl import load_workbook
+
+        path = Path(excel_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Excel file not found: {excel_path}")
+
+        llm = VegasLLMWrapper.shared() if use_llm else None
+        wb = load_workbook(str(path), read_only=True, data_only=True)
+        try:
+            for ws in wb.worksheets:
+                sheet = ws.title
+                header: Optional[List[str]] = None
+                colmap: Dict[str, Optional[str]] = {}
+                chunk: List[tuple] = []
+                index: List[int] = []
+
+                for excel_row, values in enumerate(ws.iter_rows(values_only=True), start=1):
+                    if header is None:
+                        if excel_row > header_scan_rows:
+                            break
+                        candidate = _header_names(values)
+                        colmap = self._detect_columns(candidate)
+                        if any(colmap.values()):
+                            header = candidate
+                        continue
+
+                    if all(v is None or (isinstance(v, str) and not v.strip()) for v in values):
+                        continue
+                    chunk.append(tuple(values[:len(header)]) + (None,) * (len(header) - len(values)))
+                    index.append(excel_row - 2)  # _normalize_sheet reports index + 2
+
+                    if len(chunk) >= chunk_rows:
+                        yield from self._stream_chunk(sheet, chunk, index, header, colmap, use_llm, llm, batch_size)
+                        chunk, index = [], []
+
+                if header is None:
+                    logger.info(f"[ExcelReader] Skipping sheet '{sheet}' — no recognizable columns.")
+                    continue
+                if chunk:
+                    yield from self._stream_chunk(sheet, chunk, index, header, colmap, use_llm, llm, batch_size)
+        finally:
+            wb.close()
+
+    def _stream_chunk(self, sheet, chunk, index, header, colmap, use_llm, llm, batch_size) -> Iterator[Dict[str, Any]]:
+        df = pd.DataFrame(chunk, columns=header, index=index).fillna(np.nan)
+        yield from self._items_from_rows(sheet, self._normalize_sheet(df, colmap), use_llm, llm, batch_size)
+
+    def _items_from_rows(
+        self,
+        sheet: str,
+        rows: List[Dict[str, Any]],
+        use_llm: bool,
+        llm: Optional[VegasLLMWrapper],
+        batch_size: int,
+    ) -> Iterator[Dict[str, Any]]:
+        """Turn normalized rows into spec items (batched LLM inference, local fallback)."""
+        inferred_by_row: Dict[int, dict] = {}
+        if use_llm and rows:
+            inferred_by_row = vegas_llm_json_infer_batch([
+                {
+                    "sheet": sheet,
+                    "row_index": r["row_index"],
+                    "description": r["desc"],
+                    "component": r["comp"],
+                    "action_hint": r["act"],
+                    "page_hint": r["page"],
+                    "adobe_var": r["avar"],
+                    "adobe_value": r["aval"],
+                }
+                for r in rows
+            ], llm=llm, batch_size=batch_size)
+
+        for r in rows:
+            desc, comp, page, aval = r["desc"], r["comp"], r["page"], r["aval"]
+
+            if use_llm:
+                inferred = inferred_by_row.get(r["row_index"], _EMPTY_INFERENCE)
+                action = inferred.get("action") or r["local_action"]
+                terms  = inferred.get("target_terms") or list(_cached_terms(desc or comp or "", comp, aval))
+                page   = inferred.get("page") or page
+            else:
+                action = r["local_action"]
+                terms  = list(_cached_terms(desc or comp or "", comp, aval))
+
+            yield {
+                "sheet": sheet,
+                "row_index": r["row_index"],
+                "description": desc or (comp or ""),
+                "component": comp or None,
+                "action": action,
+                "page": page or None,
+                "adobe_var": r["avar"] or None,
+                "adobe_value": aval or None,
+                "screenshot": r["shot"] or None,
+                "target_terms": terms,
+            }
+
+    def _normalize_sheet(self, df: pd.DataFrame, colmap: Dict[str, Optional[str]]) -> List[Dict[str, Any]]:
+        """
+        Normalize one sheet column-wise (strip, bracket-page extraction, local
+        action detection) and return the non-empty rows as dicts.
+
+        Cell values are stringified like str(cell) (so empty cells read "nan",
+        as they always have); a missing column yields None.
+        """
+        def column(key: str) -> Optional[pd.Series]:
+            col = colmap[key]
+            return df[col].map(str).str.strip() if col else None
+
+        desc = column("description")
+        if desc is None:
+            desc = pd.Series("", index=df.index)
+        comp, act, page, avar, aval, shot = (
+            column(k) for k in ("component", "action", "page", "adobe_var", "adobe_val", "screenshot")
+        )
+
+        def present(col: Optional[pd.Series]) -> pd.Series:
+            return col != "" if col is not None else pd.Series(False, index=df.index)
+
+        keep = present(desc) | present(comp) | present(aval)
+
+        bracket_page = desc.str.extract(r"^\s*\[([^\]]+)\]", expand=False).str.strip()
+        page = bracket_page if page is None else page.where(page != "", bracket_page)
+
+        empty = pd.Series("", index=df.index)
+        local_action = _local_infer_actions([c if c is not None else empty for c in (act, desc, aval)])
+
+        def values(col: Optional[pd.Series]) -> List[Any]:
+            if col is None:
+                return [None] * int(keep.sum())
+            return [None if isinstance(v, float) else v for v in col[keep].tolist()]
+
+        return [
+            {
+                "row_index": ridx + 2, "desc": d, "comp": c, "act": a,
+                "page": p, "avar": v, "aval": av, "shot": sh, "local_action": la,
+            }
+            for ridx, d, c, a, p, v, av, sh, la in zip(
+                df.index[keep].tolist(), values(desc), values(comp), values(act), values(page),
+                values(avar), values(aval), values(shot), values(local_action),
+            )
+        ]
+
     def _detect_columns(self, columns: List[str]) -> Dict[str, Optional[str]]:
         mapping: Dict[str, Optional[str]] = {k: None for k in CANON_KEYS.keys()}
         for key, synonyms in CANON_KEYS.items():
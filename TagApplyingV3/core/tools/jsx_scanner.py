@@ -0,0 +1,259 @@
+"""
+JSX Tag Scanner - Single-pass state machine over JS/JSX source
+
+ElementExtractor used to run ~12 line-by-line regex passes per file and
+missed any tag spanning several lines. This scanner walks the source once
+and reports every JSX element with exact offsets, tracking:
+
+1. string literals ('...', "...") and template literals (`...${expr}...`)
+2. line and block comments
+3. regex literals (so quotes inside /.../ don't open a string)
+4. {expression} braces in attributes and children, including nested JSX
+5. opening / self-closing / closing tags, fragments (<>...</>), and tags
+   whose attributes span multiple lines
+
+A `<` only starts a tag where an expression may begin (after `(`, `=`,
+`return`, `&&`, `?`, `:` etc.) or inside JSX children, so comparisons and
+TypeScript generics such as `useState<string>()` are left alone.
+
+Usage:
+    for tag in scan_jsx_tags(source):
+        print(tag.name, tag.start, source[tag.start:tag.end])
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# characters after which an expression (and so a JSX tag) may start
+_EXPR_START_CHARS = set("(,=:?&|!{}[;>+-*%~^")
+_EXPR_START_WORDS = {"return", "yield", "default", "case", "else", "do", "in", "of", "typeof", "void", "await"}
+# characters after which "/" starts a regex literal rather than a division
+_REGEX_START_CHARS = set("(,=:[!&|?{};+-*%~^<>")
+
+_NAME_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$.-:")
+
+
+@dataclass
+class JSXTag:
+    """One JSX element found in the source (offsets are absolute)"""
+    name: str                           # "" for fragments
+    start: int                          # offset of "<"
+    end: int                            # offset just past ">" of the opening tag
+    attrs_text: str                     # raw text between the tag name and ">" / "/>"
+    self_closing: bool
+    close_start: Optional[int] = None   # offset of the matching "</name"
+    close_end: Optional[int] = None     # offset just past its ">"
+
+    @property
+    def element_end(self) -> int:
+        """Offset just past the whole element (opening tag if never closed)"""
+        return self.close_end if self.close_end is not None else self.end
+
+
+class _Scanner:
+    def __init__(self, src: str):
+        self.src = src
+        self.n = len(src)
+        self.tags: List[JSXTag] = []
+
+    # ---------- lexical helpers ----------
+
+    def _skip_string(self, i: int) -> int:
+        """i at the opening quote; returns index past the closing quote"""
+        quote = self.src[i]
+        i += 1
+        while i < self.n:
+            ch = self.src[i]
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == quote:
+                return i + 1
+            if ch == "\n":          # unterminated string: stop at end of line
+                return i
+            i += 1
+        return i
+
+    def _skip_line_comment(self, i: int) -> int:
+        end = self.src.find("\n", i)
+        return self.n if end == -1 else end
+
+    def _skip_block_comment(self, i: int) -> int:
+        end = self.src.find("*/", i + 2)
+        return self.n if end == -1 else end + 2
+
+    def _skip_regex(self, i: int) -> int:
+        """i at the opening "/"; returns index past the flags"""
+        i += 1
+        in_class = False
+        while i < self.n:
+            ch = self.src[i]
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == "\n":
+                return i
+            if in_class:
+                if ch == "]":
+                    in_class = False
+            elif ch == "[":
+                in_class = True
+            elif ch == "/":
+                i += 1
+                while i < self.n and (self.src[i].isalnum() or self.src[i] == "_"):
+                    i += 1
+                return i
+            i += 1
+        return i
+
+    def _skip_template(self, i: int) -> int:
+        """i at the opening backtick; ${...} parts are scanned as code"""
+        i += 1
+        while i < self.n:
+            ch = self.src[i]
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == "`":
+                return i + 1
+            if ch == "$" and i + 1 < self.n and self.src[i + 1] == "{":
+                i = self.scan_code(i + 2, stop_at_brace=True)
+                continue
+            i += 1
+        return i
+
+    def _prev_significant(self, i: int) -> Tuple[str, str]:
+        """(previous non-space char, previous word) before index i"""
+        j = i - 1
+        while j >= 0 and self.src[j].isspace():
+            j -= 1
+        if j < 0:
+            return ("", "")
+        ch = self.src[j]
+        k = j
+        while k >= 0 and (self.src[k].isalnum() or self.src[k] in "_$"):
+            k -= 1
+        return (ch, self.src[k + 1:j + 1])
+
+    def _tag_may_start(self, i: int) -> bool:
+        nxt = self.src[i + 1] if i + 1 < self.n else ""
+        if not (nxt.isalpha() or nxt in "_$>"):
+            return False
+        ch, word = self._prev_significant(i)
+        return ch == "" or ch in _EXPR_START_CHARS or word in _EXPR_START_WORDS
+
+    def _regex_may_start(self, i: int) -> bool:
+        ch, word = self._prev_significant(i)
+        return ch == "" or ch in _REGEX_START_CHARS or word in _EXPR_START_WORDS
+
+    # ---------- code ----------
+
+    def scan_code(self, i: int, stop_at_brace: bool = False) -> int:
+        """
+        Scan JS code from i. With stop_at_brace, return the index just past
+        the "}" that closes the current brace level (for {expr} / ${expr}).
+        """
+        depth = 0
+        src, n = self.src, self.n
+        while i < n:
+            ch = src[i]
+            if ch in "'\"":
+                i = self._skip_string(i)
+            elif ch == "`":
+                i = self._skip_template(i)
+            elif ch == "/" and i + 1 < n and src[i + 1] == "/":
+                i = self._skip_line_comment(i)
+            elif ch == "/" and i + 1 < n and src[i + 1] == "*":
+                i = self._skip_block_comment(i)
+            elif ch == "/" and self._regex_may_start(i):
+                i = self._skip_regex(i)
+            elif ch == "{":
+                depth += 1
+                i += 1
+            elif ch == "}":
+                if stop_at_brace and depth == 0:
+                    return i + 1
+                depth -= 1
+                i += 1
+            elif ch == "<" and self._tag_may_start(i):
+                i = self.scan_element(i)
+            else:
+                i += 1
+        return i
+
+    # ---------- JSX ----------
+
+    def _read_name(self, i: int) -> int:
+        while i < self.n and self.src[i] in _NAME_CHARS:
+            i += 1
+        return i
+
+    def _scan_open_tag(self, i: int) -> Optional[JSXTag]:
+        """i at "<"; returns the tag, or None if this "<" is not a JSX tag"""
+        src, n = self.src, self.n
+        name_start = i + 1
+        name_end = self._read_name(name_start)
+        name = src[name_start:name_end]
+        j = attrs_start = name_end
+
+        while j < n:
+            ch = src[j]
+            if ch == ">":
+                return JSXTag(name, i, j + 1, src[attrs_start:j], False)
+            if ch == "/" and j + 1 < n and src[j + 1] == ">":
+                return JSXTag(name, i, j + 2, src[attrs_start:j], True)
+            if ch in "'\"":
+                j = self._skip_string(j)
+            elif ch == "{":
+                j = self.scan_code(j + 1, stop_at_brace=True)
+            elif ch == "/" and j + 1 < n and src[j + 1] in "/*":
+                j = self._skip_line_comment(j) if src[j + 1] == "/" else self._skip_block_comment(j)
+            elif ch.isspace() or ch == "=" or ch in _NAME_CHARS:
+                j += 1
+            else:
+                # e.g. "<T," in a generic arrow function - not JSX
+                return None
+        return None
+
+    def scan_element(self, i: int) -> int:
+        """i at "<"; scans the element including children, returns index past it"""
+        tag = self._scan_open_tag(i)
+        if tag is None:
+            return i + 1
+        self.tags.append(tag)
+        if tag.self_closing:
+            return tag.end
+        return self._scan_children(tag)
+
+    def _scan_children(self, tag: JSXTag) -> int:
+        src, n = self.src, self.n
+        i = tag.end
+        while i < n:
+            ch = src[i]
+            if ch == "{":
+                i = self.scan_code(i + 1, stop_at_brace=True)
+            elif ch == "<" and i + 1 < n and src[i + 1] == "/":
+                name_start = i + 2
+                while name_start < n and src[name_start].isspace():
+                    name_start += 1
+                name_end = self._read_name(name_start)
+                gt = src.find(">", name_end)
+                close_end = n if gt == -1 else gt + 1
+                if src[name_start:name_end] == tag.name:
+                    tag.close_start, tag.close_end = i, close_end
+                    return close_end
+                # mismatched closing tag: leave it for an enclosing element
+                return i
+            elif ch == "<":
+                i = self.scan_element(i)
+            else:
+                i += 1
+        return i
+
+
+def scan_jsx_tags(source: str) -> List[JSXTag]:
+    """All JSX elements in `source`, in order of their opening "<" """
+    scanner = _Scanner(source)
+    scanner.scan_code(0)
+    scanner.tags.sort(key=lambda t: t.start)
+    return scanner.tags
@@ -0,0 +1,223 @@
+"""
+LLM Response Cache - Persistent, content-addressed cache for Vegas LLM calls
+
+Re-runs over an unchanged repo send byte-identical prompts to the LLM. This
+module stores each response on disk keyed by a SHA-256 of the prompt plus the
+model settings (context, usecase, max output tokens), so the second run is
+served locally.
+
+Features:
+1. SQLite storage under core/outputs/ (stdlib only, safe across threads)
+2. TTL expiry per entry
+3. Size-bounded LRU eviction (least recently read entries go first)
+4. Hit/miss counters for run statistics
+
+Configuration (environment):
+    LLM_CACHE_DISABLE=1       Bypass the cache entirely
+    LLM_CACHE_PATH=...        Override the SQLite file location
+    LLM_CACHE_TTL_HOURS=168   Entry lifetime in hours (0 = never expire)
+    LLM_CACHE_MAX_MB=256      Maximum total size of cached responses
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CORE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_PATH = CORE_DIR / "outputs" / "llm_cache.sqlite3"
+DEFAULT_TTL_HOURS = 24 * 7
+DEFAULT_MAX_MB = 256
+
+
+def _env_flag(name: str) -> bool:
+    return (os.getenv(name) or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def cache_disabled_by_env() -> bool:
+    """True when LLM_CACHE_DISABLE is set"""
+    return _env_flag("LLM_CACHE_DISABLE")
+
+
+class LLMResponseCache:
+    """
+    On-disk LLM response cache with TTL and size-bounded LRU eviction
+
+    Usage:
+        cache = LLMResponseCache.shared()
+        key = cache.make_key(prompt, context_name="ctx", usecase_name="uc")
+        text = cache.get(key)
+        if text is None:
+            text = llm.invoke(prompt)
+            cache.set(key, text)
+    """
+
+    _shared: Dict[str, "LLMResponseCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_CACHE_PATH,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_HOURS * 3600,
+        max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+    ):
+        """
+        Args:
+            path: SQLite file to store responses in
+            ttl_seconds: Entry lifetime (None or 0 = never expire)
+            max_bytes: Upper bound on the total size of stored responses
+        """
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds or None
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    @classmethod
+    def shared(cls, path: Optional[str | Path] = None) -> "LLMResponseCache":
+        """Process-wide cache instance per file, configured from the environment"""
+        path = Path(path or os.getenv("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH).resolve()
+        with cls._shared_lock:
+            cache = cls._shared.get(str(path))
+            if cache is None:
+                cache = cls(
+                    path=path,
+                    ttl_seconds=_env_float("LLM_CACHE_TTL_HOURS", DEFAULT_TTL_HOURS) * 3600,
+                    max_bytes=int(_env_float("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB) * 1024 * 1024),
+                )
+                cls._shared[str(path)] = cache
+            return cache
+
+    @staticmethod
+    def make_key(prompt: str, **settings: Any) -> str:
+        """
+        Content-addressed key: SHA-256 over the prompt and model settings
+
+        Args:
+            prompt: Exact prompt text sent to the LLM
+            **settings: Anything that changes the answer (context, usecase, model, ...)
+        """
+        payload = json.dumps({"prompt": prompt, "settings": settings}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response, or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return response
+
+    def set(self, key: str, response: str):
+        """Store a response and evict least recently used entries if over budget"""
+        if not response:
+            return
+
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self.writes += 1
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        """Drop expired entries, then LRU entries until total size fits max_bytes"""
+        if self.ttl_seconds:
+            cur = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self.evictions += max(cur.rowcount, 0)
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current footprint"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": total,
+        }
@@ -0,0 +1,490 @@
+"""
+LLM Rate Limiter - Client-side throttling and adaptive concurrency for Vegas calls
+
+With requests running concurrently (invoke_many, worker threads) a run can
+exceed the Vegas quota and get 429s back. Every VegasLLMWrapper call now goes
+through one process-wide LLMTrafficControl per context/usecase, which combines:
+
+1. Token buckets for requests/second and tokens/minute. Prompt tokens are
+   reserved before the call, output tokens are charged after it.
+2. An AIMD concurrency limit. It grows additively (+1 per limit's worth of
+   healthy responses) and is halved on a throttling error or a latency spike
+   (latency above LLM_LATENCY_SPIKE_FACTOR x its moving average).
+3. A pause after a throttling error (Retry-After when the error carries one).
+
+Configuration (environment):
+    LLM_TRAFFIC_DISABLE=1        No throttling at all
+    LLM_RATE_RPS=...             Requests per second (unset = unlimited)
+    LLM_RATE_TPM=...             Tokens per minute (unset = unlimited)
+    LLM_MAX_CONCURRENCY=16       Ceiling for in-flight requests
+    LLM_CONCURRENCY_START=4      Initial AIMD limit
+    LLM_LATENCY_SPIKE_FACTOR=2   Latency / moving average that counts as a spike
+    LLM_THROTTLE_COOLDOWN=1      Pause in seconds after a 429 without Retry-After
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_START_CONCURRENCY = 4
+DEFAULT_SPIKE_FACTOR = 2.0
+DEFAULT_THROTTLE_COOLDOWN = 1.0
+
+# latency samples before spikes are judged against the moving average
+_MIN_LATENCY_SAMPLES = 5
+_EWMA_ALPHA = 0.2
+
+LATENCY_WINDOW = 200
+
+# rate-limit exception classes of common clients (openai, anthropic, AWS, ...)
+_THROTTLE_ERROR_TYPES = {"RateLimitError", "TooManyRequests", "TooManyRequestsError", "ThrottlingException"}
+# message fallback for errors that carry neither a status nor a known type
+_THROTTLE_MARKERS = ("too many requests", "rate limit", "rate-limit", "rate_limit", "ratelimit")
+
+
+def _env_flag(name: str) -> bool:
+    return (os.getenv(name) or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    try:
+        value = os.getenv(name)
+        return float(value) if value else default
+    except ValueError:
+        return default
+
+
+def traffic_disabled_by_env() -> bool:
+    """True when LLM_TRAFFIC_DISABLE is set"""
+    return _env_flag("LLM_TRAFFIC_DISABLE")
+
+
+def default_max_concurrency() -> int:
+    """Ceiling for in-flight LLM requests (LLM_MAX_CONCURRENCY, default 16)"""
+    return max(1, int(_env_float("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)))
+
+
+def estimate_tokens(text: Any) -> int:
+    """Rough token count (~4 characters per token) when the provider gives none"""
+    return max(1, len(text or "") // 4) if isinstance(text, str) else 1
+
+
+def error_status_code(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an error or its response, if any"""
+    for obj in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "status", "code"):
+            value = getattr(obj, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """
+    True for rate-limit errors, whatever client raised them
+
+    A carried HTTP status decides (429 only), then the exception type; the
+    message is checked for explicit rate-limit wording only as a last resort.
+    """
+    status = error_status_code(error)
+    if status is not None:
+        return status == 429
+    if any(cls.__name__ in _THROTTLE_ERROR_TYPES for cls in type(error).__mro__):
+        return True
+    text = str(error).lower()
+    return any(marker in text for marker in _THROTTLE_MARKERS)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Retry-After carried by an error (attribute or response header), if any"""
+    value = getattr(error, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if headers is not None:
+            try:
+                value = headers.get("retry-after") or headers.get("Retry-After")
+            except Exception:
+                value = None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of `values` (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+class LatencyWindow:
+    """Latencies (seconds) of the last `size` successful calls"""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            values = list(self._samples)
+        return percentile(values, pct)
+
+
+class TokenBucket:
+    """
+    Classic token bucket; not thread-safe on its own (RateLimiter locks it)
+
+    The level may go negative when usage is charged after the fact, which
+    simply delays the next reservation.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: float):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (requests larger than the bucket wait for a full one)"""
+        self._refill(now)
+        need = min(amount, self.capacity)
+        return 0.0 if self.level >= need else (need - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+
+class RateLimiter:
+    """Requests/second and tokens/minute buckets, reserved together"""
+
+    def __init__(self, requests_per_sec: Optional[float] = None, tokens_per_min: Optional[float] = None):
+        """
+        Args:
+            requests_per_sec: Request rate (None/0 = unlimited); bursts up to one second's worth
+            tokens_per_min: Token rate (None/0 = unlimited); bursts up to one minute's worth
+        """
+        self.requests_per_sec = requests_per_sec or None
+        self.tokens_per_min = tokens_per_min or None
+        self._requests = TokenBucket(requests_per_sec, max(1.0, requests_per_sec)) if requests_per_sec else None
+        self._tokens = TokenBucket(tokens_per_min / 60.0, tokens_per_min) if tokens_per_min else None
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def _reserve(self, tokens: int) -> float:
+        """Take a request + `tokens` and return 0, or return how long to wait first"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self._requests is not None:
+                wait = max(wait, self._requests.wait_time(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            if self._requests is not None:
+                self._requests.take(1)
+            if self._tokens is not None:
+                self._tokens.take(tokens)
+            return 0.0
+
+    def _note_wait(self, wait: float):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += wait
+
+    def acquire(self, tokens: int = 1):
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            self._note_wait(wait)
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int = 1):
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            self._note_wait(wait)
+            await asyncio.sleep(wait)
+
+    def charge(self, tokens: int):
+        """Count tokens used after the fact (e.g. the response)"""
+        if self._tokens is None or tokens <= 0:
+            return
+        with self._lock:
+            self._tokens._refill(time.monotonic())
+            self._tokens.take(tokens)
+
+    def pause(self, seconds: float):
+        """Hold every reservation for `seconds` (after a throttling error)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests_per_sec": self.requests_per_sec,
+            "tokens_per_min": self.tokens_per_min,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests
+
+    enter()/aenter() block until a slot under the current limit is free;
+    exit() releases it and adapts the limit from the outcome.
+    """
+
+    def __init__(
+        self,
+        min_limit: int = 1,
+        max_limit: int = DEFAULT_MAX_CONCURRENCY,
+        start_limit: int = DEFAULT_START_CONCURRENCY,
+        spike_factor: float = DEFAULT_SPIKE_FACTOR,
+        decrease_factor: float = 0.5,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, start_limit)))
+        self.spike_factor = spike_factor
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.samples = 0
+        self.increases = 0
+        self.decreases = 0
+        self.throttled = 0
+        self.latency_spikes = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def _has_slot(self) -> bool:
+        return self.in_flight < max(self.min_limit, int(self.limit))
+
+    def try_enter(self) -> bool:
+        with self._cond:
+            if not self._has_slot():
+                return False
+            self.in_flight += 1
+            return True
+
+    def enter(self):
+        with self._cond:
+            while not self._has_slot():
+                self._cond.wait(0.5)
+            self.in_flight += 1
+
+    async def aenter(self):
+        delay = 0.005
+        while not self.try_enter():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+    def exit(self, latency: float, throttled: bool = False, failed: bool = False):
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if throttled:
+                self.throttled += 1
+                self._decrease()
+            elif not failed:
+                spike = (
+                    self.samples >= _MIN_LATENCY_SAMPLES
+                    and self.latency_ewma is not None
+                    and latency > self.spike_factor * self.latency_ewma
+                )
+                self.samples += 1
+                self.latency_ewma = latency if self.latency_ewma is None else (
+                    _EWMA_ALPHA * latency + (1 - _EWMA_ALPHA) * self.latency_ewma
+                )
+                if spike:
+                    self.latency_spikes += 1
+                    self._decrease()
+                elif self.limit < self.max_limit:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                    self.increases += 1
+            self._cond.notify_all()
+
+    def _decrease(self):
+        # at most one decrease per typical round-trip, so one burst of
+        # errors from requests already in flight halves the limit only once
+        now = time.monotonic()
+        if now - self._last_decrease < (self.latency_ewma or 0.0):
+            return
+        self._last_decrease = now
+        new_limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+        if new_limit < self.limit:
+            self.limit = new_limit
+            self.decreases += 1
+            logger.info(f"LLM concurrency limit lowered to {int(self.limit)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "limit_exact": round(self.limit, 2),
+                "min": self.min_limit,
+                "max": self.max_limit,
+                "in_flight": self.in_flight,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "throttled": self.throttled,
+                "latency_spikes": self.latency_spikes,
+                "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            }
+
+
+class LLMTrafficControl:
+    """
+    Rate limiter + AIMD controller guarding one LLM endpoint
+
+    Usage:
+        traffic = LLMTrafficControl.shared("context/usecase")
+        started = traffic.before(estimate_tokens(prompt))
+        try:
+            text = llm.invoke(prompt)
+        except Exception as e:
+            traffic.after(started, error=e)
+            raise
+        traffic.after(started, output_tokens=estimate_tokens(text))
+    """
+
+    _shared: Dict[str, "LLMTrafficControl"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        requests_per_sec: Optional[float] = None,
+        tokens_per_min: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        start_concurrency: int = DEFAULT_START_CONCURRENCY,
+        spike_factor: float = DEFAULT_SPIKE_FACTOR,
+        throttle_cooldown: float = DEFAULT_THROTTLE_COOLDOWN,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.limiter = RateLimiter(requests_per_sec, tokens_per_min)
+        self.concurrency = AIMDController(
+            max_limit=max_concurrency or default_max_concurrency(),
+            start_limit=start_concurrency,
+            spike_factor=spike_factor,
+        )
+        self.throttle_cooldown = throttle_cooldown
+        self.latency = LatencyWindow()
+        self.requests = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMTrafficControl":
+        return cls(
+            requests_per_sec=_env_float("LLM_RATE_RPS", None),
+            tokens_per_min=_env_float("LLM_RATE_TPM", None),
+            max_concurrency=default_max_concurrency(),
+            start_concurrency=int(_env_float("LLM_CONCURRENCY_START", DEFAULT_START_CONCURRENCY)),
+            spike_factor=_env_float("LLM_LATENCY_SPIKE_FACTOR", DEFAULT_SPIKE_FACTOR),
+            throttle_cooldown=_env_float("LLM_THROTTLE_COOLDOWN", DEFAULT_THROTTLE_COOLDOWN),
+            enabled=not traffic_disabled_by_env(),
+        )
+
+    @classmethod
+    def shared(cls, name: str = "default") -> "LLMTrafficControl":
+        """Process-wide instance per endpoint name, configured from the environment"""
+        with cls._shared_lock:
+            traffic = cls._shared.get(name)
+            if traffic is None:
+                traffic = cls.from_env()
+                cls._shared[name] = traffic
+            return traffic
+
+    def before(self, prompt_tokens: int = 1) -> float:
+        """Wait for a concurrency slot and rate budget; returns the start time for after()"""
+        if self.enabled:
+            self.concurrency.enter()
+            try:
+                self.limiter.acquire(prompt_tokens)
+            except BaseException:
+                # interrupted while waiting for budget: give the slot back
+                self.concurrency.exit(0.0, failed=True)
+                raise
+        return time.monotonic()
+
+    async def abefore(self, prompt_tokens: int = 1) -> float:
+        if self.enabled:
+            await self.concurrency.aenter()
+            try:
+                await self.limiter.aacquire(prompt_tokens)
+            except BaseException:
+                # cancelled while waiting for budget: give the slot back
+                self.concurrency.exit(0.0, failed=True)
+                raise
+        return time.monotonic()
+
+    def after(
+        self,
+        started: float,
+        output_tokens: int = 0,
+        error: Optional[BaseException] = None,
+        cancelled: bool = False,
+    ):
+        """
+        Release the slot taken by before() and adapt to the outcome
+
+        cancelled=True (e.g. the losing copy of a hedged request) only frees
+        the slot; it counts neither as a response nor as an error.
+        """
+        latency = time.monotonic() - started
+        if not cancelled:
+            self.requests += 1
+            if error is not None:
+                self.errors += 1
+            else:
+                self.latency.record(latency)
+        if not self.enabled:
+            return
+
+        throttled = error is not None and is_throttle_error(error)
+        if throttled:
+            self.limiter.pause(retry_after_seconds(error) or self.throttle_cooldown)
+        self.limiter.charge(output_tokens)
+        self.concurrency.exit(latency, throttled=throttled, failed=cancelled or error is not None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_p50_ms": _ms(self.latency.percentile(50)),
+            "latency_p95_ms": _ms(self.latency.percentile(95)),
+            "concurrency": self.concurrency.stats(),
+            "rate": self.limiter.stats(),
+        }
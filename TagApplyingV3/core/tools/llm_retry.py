@@ -0,0 +1,185 @@
+"""
+LLM Retry - Jittered exponential backoff for transient Vegas errors
+
+A single 429, timeout or 5xx used to mark an item failed for the whole run.
+VegasLLMWrapper now retries such errors with "full jitter" backoff:
+
+    delay = uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+(never shorter than the Retry-After the error carries). Other errors - bad
+prompts, auth, parsing - are raised on the first attempt.
+
+Hedging (duplicate a request that runs past the p95 latency seen so far and
+take whichever answer arrives first) lives in VegasLLMWrapper and is enabled
+here via LLM_HEDGE.
+
+Configuration (environment):
+    LLM_MAX_RETRIES=3          Retries after the first attempt (0 = none)
+    LLM_RETRY_BASE_DELAY=0.5   Backoff base in seconds
+    LLM_RETRY_MAX_DELAY=20     Backoff cap in seconds
+    LLM_HEDGE=1                Hedge requests slower than the observed p95
+    LLM_HEDGE_MIN_SAMPLES=20   Latency samples needed before hedging starts
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .llm_rate_limiter import is_throttle_error, retry_after_seconds, error_status_code
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 20.0
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+
+_RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+_RETRYABLE_MARKERS = (
+    "timeout", "timed out", "connection", "temporarily unavailable",
+    "service unavailable", "bad gateway", "gateway timeout", "overloaded",
+)
+
+
+def _env_flag(name: str) -> bool:
+    return (os.getenv(name) or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Throttling, timeouts, connection drops and 5xx - anything worth a second try"""
+    if isinstance(error, asyncio.CancelledError):
+        return False
+    if is_throttle_error(error):
+        return True
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    status = error_status_code(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _RETRYABLE_MARKERS)
+
+
+class RetryPolicy:
+    """
+    Retry loop with full-jitter exponential backoff
+
+    Usage:
+        policy = RetryPolicy.from_env()
+        text = policy.call(lambda: llm.invoke(prompt))
+        text = await policy.acall(lambda: llm.ainvoke(prompt))
+    """
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        hedge: bool = False,
+        hedge_min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES,
+    ):
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.gave_up = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_retries=int(_env_float("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            base_delay=_env_float("LLM_RETRY_BASE_DELAY", DEFAULT_BASE_DELAY),
+            max_delay=_env_float("LLM_RETRY_MAX_DELAY", DEFAULT_MAX_DELAY),
+            hedge=_env_flag("LLM_HEDGE"),
+            hedge_min_samples=int(_env_float("LLM_HEDGE_MIN_SAMPLES", DEFAULT_HEDGE_MIN_SAMPLES)),
+        )
+
+    def backoff_delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Sleep before retry number `attempt` (0-based)"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = retry_after_seconds(error) if error is not None else None
+        return max(delay, retry_after or 0.0)
+
+    def _should_retry(self, attempt: int, error: BaseException) -> bool:
+        if attempt < self.max_retries and is_retryable_error(error):
+            with self._lock:
+                self.retries += 1
+            return True
+        if is_retryable_error(error):
+            with self._lock:
+                self.gave_up += 1
+        return False
+
+    def call(self, fn: Callable[[], Any], on_retry: Optional[Callable[[int, BaseException], None]] = None) -> Any:
+        """
+        Run fn(), retrying retryable errors
+
+        Args:
+            fn: The attempt
+            on_retry: Called with (attempt, error) before each backoff sleep
+        """
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                logger.info(f"LLM call failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                if on_retry is not None:
+                    on_retry(attempt, e)
+                time.sleep(delay)
+                attempt += 1
+
+    async def acall(
+        self,
+        make_attempt: Callable[[], Awaitable[Any]],
+        on_retry: Optional[Callable[[int, BaseException], None]] = None,
+    ) -> Any:
+        """Async call(): make_attempt() returns a fresh awaitable per attempt"""
+        attempt = 0
+        while True:
+            try:
+                return await make_attempt()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                logger.info(f"LLM call failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                if on_retry is not None:
+                    on_retry(attempt, e)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def note_hedge(self, won: bool):
+        with self._lock:
+            self.hedges += 1
+            if won:
+                self.hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_retries": self.max_retries,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "hedging": self.hedge,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
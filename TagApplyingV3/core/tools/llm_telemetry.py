@@ -0,0 +1,166 @@
+"""
+LLM Telemetry - Per-call token, latency and retry accounting by pipeline stage
+
+Every VegasLLMWrapper.invoke / ainvoke records one LLMCallRecord:
+
+1. stage - the caller (check_tagging, edit_file, generate_values, ...)
+2. prompt / output tokens - from the provider's usage metadata, or estimated
+   locally (~4 characters per token) when the response carries none
+3. latency, retries, hedged, cache hit, error
+
+Records are kept in one process-wide collector. Scripts take a mark() when
+they start and write summary(since=mark) into their report, so each report
+covers only its own calls:
+
+    apply_log_smart.json      -> "llm_telemetry"
+    data_track_report.json    -> "llm_telemetry"
+
+The summary aggregates per stage (calls, tokens, p50/p90/p95/p99 latency).
+Only the last MAX_RECORDS calls are kept; a summary whose window reaches
+further back reports the calls it no longer has as "dropped".
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple
+
+from .llm_rate_limiter import estimate_tokens, percentile
+
+DEFAULT_STAGE = "unspecified"
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+MAX_RECORDS = 10000
+
+
+@dataclass
+class LLMCallRecord:
+    """One invoke, as seen by the caller (retries and hedges included)"""
+    stage: str
+    prompt_tokens: int
+    output_tokens: int
+    tokens_estimated: bool
+    latency_ms: float
+    retries: int = 0
+    hedged: bool = False
+    cached: bool = False
+    error: Optional[str] = None
+
+
+def response_usage(result: Any) -> Optional[Tuple[int, int]]:
+    """
+    (prompt_tokens, output_tokens) reported by the provider, if any
+
+    Understands LangChain's usage_metadata and the OpenAI-style
+    response_metadata["token_usage"] / ["usage"].
+    """
+    usage = getattr(result, "usage_metadata", None)
+    if isinstance(usage, dict) and usage.get("input_tokens") is not None:
+        return int(usage.get("input_tokens") or 0), int(usage.get("output_tokens") or 0)
+
+    metadata = getattr(result, "response_metadata", None)
+    if isinstance(metadata, dict):
+        usage = metadata.get("token_usage") or metadata.get("usage")
+        if isinstance(usage, dict):
+            prompt = usage.get("prompt_tokens", usage.get("input_tokens"))
+            output = usage.get("completion_tokens", usage.get("output_tokens"))
+            if prompt is not None or output is not None:
+                return int(prompt or 0), int(output or 0)
+    return None
+
+
+def call_tokens(prompt: str, text: Any, usage: Optional[Tuple[int, int]]) -> Tuple[int, int, bool]:
+    """(prompt_tokens, output_tokens, estimated) for a finished call"""
+    if usage is not None:
+        return usage[0], usage[1], False
+    return estimate_tokens(prompt), estimate_tokens(text), True
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, Any]:
+    if not latencies:
+        return {}
+    summary = {f"p{p}": round(percentile(latencies, p), 1) for p in LATENCY_PERCENTILES}
+    summary["mean"] = round(sum(latencies) / len(latencies), 1)
+    summary["max"] = round(max(latencies), 1)
+    return summary
+
+
+class LLMTelemetry:
+    """
+    Thread-safe collector of LLMCallRecord
+
+    Usage:
+        telemetry = LLMTelemetry.shared()
+        mark = telemetry.mark()
+        ...                               # LLM calls
+        report["llm_telemetry"] = telemetry.summary(since=mark)
+    """
+
+    _shared: Optional["LLMTelemetry"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_records: int = MAX_RECORDS):
+        self.records: "deque[LLMCallRecord]" = deque(maxlen=max_records)
+        self.recorded = 0   # calls ever recorded; records[0] is call number recorded - len(records)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "LLMTelemetry":
+        """Process-wide collector"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def record(self, record: LLMCallRecord):
+        with self._lock:
+            self.records.append(record)
+            self.recorded += 1
+
+    def mark(self) -> int:
+        """Position to pass to summary(since=...) to cover only later calls"""
+        with self._lock:
+            return self.recorded
+
+    def summary(self, since: int = 0) -> Dict[str, Any]:
+        """
+        Totals and per-stage aggregates of the calls recorded after `since`
+
+        Tokens count only calls that reached the LLM (cache hits are listed
+        separately); latency percentiles are in milliseconds. Calls in the
+        window that were already evicted are counted in totals["dropped"].
+        """
+        with self._lock:
+            first = self.recorded - len(self.records)
+            skip = max(0, since - first)
+            records = list(islice(self.records, skip, None))
+            dropped = max(0, first - since)
+
+        stages: Dict[str, List[LLMCallRecord]] = {}
+        for rec in records:
+            stages.setdefault(rec.stage, []).append(rec)
+
+        by_stage = {stage: self._aggregate(recs) for stage, recs in sorted(stages.items())}
+        totals = self._aggregate(records)
+        totals["dropped"] = dropped
+        # hot spots first: stages by total tokens
+        totals["stages_by_tokens"] = sorted(by_stage, key=lambda s: by_stage[s]["total_tokens"], reverse=True)
+        return {"totals": totals, "stages": by_stage}
+
+    @staticmethod
+    def _aggregate(records: List[LLMCallRecord]) -> Dict[str, Any]:
+        sent = [r for r in records if not r.cached]
+        prompt_tokens = sum(r.prompt_tokens for r in sent)
+        output_tokens = sum(r.output_tokens for r in sent)
+        return {
+            "calls": len(records),
+            "cache_hits": len(records) - len(sent),
+            "errors": sum(1 for r in records if r.error),
+            "retries": sum(r.retries for r in records),
+            "hedged": sum(1 for r in records if r.hedged),
+            "prompt_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": prompt_tokens + output_tokens,
+            "estimated_token_calls": sum(1 for r in sent if r.tokens_estimated),
+            "latency_ms": _latency_summary([r.latency_ms for r in sent]),
+        }
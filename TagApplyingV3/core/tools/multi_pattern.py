@@ -0,0 +1,90 @@
+# tools/multi_pattern.py
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher (Aho-Corasick automaton).
+
+    Finds every occurrence of every pattern in one left-to-right pass over the
+    text, instead of testing `any(p in text for p in patterns)` per pattern and
+    per window. Matching is case-sensitive; lowercase both sides for
+    case-insensitive use.
+
+        ac = AhoCorasick(["onClick", "<Button"])
+        for start, pid in ac.finditer(text):
+            print(ac.patterns[pid], start)
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        seen: Dict[str, int] = {}
+        for p in patterns:
+            if not p or p in seen:
+                continue
+            seen[p] = len(self.patterns)
+            self.patterns.append(p)
+            self._add(p, seen[p])
+        self._build_links()
+
+    def _add(self, pattern: str, pid: int) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(pid)
+
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (start_offset, pattern_id) for every match, in end-offset order"""
+        goto, fail, out, pats = self._goto, self._fail, self._out, self.patterns
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pid in out[node]:
+                yield i - len(pats[pid]) + 1, pid
+
+
+def scan_lines(matcher: AhoCorasick, lines: List[str]) -> List[Tuple[int, int, int]]:
+    """
+    Scan a file (as lines) once and return (line_no, column, pattern_id) hits.
+
+    Lines are joined with "\\n", so patterns never match across lines - the
+    same result as testing each line separately.
+    """
+    text = "\n".join(lines)
+    starts = [0]
+    for line in lines[:-1]:
+        starts.append(starts[-1] + len(line) + 1)
+    hits: List[Tuple[int, int, int]] = []
+    for off, pid in matcher.finditer(text):
+        ln = bisect_right(starts, off)
+        hits.append((ln, off - starts[ln - 1], pid))
+    return hits
@@ -0,0 +1,263 @@
+"""
+Patch Applier - Executes anchored edit operations returned by the LLM
+
+Instead of returning the full updated file, the LLM returns a short list of
+operations (see SmartPromptBuilder.build_patch_prompt). Output tokens then
+scale with the size of the change, not the size of the file.
+
+Supported operations:
+    {"op": "insert_import", "code": "import { useTagging } from '../Tagging';"}
+    {"op": "insert_after_line", "line": 12, "anchor": "useState(", "code": "..."}
+    {"op": "insert_before_line", "line": 30, "anchor": "return (", "code": "..."}
+    {"op": "insert_in_function", "function": "handleClick", "code": "..."}
+    {"op": "replace_text", "old": "const { a } = useTagging();", "new": "..."}
+
+Line numbers are 1-indexed and refer to the ORIGINAL file. When an "anchor"
+is given and line N doesn't contain it, the nearest line within a few lines
+that does is used instead, which absorbs small off-by-one errors.
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class PatchError(ValueError):
+    """An operation could not be anchored in the source"""
+
+
+class PatchApplier:
+    """Applies a list of anchored operations to source text in one pass"""
+
+    ANCHOR_SEARCH_RADIUS = 5
+    FUNCTION_SEARCH_LINES = 30
+    IMPORT_PATTERN = re.compile(r'^\s*import\b')
+
+    def __init__(self, source: str):
+        """
+        Args:
+            source: Original file content
+        """
+        self.source = source
+        self.lines = source.splitlines(keepends=True)
+        self.newline = "\r\n" if "\r\n" in source else "\n"
+
+    # ---------- anchoring ----------
+
+    def _resolve_line(self, line: Any, anchor: Optional[str]) -> int:
+        """Return a 0-based line index for a 1-based line number (+ optional anchor)"""
+        try:
+            idx = int(line) - 1
+        except (TypeError, ValueError):
+            idx = -1
+
+        if anchor:
+            if 0 <= idx < len(self.lines) and anchor in self.lines[idx]:
+                return idx
+            start = max(0, idx - self.ANCHOR_SEARCH_RADIUS) if idx >= 0 else 0
+            end = min(len(self.lines), idx + self.ANCHOR_SEARCH_RADIUS + 1) if idx >= 0 else len(self.lines)
+            candidates = [i for i in range(start, end) if anchor in self.lines[i]]
+            if candidates:
+                return min(candidates, key=lambda i: abs(i - idx))
+            raise PatchError(f"Anchor {anchor!r} not found near line {line}")
+
+        if not 0 <= idx < len(self.lines):
+            raise PatchError(f"Line {line} out of range (file has {len(self.lines)} lines)")
+        return idx
+
+    def _last_import_index(self) -> int:
+        """0-based index of the line after the last import statement (0 if none)"""
+        last = -1
+        in_import = False
+        for i, text in enumerate(self.lines):
+            if self.IMPORT_PATTERN.match(text):
+                in_import = True
+            if in_import:
+                last = i
+                if ";" in text or re.search(r"""from\s+['"][^'"]+['"]""", text):
+                    in_import = False
+        return last + 1
+
+    def _function_body_index(self, name: str) -> int:
+        """0-based index of the line after the opening brace of function `name`"""
+        pattern = re.compile(
+            rf'(?:function\s+{re.escape(name)}\s*\(|(?:const|let|var)\s+{re.escape(name)}\s*=)'
+        )
+        for i, text in enumerate(self.lines):
+            match = pattern.search(text)
+            if not match:
+                continue
+            body = self._body_brace_line(i, match.end())
+            if body is not None:
+                return body + 1
+        raise PatchError(f"Function {name!r} not found or its body could not be located")
+
+    def _body_brace_line(self, start_line: int, start_col: int) -> Optional[int]:
+        """
+        0-based line of the body's opening brace for the declaration at
+        (start_line, start_col), or None if it can't be determined for sure
+
+        Braces inside the parameter list (destructured props, default values)
+        are skipped: the body brace is the first "{" outside any parameter
+        braces that follows the closing ")" of the parameters or an "=>".
+        Expression-bodied arrows, one-line bodies and declarations that end
+        before a body is seen are treated as unknown.
+        """
+        braces = 0          # depth of {} inside the parameter list
+        quote = None
+        prev = ""           # last non-blank character outside strings
+        arrow_seen = False
+        after_arrow = False  # the next token must be the body brace
+        for i in range(start_line, min(len(self.lines), start_line + self.FUNCTION_SEARCH_LINES)):
+            text = self.lines[i]
+            col = start_col if i == start_line else 0
+            while col < len(text):
+                ch = text[col]
+                col += 1
+                if quote:
+                    if ch == "\\":
+                        col += 1
+                    elif ch == quote:
+                        quote = None
+                    continue
+                if text.startswith("//", col - 1):
+                    break
+                if ch.isspace():
+                    continue
+                if after_arrow and ch != "{":
+                    return None  # expression body
+                if ch in "'\"`":
+                    quote = ch
+                elif ch == "{":
+                    if after_arrow or (braces == 0 and prev == ")" and not arrow_seen):
+                        rest = text[col:]
+                        if rest.count("}") > rest.count("{"):
+                            return None  # one-line body
+                        return i
+                    braces += 1
+                elif ch == "}":
+                    braces -= 1
+                    if braces < 0:
+                        return None
+                elif ch == ";" and braces == 0:
+                    return None
+                elif ch == ">" and prev == "=" and braces == 0:
+                    arrow_seen = after_arrow = True
+                prev = ch
+        return None
+
+    # ---------- formatting ----------
+
+    def _indent_of(self, idx: int) -> str:
+        """Indentation of the first non-blank line at or after idx"""
+        for text in self.lines[idx:]:
+            if text.strip():
+                return text[:len(text) - len(text.lstrip())]
+        return ""
+
+    def _format_code(self, code: str, indent: str) -> str:
+        """Normalize newlines, indent unindented code, ensure trailing newline"""
+        code_lines = code.replace("\r\n", "\n").strip("\n").split("\n")
+        if code_lines and not code_lines[0][:1].isspace():
+            code_lines = [indent + c if c.strip() else c for c in code_lines]
+        return self.newline.join(code_lines) + self.newline
+
+    # ---------- apply ----------
+
+    # field -> accepted type (a missing or null field is always accepted)
+    FIELD_TYPES = {"code": str, "old": str, "new": str, "function": str, "anchor": str, "line": int}
+
+    @classmethod
+    def _check_fields(cls, n: int, op: Dict[str, Any]):
+        """Raise PatchError if a known field of operation `n` has the wrong type"""
+        for name, expected in cls.FIELD_TYPES.items():
+            value = op.get(name)
+            if value is None:
+                continue
+            if not isinstance(value, expected) or isinstance(value, bool):
+                raise PatchError(
+                    f"Operation {n}: '{name}' must be {expected.__name__}, got {type(value).__name__}"
+                )
+
+    def apply(self, operations: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Apply all operations
+
+        Args:
+            operations: Operation dicts as described in the module docstring
+
+        Returns:
+            (updated_source, operation_log)
+
+        Raises:
+            PatchError: If any operation can't be anchored (nothing is applied)
+        """
+        if not isinstance(operations, list):
+            raise PatchError(f"'operations' must be a list, got {type(operations).__name__}")
+        for n, op in enumerate(operations, 1):
+            if not isinstance(op, dict):
+                raise PatchError(f"Operation {n}: must be an object, got {type(op).__name__}")
+            self._check_fields(n, op)
+
+        # inserts[i] = code placed before original line i (i == len(lines) → end)
+        inserts: Dict[int, List[str]] = {}
+        replacements: List[Tuple[str, str]] = []
+        log: List[Dict[str, Any]] = []
+
+        for n, op in enumerate(operations, 1):
+            kind = op.get("op")
+            code = op.get("code") or ""
+
+            if kind == "replace_text":
+                old, new = op.get("old") or "", op.get("new") or ""
+                count = self.source.count(old) if old else 0
+                if count != 1:
+                    raise PatchError(f"Operation {n}: replace_text 'old' matches {count} times (must be exactly 1)")
+                replacements.append((old, new))
+                log.append({"op": kind, "status": "applied"})
+                continue
+
+            if not code.strip():
+                raise PatchError(f"Operation {n}: '{kind}' has no code")
+
+            if kind == "insert_import":
+                if code.strip() in self.source:
+                    log.append({"op": kind, "status": "skipped", "reason": "import already present"})
+                    continue
+                at = self._last_import_index()
+                indent = ""
+            elif kind == "insert_after_line":
+                at = self._resolve_line(op.get("line"), op.get("anchor")) + 1
+                indent = self._indent_of(at) if at < len(self.lines) else ""
+            elif kind == "insert_before_line":
+                at = self._resolve_line(op.get("line"), op.get("anchor"))
+                indent = self._indent_of(at)
+            elif kind == "insert_in_function":
+                at = self._function_body_index(op.get("function") or "")
+                indent = self._indent_of(at)
+            else:
+                raise PatchError(f"Operation {n}: unknown op {kind!r}")
+
+            inserts.setdefault(at, []).append(self._format_code(code, indent))
+            log.append({"op": kind, "line": at + 1, "status": "applied"})
+
+        out: List[str] = []
+        for i, text in enumerate(self.lines):
+            out.extend(inserts.get(i, []))
+            out.append(text)
+        if inserts.get(len(self.lines)):
+            if out and not out[-1].endswith(("\n", "\r")):
+                out[-1] += self.newline
+            out.extend(inserts[len(self.lines)])
+        updated = "".join(out)
+
+        for old, new in replacements:
+            if updated.count(old) != 1:
+                raise PatchError("replace_text target was altered by an insert")
+            updated = updated.replace(old, new, 1)
+
+        return (updated, log)
+
+
+def apply_operations(source: str, operations: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Convenience wrapper around PatchApplier(source).apply(operations)"""
+    return PatchApplier(source).apply(operations)
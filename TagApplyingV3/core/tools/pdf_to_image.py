@@ -17,22 +17,27 @@ try:
 except ImportError as e:
     raise ImportError(f"Required packages not installed: {e}. Please install: pip install pdf2image pillow PyPDF2 poppler-utils")
 
+from .render_cache import RenderCache, file_digest
+
 logger = logging.getLogger(__name__)
 
 
 class PDFToImageConverter:
     """Convert PDF files to images."""
     
-    def __init__(self, output_dir: str = "pdf_outputs", dpi: int = 200):
+    def __init__(self, output_dir: str = "pdf_outputs", dpi: int = 200, use_cache: Optional[bool] = None):
         """
         Initialize the PDF to Image converter.
         
         Args:
             output_dir: Directory to save converted images
             dpi: Resolution for image conversion (dots per inch)
+            use_cache: Skip pages already rendered from the same PDF content at
+                the same DPI/format (default: on unless PDF_RENDER_CACHE_DISABLE)
         """
         self.output_dir = output_dir
         self.dpi = dpi
+        self.use_cache = use_cache
         
         # Create output directory if it doesn't exist
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
@@ -73,27 +78,51 @@ class PDFToImageConverter:
             logger.info(f"Converting PDF: {pdf_path}")
             logger.info(f"DPI: {self.dpi}, Format: {image_format}")
             
-            # Convert PDF pages to images
-            images = convert_from_path(
-                pdf_path,
-                dpi=self.dpi,
-                first_page=first_page,
-                last_page=last_page
-            )
-            
-            if not images:
-                raise ValueError("No images generated from PDF")
+            # Pages already rendered from identical PDF content are not rendered again
+            start = first_page or 1
+            total_pages = self.get_pdf_page_count(pdf_path)
+            end = min(last_page, total_pages) if last_page else total_pages
+            cache = RenderCache(self.output_dir, enabled=self.use_cache)
+            digest = file_digest(pdf_path)
             
             output_paths = []
-            for idx, image in enumerate(images, start=1):
-                page_num = first_page + idx - 1 if first_page else idx
-                output_filename = f"{prefix}_page_{page_num}.{image_format.lower()}"
-                output_path = os.path.join(self.output_dir, output_filename)
-                
-                image.save(output_path, format=image_format)
-                output_paths.append(output_path)
-                logger.info(f"Saved: {output_path}")
+            missing: List[int] = []
+            for page_num in range(start, end + 1):
+                output_path = self._page_output_path(prefix, page_num, image_format)
+                if cache.fetch(digest, page_num - 1, self.dpi, image_format, [output_path]):
+                    output_paths.append((page_num, output_path))
+                else:
+                    missing.append(page_num)
+            if output_paths:
+                logger.info(f"Render cache: {len(output_paths)} pages already rendered")
+            
+            # Convert each contiguous run of missing pages
+            runs: List[List[int]] = []
+            for page_num in missing:
+                if runs and runs[-1][-1] == page_num - 1:
+                    runs[-1].append(page_num)
+                else:
+                    runs.append([page_num])
             
+            for run in runs:
+                images = convert_from_path(
+                    pdf_path,
+                    dpi=self.dpi,
+                    first_page=run[0],
+                    last_page=run[-1]
+                )
+                for page_num, image in zip(run, images):
+                    output_path = self._page_output_path(prefix, page_num, image_format)
+                    image.save(output_path, format=image_format)
+                    cache.record(digest, page_num - 1, self.dpi, image_format, pdf_path, [output_path])
+                    output_paths.append((page_num, output_path))
+                    logger.info(f"Saved: {output_path}")
+            cache.save()
+            
+            if not output_paths:
+                raise ValueError("No images generated from PDF")
+            
+            output_paths = [path for _page_num, path in sorted(output_paths)]
             logger.info(f"Successfully converted {len(output_paths)} pages")
             return output_paths
         
@@ -124,6 +153,16 @@ class PDFToImageConverter:
         try:
             logger.info(f"Converting PDF to single image: {pdf_path}")
             
+            pdf_name = Path(pdf_path).stem
+            output_filename = output_filename or f"{pdf_name}_combined.{image_format.lower()}"
+            output_path = os.path.join(self.output_dir, output_filename)
+            
+            cache = RenderCache(self.output_dir, enabled=self.use_cache)
+            digest = file_digest(pdf_path)
+            if cache.fetch(digest, "combined", self.dpi, image_format, [output_path]):
+                logger.info(f"Render cache hit: {output_path}")
+                return output_path
+            
             # Convert all pages
             images = convert_from_path(pdf_path, dpi=self.dpi)
             
@@ -146,11 +185,9 @@ class PDFToImageConverter:
                 y_offset += image.height
             
             # Save combined image
-            pdf_name = Path(pdf_path).stem
-            output_filename = output_filename or f"{pdf_name}_combined.{image_format.lower()}"
-            output_path = os.path.join(self.output_dir, output_filename)
-            
             combined_image.save(output_path, format=image_format)
+            cache.record(digest, "combined", self.dpi, image_format, pdf_path, [output_path])
+            cache.save()
             logger.info(f"Saved combined image: {output_path}")
             
             return output_path
@@ -159,6 +196,10 @@ class PDFToImageConverter:
             logger.error(f"Error converting PDF to single image: {str(e)}")
             raise
     
+    def _page_output_path(self, prefix: str, page_num: int, image_format: str) -> str:
+        """Output path for a 1-indexed page"""
+        return os.path.join(self.output_dir, f"{prefix}_page_{page_num}.{image_format.lower()}")
+    
     def get_pdf_page_count(self, pdf_path: str) -> int:
         """
         Get the number of pages in a PDF file.
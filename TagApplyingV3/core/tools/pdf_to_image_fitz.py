@@ -6,33 +6,163 @@ Uses PyMuPDF (fitz) library which includes all necessary dependencies.
 """
 
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import logging
 
 try:
     import fitz  # PyMuPDF
     from PIL import Image
-    import io
 except ImportError as e:
     raise ImportError(f"Required packages not installed: {e}. Please install: pip install PyMuPDF pillow")
 
+from .render_cache import RenderCache, file_digest
+
 logger = logging.getLogger(__name__)
 
 
+# formats MuPDF can write straight from a pixmap (no PIL copy)
+PIXMAP_FORMATS = {"PNG": "png", "PNM": "pnm", "PPM": "pnm", "PAM": "pam", "PSD": "psd", "JPG": "jpeg", "JPEG": "jpeg"}
+# PIL names for extensions PIL doesn't know as formats
+PIL_FORMAT_NAMES = {"JPG": "JPEG", "TIF": "TIFF"}
+
+
+def _pixmap_to_image(pix) -> "Image.Image":
+    """Wrap the pixmap samples in a PIL image without a PPM encode/decode round trip."""
+    mode = "RGBA" if pix.alpha else "RGB"
+    samples = getattr(pix, "samples_mv", None) or pix.samples
+    return Image.frombuffer(mode, (pix.width, pix.height), samples, "raw", mode, pix.stride, 1)
+
+
+def _save_pixmap(pix, output_path: str, image_format: str):
+    """
+    Save a rendered pixmap.
+    
+    PNG/JPG/PNM/PAM/PSD are written by MuPDF directly from the pixmap; other
+    formats (BMP, TIFF, WEBP, ...) go through PIL, sharing the pixmap buffer.
+    """
+    fmt = image_format.upper()
+    if fmt in PIXMAP_FORMATS:
+        try:
+            pix.save(output_path, output=PIXMAP_FORMATS[fmt])
+            return
+        except (ValueError, TypeError, RuntimeError) as e:
+            # older PyMuPDF builds can't write every format (e.g. JPEG)
+            logger.debug(f"Direct pixmap save as {fmt} failed ({e}), using PIL")
+    img = _pixmap_to_image(pix)
+    if img.mode != "RGB" and fmt in ("JPG", "JPEG"):
+        img = img.convert("RGB")
+    img.save(output_path, format=PIL_FORMAT_NAMES.get(fmt, fmt))
+
+
+def _page_output_path(output_dir: str, prefix: str, page_num: int, image_format: str) -> str:
+    """Deterministic output path for a 0-indexed page"""
+    return os.path.join(output_dir, f"{prefix}_page_{page_num + 1}.{image_format.lower()}")
+
+
+def _render_page(
+    pdf_document,
+    page_num: int,
+    dpi: int,
+    image_format: str,
+    output_dir: str,
+    prefix: str
+) -> str:
+    """
+    Render one page (0-indexed) and save it as {prefix}_page_{n}.{ext}.
+    
+    Returns:
+        Path to the saved image
+    """
+    logger.info(f"Rendering page {page_num + 1}...")
+    page = pdf_document[page_num]
+    
+    # Calculate zoom factor based on DPI
+    # Standard DPI is 72, so zoom = dpi / 72
+    zoom = dpi / 72.0
+    mat = fitz.Matrix(zoom, zoom)
+    
+    # For very large PDFs, use clip to render in sections
+    try:
+        # Try normal rendering first
+        pix = page.get_pixmap(matrix=mat, alpha=False)
+    except MemoryError:
+        logger.warning(f"Page {page_num + 1} too large, rendering at lower resolution")
+        # Fall back to much lower zoom
+        mat = fitz.Matrix(0.25, 0.25)  # Quarter resolution
+        pix = page.get_pixmap(matrix=mat, alpha=False)
+    
+    # Save image
+    output_path = _page_output_path(output_dir, prefix, page_num, image_format)
+    _save_pixmap(pix, output_path, image_format)
+    return output_path
+
+
+def _render_page_range(
+    pdf_path: str,
+    page_nums: List[int],
+    dpi: int,
+    image_format: str,
+    output_dir: str,
+    prefix: str
+) -> List[Tuple[int, Optional[str]]]:
+    """
+    Worker entry point: open the document once and render a range of pages.
+    
+    Returns:
+        (page_num, output_path) per page; output_path is None if the page failed
+    """
+    results = []
+    pdf_document = fitz.open(pdf_path)
+    try:
+        for page_num in page_nums:
+            try:
+                results.append((page_num, _render_page(pdf_document, page_num, dpi, image_format, output_dir, prefix)))
+            except Exception as page_error:
+                logger.warning(f"Error rendering page {page_num + 1}: {str(page_error)}")
+                results.append((page_num, None))
+    finally:
+        pdf_document.close()
+    return results
+
+
+def _split_pages(page_nums: List[int], parts: int) -> List[List[int]]:
+    """Split pages into `parts` contiguous ranges of near-equal size."""
+    size, extra = divmod(len(page_nums), parts)
+    ranges, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            ranges.append(page_nums[start:end])
+        start = end
+    return ranges
+
+
 class PDFToImageConverterFitz:
     """Convert PDF files to images using PyMuPDF."""
     
-    def __init__(self, output_dir: str = "pdf_outputs", dpi: int = 200):
+    def __init__(
+        self,
+        output_dir: str = "pdf_outputs",
+        dpi: int = 200,
+        workers: Optional[int] = None,
+        use_cache: Optional[bool] = None
+    ):
         """
         Initialize the PDF to Image converter.
         
         Args:
             output_dir: Directory to save converted images
             dpi: Resolution for image conversion (dots per inch)
+            workers: Processes used to render pages (default: PDF_RENDER_WORKERS or 1)
+            use_cache: Skip pages already rendered from the same PDF content at
+                the same DPI/format (default: on unless PDF_RENDER_CACHE_DISABLE)
         """
         self.output_dir = output_dir
         self.dpi = dpi
+        self.workers = max(1, int(workers or os.getenv("PDF_RENDER_WORKERS") or 1))
+        self.use_cache = use_cache
         
         # Create output directory if it doesn't exist
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
@@ -44,17 +174,24 @@ class PDFToImageConverterFitz:
         image_format: str = "PNG",
         first_page: Optional[int] = None,
         last_page: Optional[int] = None,
-        prefix: Optional[str] = None
+        prefix: Optional[str] = None,
+        workers: Optional[int] = None
     ) -> List[str]:
         """
         Convert a PDF file to images.
         
+        With more than one worker, the page range is split into contiguous
+        chunks and each worker process opens the document and renders its
+        chunk. File names and the order of the returned paths are the same
+        as in a serial run.
+        
         Args:
             pdf_path: Path to the PDF file
             image_format: Image format (PNG, JPG, BMP, etc.)
             first_page: First page to convert (1-indexed, None = start from page 1)
             last_page: Last page to convert (1-indexed, None = convert all pages)
             prefix: Prefix for output image files
+            workers: Render processes for this call (default: self.workers)
         
         Returns:
             List of paths to generated image files
@@ -76,59 +213,65 @@ class PDFToImageConverterFitz:
             # Open PDF
             pdf_document = fitz.open(pdf_path)
             total_pages = len(pdf_document)
+            pdf_document.close()
             
             # Set page range
             start_page = (first_page - 1) if first_page else 0
             end_page = min(last_page, total_pages) if last_page else total_pages
+            page_nums = list(range(start_page, end_page))
             
-            output_paths = []
+            # Pages already rendered from identical PDF content are not rendered again
+            cache = RenderCache(self.output_dir, enabled=self.use_cache)
+            digest = file_digest(pdf_path)
+            cached = [
+                n for n in page_nums
+                if cache.fetch(digest, n, self.dpi, image_format,
+                               [_page_output_path(self.output_dir, prefix, n, image_format)])
+            ]
+            if cached:
+                logger.info(f"Render cache: {len(cached)} of {len(page_nums)} pages already rendered")
+            cached_set = set(cached)
+            page_nums = [n for n in page_nums if n not in cached_set]
             
-            # Render each page
-            for page_num in range(start_page, end_page):
-                logger.info(f"Rendering page {page_num + 1}...")
-                
+            workers = min(max(1, int(workers or self.workers)), len(page_nums) or 1)
+            
+            results: List[Tuple[int, Optional[str]]] = []
+            if workers > 1:
+                logger.info(f"Rendering {len(page_nums)} pages with {workers} processes...")
                 try:
-                    # Get page
-                    page = pdf_document[page_num]
-                    
-                    # Calculate zoom factor based on DPI
-                    # Standard DPI is 72, so zoom = dpi / 72
-                    zoom = self.dpi / 72.0
-                    mat = fitz.Matrix(zoom, zoom)
-                    
-                    # For very large PDFs, use clip to render in sections
-                    try:
-                        # Try normal rendering first
-                        pix = page.get_pixmap(matrix=mat, alpha=False)
-                    except MemoryError:
-                        logger.warning(f"Page {page_num + 1} too large, rendering at lower resolution")
-                        # Fall back to much lower zoom
-                        mat = fitz.Matrix(0.25, 0.25)  # Quarter resolution
-                        pix = page.get_pixmap(matrix=mat, alpha=False)
-                    
-                    # Convert to PIL Image
-                    img_data = pix.tobytes("ppm")
-                    img = Image.open(io.BytesIO(img_data))
-                    
-                    # Convert to RGB if necessary
-                    if img.mode != 'RGB':
-                        if image_format.upper() == "JPG":
-                            img = img.convert('RGB')
-                        # PNG can handle RGBA
-                    
-                    # Save image
-                    output_filename = f"{prefix}_page_{page_num + 1}.{image_format.lower()}"
-                    output_path = os.path.join(self.output_dir, output_filename)
-                    
-                    img.save(output_path, format=image_format.upper())
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        futures = [
+                            pool.submit(
+                                _render_page_range, pdf_path, chunk,
+                                self.dpi, image_format, self.output_dir, prefix
+                            )
+                            for chunk in _split_pages(page_nums, workers)
+                        ]
+                        for future in futures:
+                            results.extend(future.result())
+                except Exception as pool_error:
+                    logger.warning(f"Parallel rendering failed ({pool_error}), falling back to a single process")
+                    results = []
+            
+            if not results and page_nums:
+                results = _render_page_range(
+                    pdf_path, page_nums, self.dpi, image_format, self.output_dir, prefix
+                )
+            
+            for page_num, output_path in results:
+                if output_path:
+                    cache.record(digest, page_num, self.dpi, image_format, pdf_path, [output_path])
+            cache.save()
+            results.extend(
+                (n, _page_output_path(self.output_dir, prefix, n, image_format)) for n in cached
+            )
+            
+            output_paths = []
+            for page_num, output_path in sorted(results):
+                if output_path:
                     output_paths.append(output_path)
                     logger.info(f"Saved: {output_path}")
-                    
-                except Exception as page_error:
-                    logger.warning(f"Error rendering page {page_num + 1}: {str(page_error)}")
-                    continue
             
-            pdf_document.close()
             logger.info(f"Successfully converted {len(output_paths)} pages")
             return output_paths
         
@@ -145,6 +288,9 @@ class PDFToImageConverterFitz:
         """
         Convert entire PDF to a single vertically stacked image.
         
+        Page sizes are measured first, then pages are rendered and pasted one
+        at a time, so only the output canvas and one page are in memory.
+        
         Args:
             pdf_path: Path to the PDF file
             image_format: Image format (PNG, JPG, BMP, etc.)
@@ -159,57 +305,153 @@ class PDFToImageConverterFitz:
         try:
             logger.info(f"Converting PDF to single image: {pdf_path}")
             
-            # Open PDF
-            pdf_document = fitz.open(pdf_path)
-            images = []
-            
-            # Render all pages
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-                zoom = self.dpi / 72.0
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                
-                img_data = pix.tobytes("ppm")
-                img = Image.open(io.BytesIO(img_data))
-                
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                images.append(img)
-            
-            pdf_document.close()
-            
-            if not images:
-                raise ValueError("No images generated from PDF")
-            
-            # Get dimensions
-            width = images[0].width
-            total_height = sum(img.height for img in images)
-            
-            # Create new image with combined height
-            combined_image = Image.new('RGB', (width, total_height))
-            
-            # Paste all images vertically
-            y_offset = 0
-            for image in images:
-                combined_image.paste(image, (0, y_offset))
-                y_offset += image.height
-            
-            # Save combined image
             pdf_name = Path(pdf_path).stem
             output_filename = output_filename or f"{pdf_name}_combined.{image_format.lower()}"
             output_path = os.path.join(self.output_dir, output_filename)
             
-            combined_image.save(output_path, format=image_format.upper())
-            logger.info(f"Saved combined image: {output_path}")
+            cache = RenderCache(self.output_dir, enabled=self.use_cache)
+            digest = file_digest(pdf_path)
+            if cache.fetch(digest, "combined", self.dpi, image_format, [output_path]):
+                logger.info(f"Render cache hit: {output_path}")
+                return output_path
+            
+            pdf_document = fitz.open(pdf_path)
+            try:
+                sizes = self._measure_pages(pdf_document)
+                if not sizes:
+                    raise ValueError("No images generated from PDF")
+                
+                # Width of the first page, like the stacked layout always used
+                width = sizes[0][0]
+                self._stitch_pages(pdf_document, list(range(len(sizes))), sizes, width, output_path, image_format)
+            finally:
+                pdf_document.close()
             
+            cache.record(digest, "combined", self.dpi, image_format, pdf_path, [output_path])
+            cache.save()
+            logger.info(f"Saved combined image: {output_path}")
             return output_path
         
         except Exception as e:
             logger.error(f"Error converting PDF to single image: {str(e)}")
             raise
     
+    def convert_pdf_to_tiled_images(
+        self,
+        pdf_path: str,
+        max_height: int,
+        image_format: str = "PNG",
+        output_filename: Optional[str] = None
+    ) -> List[str]:
+        """
+        Convert entire PDF to several vertically stacked images, each at most
+        `max_height` pixels tall (a single taller page gets a tile of its own).
+        
+        Tiles are named {stem}_part_{k}.{ext}, where stem comes from
+        output_filename (default: {pdf_name}_combined).
+        
+        Args:
+            pdf_path: Path to the PDF file
+            max_height: Maximum tile height in pixels
+            image_format: Image format (PNG, JPG, BMP, etc.)
+            output_filename: Custom output filename the tile names are derived from
+        
+        Returns:
+            Paths to the generated tiles, top to bottom
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        if max_height <= 0:
+            raise ValueError("max_height must be positive")
+        
+        try:
+            logger.info(f"Converting PDF to tiled images (max height {max_height}px): {pdf_path}")
+            
+            pdf_name = Path(pdf_path).stem
+            stem = Path(output_filename).stem if output_filename else f"{pdf_name}_combined"
+            
+            cache = RenderCache(self.output_dir, enabled=self.use_cache)
+            digest = file_digest(pdf_path)
+            entry = cache.entries.get(cache.make_key(digest, f"tiles:{max_height}", self.dpi, image_format))
+            if entry:
+                expected = [
+                    os.path.join(self.output_dir, f"{stem}_part_{k}.{image_format.lower()}")
+                    for k in range(1, len(entry["outputs"]) + 1)
+                ]
+                if cache.fetch(digest, f"tiles:{max_height}", self.dpi, image_format, expected):
+                    logger.info(f"Render cache hit: {len(expected)} tiles")
+                    return expected
+            
+            pdf_document = fitz.open(pdf_path)
+            output_paths = []
+            try:
+                sizes = self._measure_pages(pdf_document)
+                if not sizes:
+                    raise ValueError("No images generated from PDF")
+                width = sizes[0][0]
+                
+                # Group consecutive pages into tiles that fit max_height
+                tiles: List[List[int]] = []
+                tile_height = 0
+                for page_num, (_w, h) in enumerate(sizes):
+                    if not tiles or tile_height + h > max_height:
+                        tiles.append([])
+                        tile_height = 0
+                    tiles[-1].append(page_num)
+                    tile_height += h
+                
+                for k, page_nums in enumerate(tiles, 1):
+                    output_path = os.path.join(self.output_dir, f"{stem}_part_{k}.{image_format.lower()}")
+                    self._stitch_pages(pdf_document, page_nums, sizes, width, output_path, image_format)
+                    output_paths.append(output_path)
+                    logger.info(f"Saved tile {k}/{len(tiles)}: {output_path}")
+            finally:
+                pdf_document.close()
+            
+            cache.record(digest, f"tiles:{max_height}", self.dpi, image_format, pdf_path, output_paths)
+            cache.save()
+            return output_paths
+        
+        except Exception as e:
+            logger.error(f"Error converting PDF to tiled images: {str(e)}")
+            raise
+    
+    def _measure_pages(self, pdf_document) -> List[Tuple[int, int]]:
+        """Pixel (width, height) of every page at self.dpi, without rendering."""
+        zoom = self.dpi / 72.0
+        mat = fitz.Matrix(zoom, zoom)
+        sizes = []
+        for page in pdf_document:
+            rect = (page.rect * mat).irect
+            sizes.append((rect.width, rect.height))
+        return sizes
+    
+    def _stitch_pages(
+        self,
+        pdf_document,
+        page_nums: List[int],
+        sizes: List[Tuple[int, int]],
+        width: int,
+        output_path: str,
+        image_format: str
+    ):
+        """Render `page_nums` one at a time into a single canvas and save it."""
+        zoom = self.dpi / 72.0
+        mat = fitz.Matrix(zoom, zoom)
+        canvas = Image.new('RGB', (width, sum(sizes[n][1] for n in page_nums)))
+        
+        y_offset = 0
+        for page_num in page_nums:
+            pix = pdf_document[page_num].get_pixmap(matrix=mat, alpha=False)
+            img = _pixmap_to_image(pix)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            canvas.paste(img, (0, y_offset))
+            y_offset += sizes[page_num][1]
+            del img, pix
+        
+        canvas.save(output_path, format=PIL_FORMAT_NAMES.get(image_format.upper(), image_format.upper()))
+    
     def get_pdf_page_count(self, pdf_path: str) -> int:
         """
         Get the number of pages in a PDF file.
@@ -277,3 +519,27 @@ def pdf_to_single_image(
     """
     converter = PDFToImageConverterFitz(output_dir=output_dir, dpi=dpi)
     return converter.convert_pdf_to_single_image(pdf_path, image_format=image_format)
+
+
+def pdf_to_tiled_images(
+    pdf_path: str,
+    max_height: int,
+    output_dir: str = "pdf_outputs",
+    dpi: int = 200,
+    image_format: str = "PNG"
+) -> List[str]:
+    """
+    Quick function to convert entire PDF to stacked images of bounded height.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        max_height: Maximum height of each output image in pixels
+        output_dir: Directory to save images
+        dpi: Resolution for conversion
+        image_format: Output image format
+    
+    Returns:
+        Paths to the output images
+    """
+    converter = PDFToImageConverterFitz(output_dir=output_dir, dpi=dpi)
+    return converter.convert_pdf_to_tiled_images(pdf_path, max_height, image_format=image_format)
@@ -0,0 +1,303 @@
+"""
+Persistent Repo Index - On-disk per-file analysis with incremental refresh
+
+Every run of RepoMatcherTool and ElementExtractor used to re-read and re-scan
+the whole cloned repo. This module keeps one record per file under
+core/outputs/repo_index/ and only re-analyzes files whose mtime/size changed
+AND whose content hash differs.
+
+Each record holds:
+1. mtime_ns, size, sha256 of the content
+2. tokens - sorted unique lowercase alphanumeric tokens (file-level postings)
+3. elements - interactive elements found by ElementExtractor
+4. tagging_usages - lines that already reference useTagging / track*() calls
+5. any extra analyzer output registered by the caller (e.g. RepoMatcher hints)
+
+Usage:
+    index = PersistentRepoIndex.open(repo_path)
+    changes = index.refresh(files)        # touches only changed files
+    index.save()
+    keys = index.files_matching_any(["pay bill"])   # repo-relative keys
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import logging
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Iterable, Set
+
+from utils.file_handler import FileHandler
+
+logger = logging.getLogger(__name__)
+
+CORE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_INDEX_DIR = CORE_DIR / "outputs" / "repo_index"
+INDEX_VERSION = 2
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+TAGGING_USAGE_RE = re.compile(r"\buseTagging\b|\btrack[A-Z]\w*\s*\(")
+
+# analyzer(path, text, lines) -> JSON-serializable value stored under its name
+Analyzer = Callable[[str, str, List[str]], Any]
+
+
+def analyze_tokens(path: str, text: str, lines: List[str]) -> List[str]:
+    return sorted(set(TOKEN_RE.findall(text.lower())))
+
+
+def analyze_elements(path: str, text: str, lines: List[str]) -> List[Dict[str, Any]]:
+    from tools.data_track_extractor import ElementExtractor
+
+    # same newline handling as Path.read_text(), which the data-track step uses
+    text = text.replace("\r\n", "\n")
+    records = []
+    for elem in ElementExtractor(path, text).extract_all_interactive_elements():
+        record = asdict(elem)
+        record["element_type"] = elem.element_type.value
+        records.append(record)
+    return records
+
+
+def analyze_tagging_usages(path: str, text: str, lines: List[str]) -> List[Dict[str, Any]]:
+    return [
+        {"line": ln, "text": line.strip()[:200]}
+        for ln, line in enumerate(lines, start=1)
+        if TAGGING_USAGE_RE.search(line)
+    ]
+
+
+DEFAULT_ANALYZERS: Dict[str, Analyzer] = {
+    "tokens": analyze_tokens,
+    "elements": analyze_elements,
+    "tagging_usages": analyze_tagging_usages,
+}
+
+
+def index_disabled_by_env() -> bool:
+    """True when REPO_INDEX_DISABLE is set"""
+    return (os.getenv("REPO_INDEX_DISABLE") or "").strip().lower() in {"1", "true", "yes"}
+
+
+class PersistentRepoIndex:
+    """
+    Per-file analysis records for one repo, persisted as gzipped JSON
+
+    Records are keyed by path relative to the repo root, so the index stays
+    valid if the clone is moved.
+    """
+
+    def __init__(self, repo_path: str | Path, index_path: Optional[str | Path] = None):
+        """
+        Args:
+            repo_path: Repository root
+            index_path: Index file (default: core/outputs/repo_index/<repo>-<hash>.json.gz)
+        """
+        self.repo_path = Path(repo_path).resolve()
+        if index_path is None:
+            digest = hashlib.sha1(str(self.repo_path).encode("utf-8")).hexdigest()[:12]
+            index_path = DEFAULT_INDEX_DIR / f"{self.repo_path.name}-{digest}.json.gz"
+        self.index_path = Path(index_path)
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._token_files: Optional[Dict[str, Set[str]]] = None
+        self._dirty = False
+
+    @classmethod
+    def open(cls, repo_path: str | Path, index_path: Optional[str | Path] = None) -> "PersistentRepoIndex":
+        """Load the index for `repo_path` if present (empty index otherwise)"""
+        index = cls(repo_path, index_path)
+        if index.index_path.exists():
+            try:
+                with gzip.open(index.index_path, "rt", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == INDEX_VERSION:
+                    index.records = data.get("files", {})
+                else:
+                    logger.info(f"Repo index version changed, rebuilding: {index.index_path}")
+            except Exception as e:
+                logger.warning(f"Could not load repo index {index.index_path}: {e}")
+        return index
+
+    def save(self):
+        """Write the index if anything changed since it was loaded"""
+        if not self._dirty:
+            return
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(self.index_path.suffix + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "repo": str(self.repo_path), "files": self.records}, f)
+        tmp.replace(self.index_path)
+        self._dirty = False
+
+    # ---------- keys ----------
+
+    def key(self, file: str | Path) -> str:
+        """Record key (repo-relative posix path) for a file"""
+        path = Path(file)
+        if not path.is_absolute():
+            path = self.repo_path / path
+        try:
+            return path.resolve().relative_to(self.repo_path).as_posix()
+        except ValueError:
+            return path.resolve().as_posix()
+
+    def _abs(self, key: str) -> str:
+        return str(self.repo_path / key) if not Path(key).is_absolute() else key
+
+    # ---------- refresh ----------
+
+    def refresh(
+        self,
+        files: Iterable[str | Path],
+        analyzers: Optional[Dict[str, Analyzer]] = None,
+        prune: bool = True,
+    ) -> Dict[str, int]:
+        """
+        Bring records for `files` up to date
+
+        A file is re-read only if its mtime/size changed (then re-analyzed only
+        if its hash changed), or if a requested analyzer has no output yet.
+
+        Args:
+            files: Files that should be in the index
+            analyzers: Extra analyzers to run in addition to DEFAULT_ANALYZERS
+            prune: Drop records for files not in `files`
+
+        Returns:
+            Counts: unchanged, rehashed (touched but same content), reindexed, removed
+        """
+        analyzers = {**DEFAULT_ANALYZERS, **(analyzers or {})}
+        counts = {"unchanged": 0, "rehashed": 0, "reindexed": 0, "removed": 0}
+        seen: Set[str] = set()
+
+        for file in files:
+            key = self.key(file)
+            seen.add(key)
+            path = self._abs(key)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+
+            record = self.records.get(key)
+            missing = [name for name in analyzers if record is not None and name not in record]
+            if (
+                record is not None
+                and not missing
+                and record.get("mtime_ns") == st.st_mtime_ns
+                and record.get("size") == st.st_size
+            ):
+                counts["unchanged"] += 1
+                continue
+
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError as e:
+                logger.warning(f"Could not read {path}: {e}")
+                continue
+
+            digest = hashlib.sha256(data).hexdigest()
+            if record is not None and record.get("sha256") == digest and not missing:
+                record["mtime_ns"] = st.st_mtime_ns
+                record["size"] = st.st_size
+                counts["rehashed"] += 1
+                self._dirty = True
+                continue
+
+            self.records[key] = self._analyze(path, data, st, digest, analyzers)
+            counts["reindexed"] += 1
+            self._dirty = True
+            self._token_files = None
+
+        if prune:
+            for key in [k for k in self.records if k not in seen]:
+                del self.records[key]
+                counts["removed"] += 1
+                self._dirty = True
+                self._token_files = None
+
+        return counts
+
+    def _analyze(self, path: str, data: bytes, st: os.stat_result, digest: str, analyzers: Dict[str, Analyzer]) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest}
+
+        skip = FileHandler.sniff_skip_reason(path, data[:8192], len(data))
+        text = None
+        if not skip:
+            try:
+                text = data.decode("utf-8")
+            except UnicodeDecodeError:
+                skip = "not utf-8"
+
+        if skip:
+            record["skipped"] = skip
+            for name in analyzers:
+                record[name] = []
+            return record
+
+        lines = text.splitlines()
+        for name, analyzer in analyzers.items():
+            try:
+                record[name] = analyzer(path, text, lines)
+            except Exception as e:
+                logger.warning(f"Analyzer '{name}' failed on {path}: {e}")
+                record[name] = []
+        return record
+
+    # ---------- queries ----------
+
+    def record(self, file: str | Path) -> Optional[Dict[str, Any]]:
+        return self.records.get(self.key(file))
+
+    def files_matching_any(self, terms: Iterable[str]) -> Set[str]:
+        """
+        Keys of files that MAY contain any of `terms` (case-insensitive)
+
+        A superset: a file qualifies when, for every token of a term, one of its
+        own tokens contains that token. Callers verify at line level.
+        """
+        if self._token_files is None:
+            self._token_files = {}
+            for key, record in self.records.items():
+                for tok in record.get("tokens", []):
+                    self._token_files.setdefault(tok, set()).add(key)
+
+        out: Set[str] = set()
+        for term in terms:
+            if not term:
+                continue
+            toks = TOKEN_RE.findall(term.lower())
+            if not toks:
+                out.update(self.records)
+                continue
+            cand: Optional[Set[str]] = None
+            for tok in set(toks):
+                keys = set()
+                for vocab, files in self._token_files.items():
+                    if tok in vocab:
+                        keys |= files
+                cand = keys if cand is None else cand & keys
+                if not cand:
+                    break
+            out.update(cand or ())
+        return out
+
+    def elements(self, file: str | Path):
+        """InteractiveElement objects for a file (None if not indexed or skipped)"""
+        from tools.data_track_extractor import InteractiveElement, ElementType
+
+        record = self.record(file)
+        if record is None or "elements" not in record or record.get("skipped"):
+            return None
+        return [
+            InteractiveElement(**{**e, "element_type": ElementType(e["element_type"])})
+            for e in record["elements"]
+        ]
+
+    def tagging_usages(self, file: str | Path) -> List[Dict[str, Any]]:
+        record = self.record(file)
+        return list(record.get("tagging_usages", [])) if record else []
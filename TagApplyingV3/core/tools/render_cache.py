@@ -0,0 +1,149 @@
+"""
+Render Cache - Skip re-rendering PDF pages that are already on disk
+
+Re-running the spec-screenshot pipeline over unchanged PDFs used to render
+every page again. Both converters (pdf_to_image.py and pdf_to_image_fitz.py)
+now record each output in a manifest keyed by:
+
+    (PDF content hash, page, DPI, image format)
+
+and skip any page whose output is still on disk. The manifest lives next to
+the images as render_manifest.json and doubles as a listing of the outputs.
+
+Configuration (environment):
+    PDF_RENDER_CACHE_DISABLE=1   Always render (manifest is still written)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "render_manifest.json"
+MANIFEST_VERSION = 1
+
+# (path, mtime_ns, size) -> sha256, so one run hashes each PDF once
+_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+
+def render_cache_disabled_by_env() -> bool:
+    """True when PDF_RENDER_CACHE_DISABLE is set"""
+    return (os.getenv("PDF_RENDER_CACHE_DISABLE") or "").strip().lower() in {"1", "true", "yes"}
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content (memoized while mtime/size are unchanged)"""
+    st = os.stat(path)
+    sig = (str(Path(path).resolve()), st.st_mtime_ns, st.st_size)
+    digest = _DIGESTS.get(sig)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        _DIGESTS[sig] = digest
+    return digest
+
+
+class RenderCache:
+    """
+    Manifest of rendered outputs for one output directory
+
+    Usage:
+        cache = RenderCache(output_dir)
+        digest = file_digest(pdf_path)
+        if not cache.fetch(digest, page_num, dpi, "PNG", [output_path]):
+            render(...)
+            cache.record(digest, page_num, dpi, "PNG", pdf_path, [output_path])
+        cache.save()
+    """
+
+    def __init__(self, output_dir: str, enabled: Optional[bool] = None):
+        """
+        Args:
+            output_dir: Directory holding the rendered images and the manifest
+            enabled: Serve hits from the manifest (default: not PDF_RENDER_CACHE_DISABLE)
+        """
+        self.manifest_path = Path(output_dir) / MANIFEST_NAME
+        self.enabled = (not render_cache_disabled_by_env()) if enabled is None else enabled
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+        if self.manifest_path.exists():
+            try:
+                data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+                if data.get("version") == MANIFEST_VERSION:
+                    self.entries = data.get("entries", {})
+            except Exception as e:
+                logger.warning(f"Could not read render manifest {self.manifest_path}: {e}")
+
+    @staticmethod
+    def make_key(digest: str, page: Any, dpi: int, image_format: str) -> str:
+        """
+        Args:
+            digest: PDF content hash
+            page: 0-based page index, or a label for multi-page outputs (e.g. "combined")
+            dpi: Render resolution
+            image_format: Output format
+        """
+        return f"{digest}:{page}:{int(dpi)}:{image_format.upper()}"
+
+    def fetch(self, digest: str, page: Any, dpi: int, image_format: str, output_paths: List[str]) -> bool:
+        """
+        True if this render is cached and `output_paths` now hold it
+
+        Outputs cached under other names (e.g. a different prefix) are copied
+        to `output_paths` instead of being rendered again.
+        """
+        if not self.enabled:
+            return False
+
+        entry = self.entries.get(self.make_key(digest, page, dpi, image_format))
+        cached = entry.get("outputs", []) if entry else []
+        if not cached or len(cached) != len(output_paths) or not all(
+            os.path.exists(o["path"]) and os.path.getsize(o["path"]) == o["size"] for o in cached
+        ):
+            self.misses += 1
+            return False
+
+        for src, dst in zip(cached, output_paths):
+            if os.path.abspath(src["path"]) != os.path.abspath(dst):
+                shutil.copyfile(src["path"], dst)
+        self.hits += 1
+        return True
+
+    def record(self, digest: str, page: Any, dpi: int, image_format: str, pdf_path: str, output_paths: List[str]):
+        """Add (or replace) the manifest entry for a finished render"""
+        self.entries[self.make_key(digest, page, dpi, image_format)] = {
+            "pdf": str(pdf_path),
+            "sha256": digest,
+            "page": page,
+            "dpi": int(dpi),
+            "format": image_format.upper(),
+            "outputs": [{"path": str(p), "size": os.path.getsize(p)} for p in output_paths],
+        }
+        self._dirty = True
+
+    def save(self):
+        """Write the manifest if anything was recorded"""
+        if not self._dirty:
+            return
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        tmp.write_text(
+            json.dumps({"version": MANIFEST_VERSION, "entries": self.entries}, indent=2),
+            encoding="utf-8",
+        )
+        tmp.replace(self.manifest_path)
+        self._dirty = False
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
@@ -1,17 +1,22 @@
 # tools/repo_handler.py
 from __future__ import annotations
 
+import os
 import re
 import math
 import logging
+from bisect import bisect_left
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Sequence, Tuple
 
 import numpy as np
 from langchain.tools import BaseTool
 
 from utils.file_handler import FileHandler
 from .vegas_llm_utils import VegasLLMWrapper  # Vegas LLM (no embedding API)
+from .repo_index import RepoTokenIndex
+from .multi_pattern import AhoCorasick, scan_lines
+from .persistent_index import PersistentRepoIndex, index_disabled_by_env
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -19,11 +24,66 @@ logger.setLevel(logging.INFO)
 JS_EVENT_HINTS = ["onClick", "onSubmit", "onChange", "onSelect", "onPress"]
 JSX_TAG_HINTS  = ["<Button", "<button", "<Link", "<a ", "<IconButton", "<Touchable", "<Pressable"]
 
-def _cosine(a: np.ndarray, b: np.ndarray) -> float:
-    denom = (np.linalg.norm(a) * np.linalg.norm(b))
-    if denom == 0:
-        return 0.0
-    return float(np.dot(a, b) / denom)
+# one automaton for both hint families; pattern ids < len(JS_EVENT_HINTS) are event handlers
+_HINT_MATCHER = AhoCorasick(JS_EVENT_HINTS + JSX_TAG_HINTS)
+
+HintLines = Dict[str, Dict[str, List[int]]]  # file -> {"event": [line_no], "jsx": [line_no]}
+
+def _hint_lines(lines) -> Dict[str, List[int]]:
+    """Scan one file once for event-handler and clickable-JSX hints."""
+    event, jsx = set(), set()
+    n_event = len(JS_EVENT_HINTS)
+    for ln, _col, pid in scan_lines(_HINT_MATCHER, lines):
+        (event if pid < n_event else jsx).add(ln)
+    return {"event": sorted(event), "jsx": sorted(jsx)}
+
+def _scan_hints(index: RepoTokenIndex) -> HintLines:
+    """Hint lines for every file in the index."""
+    return {file: _hint_lines(index.lines_of(file)) for file in index.files}
+
+# persisted alongside tokens/elements in the on-disk repo index
+_INDEX_ANALYZERS = {"hints": lambda path, text, lines: _hint_lines(lines)}
+
+def _has_hint_in_range(hint_lines: List[int], first: int, last: int) -> bool:
+    i = bisect_left(hint_lines, first)
+    return i < len(hint_lines) and hint_lines[i] <= last
+
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+def _text_tokens(text: str) -> List[str]:
+    """Lowercase word tokens; camelCase / PascalCase identifiers are split (handlePayBill -> handle, pay, bill)."""
+    return [t.lower() for t in _WORD_RE.findall(text or "")]
+
+def _bm25_scores(query: str, docs: List[str], k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+    """
+    BM25 score of every doc against the query, computed in one matrix product.
+
+    Only query-term columns of the doc-term matrix are materialized, so the
+    matrix is (n_docs x n_query_terms) regardless of window vocabulary.
+    IDF is taken over the docs themselves (the candidate windows).
+    """
+    q_terms = sorted(set(_text_tokens(query)))
+    if not docs or not q_terms:
+        return np.zeros(len(docs))
+    col = {t: j for j, t in enumerate(q_terms)}
+
+    tf = np.zeros((len(docs), len(q_terms)))
+    doc_len = np.zeros(len(docs))
+    for i, doc in enumerate(docs):
+        toks = _text_tokens(doc)
+        doc_len[i] = len(toks)
+        for t in toks:
+            j = col.get(t)
+            if j is not None:
+                tf[i, j] += 1
+
+    n = len(docs)
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    avgdl = doc_len.mean() or 1.0
+    norm = k1 * (1 - b + b * doc_len / avgdl)
+    weights = tf * (k1 + 1) / (tf + norm[:, None])
+    return weights @ idf
 
 class RepoMatcherTool(BaseTool):
     """
@@ -33,33 +93,12 @@ class RepoMatcherTool(BaseTool):
     _run(repo_path: str, spec_items: List[Dict], use_embeddings: bool = True)
     """
     name = "repo_matcher"
-    description = "Scans a React repo and proposes tagging locations (keyword + optional Vegas LLM embeddings)."
+    description = "Scans a React repo and proposes tagging locations (keyword + local BM25 ranking)."
 
     def _run(self, repo_path: str, spec_items: List[Dict[str, Any]], use_embeddings: bool = True) -> Dict[str, Any]:
         try:
             files = FileHandler.find_react_files(repo_path)
-            # pre-read contents
-            contents: Dict[str, List[str]] = {f: FileHandler.read_file_content(f).splitlines() for f in files}
-
-            # build a light index of candidate lines to keep embedding cost low
-            candidates = self._collect_candidates(contents, spec_items)
-
-            suggestions = []
-            for idx, item in enumerate(spec_items):
-                matches = self._score_candidates_for_item(item, candidates, use_embeddings=use_embeddings)
-                suggestions.append({
-                    "item_index": idx,
-                    "sheet": item.get("sheet"),
-                    "row_index": item.get("row_index"),
-                    "description": item.get("description"),
-                    "component": item.get("component"),
-                    "action": item.get("action"),
-                    "page": item.get("page"),
-                    "adobe_var": item.get("adobe_var"),
-                    "adobe_value": item.get("adobe_value"),
-                    "target_terms": item.get("target_terms", []),
-                    "matches": matches,
-                })
+            suggestions = self._suggest(repo_path, files, spec_items, use_embeddings)
 
             return {
                 "status": "success",
@@ -76,81 +115,236 @@ class RepoMatcherTool(BaseTool):
             logger.exception(f"RepoMatcherTool failed: {e}")
             return {"status": "error", "error": str(e)}
 
+    def iter_suggestions(self, repo_path: str, spec_items: Iterable[Dict[str, Any]], use_embeddings: bool = True, chunk_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of _run: consume spec items (e.g. from
+        ExcelReaderTool.iter_spec_items) `chunk_size` at a time and yield one
+        suggestion per item, so matching starts before the whole spec is parsed.
+        item_index counts across chunks.
+
+        The persistent index is refreshed once up front; each chunk then only
+        reads the files no earlier chunk has loaded.
+        """
+        files = FileHandler.find_react_files(repo_path)
+        store = None if index_disabled_by_env() else self._open_index(repo_path, files)
+        loaded: Dict[str, Sequence[str]] = {}
+        chunk: List[Dict[str, Any]] = []
+        offset = 0
+        for item in spec_items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                for sug in self._suggest(repo_path, files, chunk, use_embeddings, store, loaded):
+                    sug["item_index"] += offset
+                    yield sug
+                offset += len(chunk)
+                chunk = []
+        if chunk:
+            for sug in self._suggest(repo_path, files, chunk, use_embeddings, store, loaded):
+                sug["item_index"] += offset
+                yield sug
+
+    def _suggest(
+        self,
+        repo_path: str,
+        files: List[str],
+        spec_items: List[Dict[str, Any]],
+        use_embeddings: bool,
+        store: Optional[PersistentRepoIndex] = None,
+        loaded: Optional[Dict[str, Sequence[str]]] = None,
+    ) -> List[Dict[str, Any]]:
+        index, hints = self._get_index(repo_path, files, spec_items, store, loaded)
+
+        # build a light index of candidate lines to keep embedding cost low
+        candidates = self._collect_candidates(index, spec_items, hints)
+
+        suggestions = []
+        for idx, item in enumerate(spec_items):
+            # candidates are keyed by position in this batch
+            matches = self._score_candidates_for_item({**item, "item_index": idx}, candidates, use_embeddings=use_embeddings)
+            suggestions.append({
+                "item_index": idx,
+                "sheet": item.get("sheet"),
+                "row_index": item.get("row_index"),
+                "description": item.get("description"),
+                "component": item.get("component"),
+                "action": item.get("action"),
+                "page": item.get("page"),
+                "adobe_var": item.get("adobe_var"),
+                "adobe_value": item.get("adobe_value"),
+                "target_terms": item.get("target_terms", []),
+                "matches": matches,
+            })
+        return suggestions
+
     # ---------- candidate collection ----------
 
-    def _collect_candidates(self, contents: Dict[str, List[str]], spec_items: List[Dict[str, Any]]) -> Dict[str, List[Tuple[str, int, str]]]:
+    @staticmethod
+    def _lazy_lines() -> bool:
+        """REPO_LAZY_LINES=1 keeps file lines mmap-backed instead of decoded in RAM."""
+        return (os.getenv("REPO_LAZY_LINES") or "").strip().lower() in {"1", "true", "yes"}
+
+    @staticmethod
+    def _open_index(repo_path: str, files: List[str]) -> PersistentRepoIndex:
+        """
+        Open the on-disk PersistentRepoIndex and refresh it incrementally (only
+        files whose mtime/size and hash changed are re-read).
+        """
+        store = PersistentRepoIndex.open(repo_path)
+        changes = store.refresh(files, analyzers=_INDEX_ANALYZERS)
+        store.save()
+        logger.info(f"Repo index {store.index_path.name}: {changes}")
+        return store
+
+    def _load(self, files: List[str], loaded: Optional[Dict[str, Sequence[str]]]) -> Dict[str, Sequence[str]]:
+        """Lines of `files` in order, reading only those not already in `loaded`"""
+        if loaded is None:
+            return FileHandler.load_files(files, lazy=self._lazy_lines())
+        missing = [f for f in files if f not in loaded]
+        if missing:
+            loaded.update(FileHandler.load_files(missing, lazy=self._lazy_lines()))
+        return {f: loaded[f] for f in files}
+
+    def _get_index(
+        self,
+        repo_path: str,
+        files: List[str],
+        spec_items: List[Dict[str, Any]],
+        store: Optional[PersistentRepoIndex] = None,
+        loaded: Optional[Dict[str, Sequence[str]]] = None,
+    ) -> Tuple[RepoTokenIndex, HintLines]:
         """
-        Return dict: {item_id: [(file, line_no, window_text), ...]}
-        where window_text is ~16-line context around the hit.
+        Token index + hint lines for the files the spec items can touch.
+
+        Only files that may contain a target term, plus the files feeding the
+        event-hint fallback, are loaded and line-indexed. `store` is opened
+        and refreshed here unless the caller already did; files already in
+        `loaded` are not read again. REPO_INDEX_DISABLE=1 loads and scans
+        every file instead.
         """
+        if index_disabled_by_env():
+            index = RepoTokenIndex.build(self._load(files, loaded))
+            return index, _scan_hints(index)
+
+        if store is None:
+            store = self._open_index(repo_path, files)
+
+        terms = {t.lower() for item in spec_items for t in (item.get("target_terms") or []) if t}
+        needed = store.files_matching_any(terms)
+
+        # files holding the first 30 event-hint lines (see fallback in _collect_candidates)
+        remaining = 30
+        for f in files:
+            if remaining <= 0:
+                break
+            record = store.record(f) or {}
+            n = len((record.get("hints") or {}).get("event", []))
+            if n:
+                needed.add(store.key(f))
+                remaining -= n
+
+        subset = [f for f in files if store.key(f) in needed]
+        index = RepoTokenIndex.build(self._load(subset, loaded))
+        hints: HintLines = {}
+        for file in index.files:
+            record = store.record(file) or {}
+            hints[file] = record.get("hints") or _hint_lines(index.lines_of(file))
+        return index, hints
+
+    def _collect_candidates(self, index: RepoTokenIndex | Dict[str, List[str]], spec_items: List[Dict[str, Any]], hints: HintLines | None = None) -> Dict[str, List[Tuple[str, int, str, Dict[str, bool]]]]:
+        """
+        Return dict: {item_id: [(file, line_no, window_text, window_hints), ...]}
+        where window_text is ~16-line context around the hit and window_hints
+        says whether the window has an event handler / clickable JSX element.
+
+        Term hits come from posting lookups on the shared RepoTokenIndex and
+        hint hits from a single Aho-Corasick scan per file, instead of
+        rescanning every line and window for every item.
+        """
+        if not isinstance(index, RepoTokenIndex):
+            index = RepoTokenIndex.build(index)
+        if hints is None:
+            hints = _scan_hints(index)
+
+        def _candidate(file: str, ln: int, before: int, after: int) -> Tuple[str, int, str, Dict[str, bool]]:
+            lines = index.lines_of(file)
+            first, last = max(1, ln - before), min(len(lines), ln + after)
+            window_hints = {
+                "event": _has_hint_in_range(hints[file]["event"], first, last),
+                "jsx": _has_hint_in_range(hints[file]["jsx"], first, last),
+            }
+            return (file, ln, "\n".join(lines[first - 1 : last]), window_hints)
+
         term_sets = {i: [t.lower() for t in (item.get("target_terms") or [])] for i, item in enumerate(spec_items)}
-        out: Dict[str, List[Tuple[str, int, str]]] = {}
+        out: Dict[str, List[Tuple[str, int, str, Dict[str, bool]]]] = {}
+        fallback: List[Tuple[str, int, str, Dict[str, bool]]] | None = None
 
         for i, terms in term_sets.items():
             out[str(i)] = []
             if not terms:
                 continue
 
-            for file, lines in contents.items():
-                for ln, line in enumerate(lines, start=1):
-                    low = line.lower()
-                    if not any(t for t in terms if t and t in low):
-                        continue
-                    # take a small window around the hit for more semantic info
-                    w = lines[max(1, ln - 8) - 1 : min(len(lines), ln + 8)]
-                    window = "\n".join(w)
-                    out[str(i)].append((file, ln, window))
+            for lid in index.lines_containing_any(terms):
+                file, ln = index.ref(lid)
+                # take a small window around the hit for more semantic info
+                out[str(i)].append(_candidate(file, ln, 8, 8))
 
             # soft fallback: if no keyword hits, still capture common interactive regions
             if not out[str(i)]:
-                for file, lines in contents.items():
-                    for ln, line in enumerate(lines, start=1):
-                        if any(h in line for h in JS_EVENT_HINTS):
-                            w = lines[max(1, ln - 4) - 1 : min(len(lines), ln + 6)]
-                            out[str(i)].append((file, ln, "\n".join(w)))
-                            if len(out[str(i)]) >= 30:
+                if fallback is None:
+                    fallback = []
+                    for file in index.files:
+                        for ln in hints[file]["event"]:
+                            fallback.append(_candidate(file, ln, 4, 6))
+                            if len(fallback) >= 30:
                                 break
-                    if len(out[str(i)]) >= 30:
-                        break
+                        if len(fallback) >= 30:
+                            break
+                out[str(i)] = list(fallback)
 
         return out
 
     # ---------- scoring ----------
 
-    def _score_candidates_for_item(self, item: Dict[str, Any], candidates: Dict[str, List[Tuple[str, int, str]]], use_embeddings: bool) -> List[Dict[str, Any]]:
+    def _score_candidates_for_item(self, item: Dict[str, Any], candidates: Dict[str, List[Tuple[str, int, str, Dict[str, bool]]]], use_embeddings: bool) -> List[Dict[str, Any]]:
         cid = str(item.get("item_index", item.get("row_index", "")))  # tolerate either
         cands = candidates.get(str(item.get("item_index")) or cid, [])
         if not cands:
             return []
 
-        # base score from heuristics; skip embedding boost (not supported by Vegas LLM)
         scored: List[Dict[str, Any]] = []
 
         # Prepare query text
         q_terms = item.get("target_terms", [])
         q = f"page:{item.get('page') or ''} action:{item.get('action') or ''} desc:{item.get('description') or ''} terms:{', '.join(q_terms)}"
 
-        # Vegas LLM does not provide embedding API, so skip embedding logic
-        q_vec, cand_vecs = None, []
+        # Vegas LLM has no embedding API: rank windows with local BM25 instead,
+        # normalized to [0, 1] against the best window for this item
+        sims = np.zeros(len(cands))
+        if use_embeddings:
+            q_text = re.sub(r"\b(?:page|action|desc|terms):", " ", q)  # drop field labels
+            bm25 = _bm25_scores(q_text, [window for _f, _ln, window, _h in cands])
+            top = float(bm25.max()) if len(bm25) else 0.0
+            if top > 0:
+                sims = bm25 / top
 
-        for idx, (file, line_no, window) in enumerate(cands):
-            # heuristic base
+        for idx, (file, line_no, window, window_hints) in enumerate(cands):
+            # heuristic base (hint hits precomputed by the Aho-Corasick scan)
             base = 0.55
-            if any(h in window for h in JS_EVENT_HINTS):
+            if window_hints["event"]:
                 base += 0.20
-            if any(t in window for t in JSX_TAG_HINTS):
+            if window_hints["jsx"]:
                 base += 0.10
             if (item.get("action") == "view") and re.search(r"(Page|Screen|Route)", Path(file).name):
                 base += 0.05
 
-            sim = 0.0
-            # No embedding similarity boost
+            sim = float(sims[idx])
+            base += 0.10 * sim
 
             conf = round(min(0.95, base), 2)
             evidence = []
-            if any(h in window for h in JS_EVENT_HINTS):
+            if window_hints["event"]:
                 evidence.append("nearby event handler")
-            if any(t in window for t in JSX_TAG_HINTS):
+            if window_hints["jsx"]:
                 evidence.append("clickable JSX element")
             if sim:
                 evidence.append(f"semantic_sim={sim:.3f}")
@@ -160,7 +354,10 @@ class RepoMatcherTool(BaseTool):
                 "line": line_no,
                 "confidence": conf,
                 "evidence": evidence,
+                "_sim": sim,
             })
 
-        scored.sort(key=lambda x: x["confidence"], reverse=True)
+        scored.sort(key=lambda x: (x["confidence"], x["_sim"]), reverse=True)
+        for s in scored:
+            del s["_sim"]
         return scored[:5]
@@ -0,0 +1,106 @@
+# tools/repo_index.py
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Iterable, Sequence, Tuple, Set
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class RepoTokenIndex:
+    """
+    Inverted index over repo lines: lowercase alphanumeric token -> line ids.
+
+    Built once from the pre-read `contents` ({file: [lines]}) and reused for
+    every spec item. A term lookup keeps the exact semantics of the old
+    `term.lower() in line.lower()` scan:
+
+      1. split the term into tokens
+      2. for each term token, union the postings of every vocabulary token
+         that contains it (the term may start/end mid-word)
+      3. intersect across term tokens -> candidate lines
+      4. verify the candidates with the original substring check
+
+    Line ids are assigned in (file order, line order), so sorted ids come back
+    in the same order the old nested loops produced.
+    """
+
+    def __init__(self) -> None:
+        self.files: List[str] = []
+        self.refs: List[Tuple[int, int]] = []          # line id -> (file idx, line no)
+        self.postings: Dict[str, List[int]] = {}      # token -> sorted line ids
+        self._contents: Dict[str, Sequence[str]] = {}   # lists or LazyLines views, not copied
+        self._token_cache: Dict[str, Set[int]] = {}
+
+    # ---------- build ----------
+
+    @classmethod
+    def build(cls, contents: Dict[str, Sequence[str]]) -> "RepoTokenIndex":
+        idx = cls()
+        idx._contents = contents
+        for fi, (file, lines) in enumerate(contents.items()):
+            idx.files.append(file)
+            for ln, line in enumerate(lines, start=1):
+                lid = len(idx.refs)
+                idx.refs.append((fi, ln))
+                for tok in set(TOKEN_RE.findall(line.lower())):
+                    idx.postings.setdefault(tok, []).append(lid)
+        return idx
+
+    # ---------- lookup ----------
+
+    def _lines_for_token(self, tok: str) -> Set[int]:
+        """All line ids whose tokens contain `tok` as a substring (cached)"""
+        hit = self._token_cache.get(tok)
+        if hit is None:
+            hit = set()
+            for vocab, ids in self.postings.items():
+                if tok in vocab:
+                    hit.update(ids)
+            self._token_cache[tok] = hit
+        return hit
+
+    def lines_containing(self, term: str, case_sensitive: bool = False) -> List[int]:
+        """Sorted line ids whose text contains `term` (same semantics as `in`)"""
+        if not term:
+            return []
+        low = term.lower()
+        toks = TOKEN_RE.findall(low)
+
+        if toks:
+            cand: Set[int] | None = None
+            for tok in sorted(set(toks), key=len, reverse=True):
+                ids = self._lines_for_token(tok)
+                cand = set(ids) if cand is None else cand & ids
+                if not cand:
+                    return []
+            ids_iter: Iterable[int] = cand or ()
+        else:
+            # term has no alphanumerics (e.g. "+"), nothing to look up
+            ids_iter = range(len(self.refs))
+
+        if case_sensitive:
+            return sorted(i for i in ids_iter if term in self.line_text(i))
+        return sorted(i for i in ids_iter if low in self.line_text(i).lower())
+
+    def lines_containing_any(self, terms: Iterable[str], case_sensitive: bool = False) -> List[int]:
+        """Sorted union of lines_containing() over several terms"""
+        out: Set[int] = set()
+        for t in terms:
+            if t:
+                out.update(self.lines_containing(t, case_sensitive=case_sensitive))
+        return sorted(out)
+
+    # ---------- accessors ----------
+
+    def ref(self, line_id: int) -> Tuple[str, int]:
+        """(file, 1-based line number) for a line id"""
+        fi, ln = self.refs[line_id]
+        return self.files[fi], ln
+
+    def line_text(self, line_id: int) -> str:
+        file, ln = self.ref(line_id)
+        return self._contents[file][ln - 1]
+
+    def lines_of(self, file: str) -> Sequence[str]:
+        return self._contents[file]
@@ -9,7 +9,7 @@ This module creates prompts where LLM can:
 
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 
 class SmartPromptBuilder:
@@ -214,9 +214,236 @@ Use ONLY these values - do NOT invent or make up values.
 - **Correct paths** - calculate relative import paths based on file location
 """
         
-        # Save prompt for debugging
-        with open("smart_prompt.txt", 'w', encoding='utf-8') as f:
-            f.write(prompt)
+        return prompt
+    
+    def build_multi_instruction_prompt(
+        self,
+        target_file_path: str,
+        target_file_content: str,
+        instructions: List[Dict[str, Any]],
+    ) -> str:
+        """
+        Build ONE prompt that applies several tracking instructions to the same file
+        
+        Used when the spec has multiple items for one file (e.g. a page_load plus
+        two clicks), so the file is sent and rewritten once instead of per item.
+        
+        Args:
+            target_file_path: Path to target file
+            target_file_content: Full content of target file
+            instructions: List of dicts with action, event, params, description,
+                          anchor_line and optional snippet
+        
+        Returns:
+            Complete prompt for LLM
+        """
+        framework_context = self.get_tagging_framework_context()
+        
+        functions = sorted({ins.get("event", "") for ins in instructions if ins.get("event")})
+        
+        tasks = ""
+        for n, ins in enumerate(instructions, 1):
+            params = ins.get("params", {})
+            tasks += f"""
+### Instruction {n}
+
+- Description: {ins.get("description", "")}
+- Action Type: {ins.get("action", "")}
+- Function to call: {ins.get("event", "")}
+- Anchor Line: {ins.get("anchor_line", 1)}
+- Parameters needed (use EXACTLY these values):
+"""
+            for param_name, param_value in params.items():
+                tasks += f"  - `{param_name}`: {param_value}\n"
+            if ins.get("snippet"):
+                tasks += f"- Code context:\n```javascript\n{ins['snippet']}\n```\n"
+        
+        prompt = f"""{framework_context}
+
+---
+
+## TARGET FILE (the file you need to modify)
+
+**Path**: `{target_file_path}`
+
+```javascript
+{target_file_content}
+```
+
+---
+
+## TASK REQUIREMENTS
+
+Apply ALL {len(instructions)} instructions below to the target file in a single edit.
+{tasks}
+---
+
+## INSTRUCTIONS
+
+You are a code transformation assistant. Your job:
+
+1. **READ and ANALYZE the Tagging framework code** (at the top of this prompt)
+   - Understand what functions are exported and what parameters they accept
+   - DO NOT invent functions
+
+2. **READ the target file** and, for EACH instruction, check whether its call is
+   already present. If an instruction is already satisfied, leave it and report it.
+
+3. **ADD the import ONCE IF MISSING**:
+   - Calculate the correct relative path to the Tagging framework
+   - useTagging is self-contained - NO other dependencies needed
+
+4. **ADD ONE hook call IF MISSING** that destructures every function you need:
+   - Example: `const {{ {", ".join(functions)} }} = useTagging();`
+   - Extend an existing useTagging() destructuring instead of adding a second one
+   - Place after other hook declarations
+
+5. **ADD each tracking call with EXACT parameters**:
+   - Place each call near its anchor line (handler, useEffect, catch block, etc.)
+   - trackPageLoad ALWAYS goes in useEffect with an empty dependency array []
+   - CORRECT: useEffect(() => {{ trackPageLoad(...) }}, [])
+
+6. **PRESERVE all other code**:
+   - Don't modify unrelated parts, formatting or variable names
+
+7. **Return JSON result**:
+   ```json
+   {{
+     "applied": true/false,
+     "reason": "overall explanation",
+     "updated_file": "full file content with ALL instructions applied",
+     "import_added": true/false,
+     "hook_added": true/false,
+     "tracking_added": true/false,
+     "instructions": [
+       {{"index": 1, "applied": true/false, "reason": "explanation"}}
+     ]
+   }}
+   ```
+   Report one entry in "instructions" per instruction above, using its number as "index".
+
+---
+
+## KEY RULES
+
+- **Framework is source of truth** - read and understand the actual code
+- **Match parameters exactly** - use ONLY the values listed per instruction
+- **NO inventing** - don't create functions or parameters that don't exist
+- **Preserve existing code** - don't modify unrelated parts
+- **Idempotent** - if everything is already applied, return unchanged
+- **Correct paths** - calculate relative import paths based on file location
+"""
+        
+        return prompt
+    
+    def build_patch_prompt(
+        self,
+        target_file_path: str,
+        target_file_content: str,
+        instructions: List[Dict[str, Any]],
+    ) -> str:
+        """
+        Build prompt that asks for anchored edit OPERATIONS instead of the full file
+        
+        The target file is shown with line numbers; the LLM answers with a short
+        list of operations executed locally by tools.patch_applier.PatchApplier,
+        so output tokens scale with the change, not the file.
+        
+        Args:
+            target_file_path: Path to target file
+            target_file_content: Full content of target file
+            instructions: List of dicts with action, event, params, description,
+                          anchor_line and optional snippet
+        
+        Returns:
+            Complete prompt for LLM
+        """
+        framework_context = self.get_tagging_framework_context()
+        
+        numbered = "\n".join(
+            f"{n:>4}: {line}" for n, line in enumerate(target_file_content.splitlines(), 1)
+        )
+        
+        tasks = ""
+        for n, ins in enumerate(instructions, 1):
+            tasks += f"""
+### Instruction {n}
+
+- Description: {ins.get("description", "")}
+- Action Type: {ins.get("action", "")}
+- Function to call: {ins.get("event", "")}
+- Anchor Line: {ins.get("anchor_line", 1)}
+- Parameters needed (use EXACTLY these values): {json.dumps(ins.get("params", {}), indent=2)}
+"""
+        
+        prompt = f"""{framework_context}
+
+---
+
+## TARGET FILE (the file you need to modify, shown WITH LINE NUMBERS)
+
+**Path**: `{target_file_path}`
+
+```javascript
+{numbered}
+```
+
+The `NNNN: ` prefixes are NOT part of the file - they only give you line numbers.
+
+---
+
+## TASK REQUIREMENTS
+{tasks}
+---
+
+## INSTRUCTIONS
+
+1. **READ the Tagging framework code** - use ONLY functions it exports.
+2. **CHECK the target file** - if a call is already present, don't add it again.
+3. **ADD the import IF MISSING** (correct relative path to the Tagging framework).
+4. **ADD the useTagging() hook IF MISSING**, or extend an existing destructuring.
+5. **ADD each tracking call with EXACT parameters** near its anchor line.
+   trackPageLoad ALWAYS goes in useEffect with an empty dependency array [].
+
+## EDIT PROTOCOL - DO NOT RETURN THE FILE
+
+Describe your change as a list of operations. Available operations:
+
+- `{{"op": "insert_import", "code": "import ... from '...';"}}`
+  Adds an import after the existing imports.
+- `{{"op": "insert_after_line", "line": N, "anchor": "text on line N", "code": "..."}}`
+  Inserts code after original line N.
+- `{{"op": "insert_before_line", "line": N, "anchor": "text on line N", "code": "..."}}`
+  Inserts code before original line N.
+- `{{"op": "insert_in_function", "function": "handlerName", "code": "..."}}`
+  Inserts code at the top of the body of function/handler `handlerName`.
+- `{{"op": "replace_text", "old": "exact unique text", "new": "replacement"}}`
+  Replaces text that occurs EXACTLY once (e.g. extend `const {{ a }} = useTagging();`).
+
+Rules:
+- Line numbers refer to the ORIGINAL numbered file above
+- "anchor" is a short literal substring of line N, used to verify the position
+- "code" contains only the NEW lines; include indentation
+- Keep operations minimal - never rewrite unrelated code
+
+## OUTPUT
+
+Return ONLY valid JSON (no markdown, no explanation):
+```json
+{{
+  "applied": true/false,
+  "reason": "explanation",
+  "import_added": true/false,
+  "hook_added": true/false,
+  "tracking_added": true/false,
+  "operations": [
+    {{"op": "insert_import", "code": "import {{ useTagging }} from '../Tagging';"}}
+  ]
+}}
+```
+
+If everything is already present, return `"applied": false` and an empty `operations` list.
+"""
         
         return prompt
     
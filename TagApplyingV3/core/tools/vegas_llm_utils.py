@@ -1,19 +1,115 @@
 import os
+import time
+import asyncio
+import threading
 from dotenv import load_dotenv
 from pyvegas.helpers.utils import set_proxy
 from pyvegas.langx.llm import VegasChatLLM
 
+from .llm_cache import LLMResponseCache, cache_disabled_by_env
+from .llm_rate_limiter import LLMTrafficControl, default_max_concurrency, estimate_tokens
+from .llm_retry import RetryPolicy
+from .llm_telemetry import LLMTelemetry, LLMCallRecord, DEFAULT_STAGE, response_usage, call_tokens
+
 set_proxy()
 load_dotenv()
 
 context_name = os.getenv("context_name")
 usecase_name = os.getenv("usecase_name")
 
+MAX_OUTPUT_TOKENS = 8000
+
+# Process-wide client registry: one VegasChatLLM (and so one set of pooled,
+# keep-alive HTTP connections) per (context, usecase, max_output_tokens)
+_chat_models = {}
+_wrappers = {}
+_registry_lock = threading.Lock()
+
+
+def get_chat_model(context_name=context_name, usecase_name=usecase_name, max_output_tokens=MAX_OUTPUT_TOKENS):
+    """Shared VegasChatLLM for these settings, created on first use"""
+    key = (context_name, usecase_name, max_output_tokens)
+    with _registry_lock:
+        model = _chat_models.get(key)
+        if model is None:
+            model = VegasChatLLM(context_name=context_name, usecase_name=usecase_name, max_output_tokens=max_output_tokens)
+            _chat_models[key] = model
+        return model
+
+
+# One long-lived event loop on a daemon thread runs every async fan-out, so the
+# async HTTP client of the shared chat model always lives on the same loop
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="vegas-llm-loop", daemon=True).start()
+        return _loop
+
+
+def run_async(coro):
+    """Run a coroutine on the background LLM loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+def _response_text(result) -> str:
+    # If result is an object (e.g., AIMessage), extract .content, else return as is
+    if hasattr(result, 'content'):
+        return result.content
+    return str(result)
+
+
 class VegasLLMWrapper:
-    def __init__(self, context_name=context_name, usecase_name=usecase_name):
+    def __init__(self, context_name=context_name, usecase_name=usecase_name, use_cache=None, cache=None, traffic=None, retry=None, telemetry=None):
         self.context_name = context_name
         self.usecase_name = usecase_name
-        self.llm = VegasChatLLM(context_name=context_name, usecase_name=usecase_name,max_output_tokens=8000)
+        self.max_output_tokens = MAX_OUTPUT_TOKENS
+        self._llm = None  # resolved from the shared registry on first invoke
+
+        # Persistent response cache (bypass with use_cache=False or LLM_CACHE_DISABLE=1)
+        if use_cache is None:
+            use_cache = not cache_disabled_by_env()
+        self.cache = (cache or LLMResponseCache.shared()) if use_cache else None
+
+        # Rate limiter + adaptive concurrency, shared by every wrapper of this endpoint
+        self.traffic = traffic or LLMTrafficControl.shared(f"{context_name}/{usecase_name}")
+        # Retries with jittered backoff, optional hedging (LLM_MAX_RETRIES, LLM_HEDGE)
+        self.retry = retry or RetryPolicy.from_env()
+        # Per-call tokens / latency / retries by caller stage
+        self.telemetry = telemetry or LLMTelemetry.shared()
+
+    @classmethod
+    def shared(cls, use_cache=None) -> "VegasLLMWrapper":
+        """
+        Process-wide wrapper for the default context/usecase
+
+        Tools and agents call this instead of constructing their own wrapper,
+        so the chat model and its connections are set up once per process.
+        """
+        if use_cache is None:
+            use_cache = not cache_disabled_by_env()
+        key = (context_name, usecase_name, bool(use_cache))
+        with _registry_lock:
+            wrapper = _wrappers.get(key)
+            if wrapper is None:
+                wrapper = cls(use_cache=use_cache)
+                _wrappers[key] = wrapper
+            return wrapper
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = get_chat_model(self.context_name, self.usecase_name, self.max_output_tokens)
+        return self._llm
+
+    @llm.setter
+    def llm(self, model):
+        self._llm = model
 
     # def invoke(self, prompt: str,json_schema):
     #     structured_llm = self.llm.with_structured_output(json_schema)
@@ -25,11 +121,197 @@ class VegasLLMWrapper:
     #         return result.content
     #     return str(result)
     
-    def invoke(self, prompt: str):
-        result = self.llm.invoke(prompt)
-        # If result is an object (e.g., AIMessage), extract .content, else return as is
-        if hasattr(result, 'content'):
-            return result.content
-        return str(result)
+    def _cache_key(self, prompt: str) -> str:
+        return LLMResponseCache.make_key(
+            prompt,
+            model="vegas",
+            context_name=self.context_name,
+            usecase_name=self.usecase_name,
+            max_output_tokens=self.max_output_tokens,
+        )
+
+    def _cached(self, prompt: str, use_cache: bool):
+        """(cache key or None, cached text or None)"""
+        if self.cache is None or not use_cache:
+            return None, None
+        key = self._cache_key(prompt)
+        return key, self.cache.get(key)
+
+    def _store(self, key, text):
+        if key is not None and isinstance(text, str):
+            self.cache.set(key, text)
+
+    def _attempt(self, prompt: str, call: dict) -> str:
+        """One request, under the rate limiter and concurrency controller"""
+        started = self.traffic.before(estimate_tokens(prompt))
+        try:
+            result = self.llm.invoke(prompt)
+            text = _response_text(result)
+        except Exception as e:
+            self.traffic.after(started, error=e)
+            raise
+        call["usage"] = response_usage(result)
+        self.traffic.after(started, output_tokens=call_tokens(prompt, text, call["usage"])[1])
+        return text
+
+    async def _aattempt(self, prompt: str, call: dict) -> str:
+        started = await self.traffic.abefore(estimate_tokens(prompt))
+        try:
+            if hasattr(self.llm, "ainvoke"):
+                result = await self.llm.ainvoke(prompt)
+            else:
+                result = await asyncio.to_thread(self.llm.invoke, prompt)
+            text = _response_text(result)
+        except asyncio.CancelledError:
+            self.traffic.after(started, cancelled=True)
+            raise
+        except Exception as e:
+            self.traffic.after(started, error=e)
+            raise
+        call["usage"] = response_usage(result)
+        self.traffic.after(started, output_tokens=call_tokens(prompt, text, call["usage"])[1])
+        return text
+
+    def _hedge_after(self):
+        """Seconds after which a duplicate request is sent (None = don't hedge yet)"""
+        if not self.retry.hedge or len(self.traffic.latency) < self.retry.hedge_min_samples:
+            return None
+        return self.traffic.latency.percentile(95)
+
+    async def _ahedged(self, prompt: str, call: dict) -> str:
+        """
+        _aattempt, duplicated once if it runs past the p95 latency seen so far;
+        the first successful answer wins and the other request is cancelled
+        """
+        primary = asyncio.ensure_future(self._aattempt(prompt, call))
+        hedge_after = self._hedge_after()
+        if hedge_after is None:
+            return await primary
+
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return primary.result()
+
+            call["hedged"] = True
+            hedge = asyncio.ensure_future(self._aattempt(prompt, call))
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.retry.note_hedge(won=task is hedge)
+                        return task.result()
+                    error = error or task.exception()
+            self.retry.note_hedge(won=False)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def _new_call() -> dict:
+        """Per-invoke bookkeeping shared by its attempts (for telemetry)"""
+        call = {"retries": 0, "hedged": False, "usage": None}
+        call["on_retry"] = lambda attempt, error: call.__setitem__("retries", call["retries"] + 1)
+        return call
+
+    def _record(self, stage, prompt: str, text, started: float, call=None, cached=False, error=None):
+        call = call or {}
+        prompt_tokens, output_tokens, estimated = call_tokens(prompt, text if error is None else "", call.get("usage"))
+        self.telemetry.record(LLMCallRecord(
+            stage=stage or DEFAULT_STAGE,
+            prompt_tokens=prompt_tokens,
+            output_tokens=output_tokens if error is None else 0,
+            tokens_estimated=estimated,
+            latency_ms=round((time.monotonic() - started) * 1000, 1),
+            retries=call.get("retries", 0),
+            hedged=call.get("hedged", False),
+            cached=cached,
+            error=None if error is None else f"{type(error).__name__}: {error}"[:200],
+        ))
+
+    def invoke(self, prompt: str, use_cache: bool = True, stage: str = None):
+        """
+        Args:
+            prompt: Prompt text
+            use_cache: Serve/store the response in the LLM cache
+            stage: Caller name for telemetry (e.g. "check_tagging")
+        """
+        started = time.monotonic()
+        key, cached = self._cached(prompt, use_cache)
+        if cached is not None:
+            self._record(stage, prompt, cached, started, cached=True)
+            return cached
+
+        call = self._new_call()
+        try:
+            if self.retry.hedge:
+                # hedging needs two requests in flight at once: run on the async path
+                text = run_async(self.retry.acall(lambda: self._ahedged(prompt, call), on_retry=call["on_retry"]))
+            else:
+                text = self.retry.call(lambda: self._attempt(prompt, call), on_retry=call["on_retry"])
+        except Exception as e:
+            self._record(stage, prompt, None, started, call, error=e)
+            raise
+        self._record(stage, prompt, text, started, call)
+        self._store(key, text)
+        return text
+
+    async def ainvoke(self, prompt: str, use_cache: bool = True, stage: str = None):
+        """Async invoke on the chat model's own async API (same caching, retries, hedging and telemetry as invoke)"""
+        started = time.monotonic()
+        key, cached = self._cached(prompt, use_cache)
+        if cached is not None:
+            self._record(stage, prompt, cached, started, cached=True)
+            return cached
+
+        call = self._new_call()
+        try:
+            text = await self.retry.acall(lambda: self._ahedged(prompt, call), on_retry=call["on_retry"])
+        except Exception as e:
+            self._record(stage, prompt, None, started, call, error=e)
+            raise
+        self._record(stage, prompt, text, started, call)
+        self._store(key, text)
+        return text
+
+    async def ainvoke_many(self, prompts, max_concurrency=None, use_cache: bool = True, stage: str = None):
+        """
+        Invoke all prompts concurrently, at most `max_concurrency` in flight
+        (the shared traffic control may hold that lower while it adapts)
+
+        Returns one entry per prompt, in order: the response text, or the
+        exception that call raised (one failure never cancels the others).
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or default_max_concurrency())
+
+        async def _one(prompt):
+            async with semaphore:
+                return await self.ainvoke(prompt, use_cache=use_cache, stage=stage)
+
+        return await asyncio.gather(*(_one(p) for p in prompts), return_exceptions=True)
+
+    def invoke_many(self, prompts, max_concurrency=None, use_cache: bool = True, stage: str = None):
+        """
+        Blocking fan-out for sync callers (see ainvoke_many)
+
+        Safe to call from any thread: the requests run on the shared
+        background event loop.
+        """
+        prompts = list(prompts)
+        if not prompts:
+            return []
+        return run_async(self.ainvoke_many(prompts, max_concurrency=max_concurrency, use_cache=use_cache, stage=stage))
+
+    def cache_stats(self):
+        """Hit/miss counters of the response cache (None when bypassed)"""
+        return self.cache.stats() if self.cache is not None else None
+
+    def traffic_stats(self):
+        """Rate limiter and concurrency controller state, plus retry/hedge counters"""
+        return {**self.traffic.stats(), "retry": self.retry.stats()}
     
 
@@ -1,25 +1,343 @@
 import os
+import re
 import json
-from pathlib import Path
-from typing import List, Dict
+import mmap
+import threading
+import weakref
+from collections import OrderedDict
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterator, Optional, Tuple, Sequence, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+REACT_EXTENSIONS = ('.jsx', '.tsx', '.js', '.ts')
+# Directory NAMES that are never descended into (exact match, not substring)
+IGNORED_DIRS = {'node_modules', 'build', 'dist', '.git'}
+
+# Bulk loading limits
+MAX_FILE_BYTES = 1024 * 1024         # larger files are skipped (generated code, fixtures)
+MINIFIED_LINE_LENGTH = 1000          # average line length above this = minified bundle
+SNIFF_BYTES = 8192                   # bytes inspected for binary/minified detection
+
+
+class LazyLines(Sequence[str]):
+    """
+    Read-only, mmap-backed line view of a UTF-8 file
+
+    Only line start offsets are kept in memory; each line is decoded when it
+    is accessed. Supports len(), indexing, negative indexes and slices, so it
+    can stand in for the List[str] produced by read().splitlines().
+
+    No file descriptor is held between accesses beyond a small process-wide
+    pool: the file is mapped on first access, and the least recently used
+    mappings are closed once more than MAX_OPEN_MAPS are open (an mmap keeps
+    its own descriptor).
+    """
+
+    MAX_OPEN_MAPS = 64
+    _open: "OrderedDict[int, weakref.ref]" = OrderedDict()  # id -> LazyLines, LRU order
+    _lock = threading.RLock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mm: Optional[mmap.mmap] = None
+        self._starts = array('Q', [0])
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pos = mm.find(b'\n')
+                    while pos != -1:
+                        self._starts.append(pos + 1)
+                        pos = mm.find(b'\n', pos + 1)
+        self._size = size
+        if not size or self._starts[-1] == size:
+            # trailing newline does not start another line (like splitlines)
+            self._starts.pop()
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _map(self) -> mmap.mmap:
+        """This file's mapping (caller holds _lock), opening it if needed"""
+        cls = LazyLines
+        if self._mm is None:
+            with open(self.path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            cls._open[id(self)] = weakref.ref(self)
+            while len(cls._open) > cls.MAX_OPEN_MAPS:
+                _, ref = cls._open.popitem(last=False)
+                oldest = ref()
+                if oldest is not None:
+                    oldest._unmap()
+        else:
+            cls._open.move_to_end(id(self))
+        return self._mm
+
+    def _unmap(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _line(self, i: int) -> str:
+        start = self._starts[i]
+        end = self._starts[i + 1] - 1 if i + 1 < len(self._starts) else self._size
+        with LazyLines._lock:
+            raw = self._map()[start:end]
+        if raw.endswith(b'\n'):
+            raw = raw[:-1]
+        if raw.endswith(b'\r'):
+            raw = raw[:-1]
+        return raw.decode('utf-8', errors='replace')
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._line(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._line(i)
+
+    def close(self):
+        with LazyLines._lock:
+            LazyLines._open.pop(id(self), None)
+            self._unmap()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class GitIgnore:
+    """
+    Minimal .gitignore matcher (stdlib only)
+
+    Supports comments, blank lines, negation (!), directory-only patterns
+    (trailing /), anchored patterns (containing /), * ? [..] and **.
+    Rules from nested .gitignore files are evaluated relative to their own
+    directory; the last matching rule wins.
+    """
+
+    def __init__(self, rules: Optional[List[Tuple[str, re.Pattern, bool, bool, bool]]] = None):
+        # (base_dir, regex, negate, dir_only, anchored)
+        self.rules = rules or []
+
+    @staticmethod
+    def _glob_to_regex(pattern: str) -> str:
+        out, i = [], 0
+        while i < len(pattern):
+            if pattern.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+            elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+                out.append('(?:/.*)?')
+                i += 3
+            elif pattern.startswith('**', i):
+                out.append('.*')
+                i += 2
+            elif pattern[i] == '*':
+                out.append('[^/]*')
+                i += 1
+            elif pattern[i] == '?':
+                out.append('[^/]')
+                i += 1
+            elif pattern[i] == '[':
+                j = pattern.find(']', i + 1)
+                if j == -1:
+                    out.append(re.escape('['))
+                    i += 1
+                else:
+                    cls = pattern[i + 1:j].replace('\\', '\\\\')
+                    if cls.startswith('!'):
+                        cls = '^' + cls[1:]
+                    out.append(f'[{cls}]')
+                    i = j + 1
+            else:
+                out.append(re.escape(pattern[i]))
+                i += 1
+        return '^' + ''.join(out) + '$'
+
+    def extended(self, gitignore_path: str, base_dir: str) -> "GitIgnore":
+        """Return a matcher with the rules of `gitignore_path` appended"""
+        try:
+            with open(gitignore_path, 'r', encoding='utf-8', errors='ignore') as f:
+                raw_lines = f.read().splitlines()
+        except OSError:
+            return self
+
+        rules = list(self.rules)
+        for raw in raw_lines:
+            line = raw.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line
+            line = line.lstrip('/')
+            rules.append((base_dir, re.compile(self._glob_to_regex(line)), negate, dir_only, anchored))
+        return GitIgnore(rules)
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        result = False
+        name = os.path.basename(path)
+        for base_dir, regex, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if anchored:
+                rel = os.path.relpath(path, base_dir).replace(os.sep, '/')
+                if rel.startswith('..'):
+                    continue
+                hit = regex.match(rel) is not None
+            else:
+                hit = regex.match(name) is not None
+            if hit:
+                result = not negate
+        return result
+
+
 class FileHandler:
     @staticmethod
-    def find_react_files(repo_path: str) -> List[str]:
-        react_files = []
-        extensions = ['.jsx', '.tsx', '.js', '.ts']
-        repo_path = Path(repo_path)
-        
-        for ext in extensions:
-            for file_path in repo_path.rglob(f'*{ext}'):
-                if any(skip in str(file_path) for skip in ['node_modules', 'build', 'dist', '.git']):
+    def iter_react_files(
+        repo_path: str,
+        extensions: Tuple[str, ...] = REACT_EXTENSIONS,
+        ignored_dirs: Optional[set] = None,
+        use_gitignore: bool = True,
+    ) -> Iterator[str]:
+        """
+        Walk the repo once with os.scandir and lazily yield React source files
+
+        Ignored directories (node_modules, build, dist, .git) are pruned by
+        exact name BEFORE descending, and .gitignore files (root and nested)
+        are honoured. Entries are visited in sorted order for stable output.
+        """
+        ignored_dirs = IGNORED_DIRS if ignored_dirs is None else ignored_dirs
+        root = os.path.abspath(str(repo_path))
+        stack: List[Tuple[str, GitIgnore]] = [(root, GitIgnore())]
+
+        while stack:
+            current, gitignore = stack.pop()
+            if use_gitignore:
+                gi_path = os.path.join(current, '.gitignore')
+                if os.path.isfile(gi_path):
+                    gitignore = gitignore.extended(gi_path, current)
+
+            try:
+                with os.scandir(current) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                logger.warning(f"Cannot list {current}: {e}")
+                continue
+
+            subdirs = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
                     continue
-                react_files.append(str(file_path))
-        return react_files
+                if is_dir:
+                    if entry.name in ignored_dirs:
+                        continue
+                    if use_gitignore and gitignore.ignored(entry.path, True):
+                        continue
+                    subdirs.append(entry.path)
+                elif entry.name.endswith(extensions):
+                    if use_gitignore and gitignore.ignored(entry.path, False):
+                        continue
+                    yield entry.path
+
+            # reversed so directories are popped in sorted order
+            for sub in reversed(subdirs):
+                stack.append((sub, gitignore))
+
+    @staticmethod
+    def find_react_files(repo_path: str) -> List[str]:
+        return list(FileHandler.iter_react_files(repo_path))
     
+    @staticmethod
+    def sniff_skip_reason(file_path: str, head: bytes, size: int, max_bytes: int = MAX_FILE_BYTES) -> Optional[str]:
+        """Why a file should not be loaded (None = load it)"""
+        if size > max_bytes:
+            return f"larger than {max_bytes} bytes"
+        if b'\0' in head:
+            return "binary"
+        if file_path.endswith(('.min.js', '.bundle.js', '.chunk.js')):
+            return "minified bundle"
+        if head and len(head) >= SNIFF_BYTES // 2 and len(head) / (head.count(b'\n') + 1) > MINIFIED_LINE_LENGTH:
+            return "minified bundle"
+        return None
+
+    @staticmethod
+    def load_file_lines(file_path: str, max_bytes: int = MAX_FILE_BYTES, lazy: bool = False) -> Tuple[Union[List[str], LazyLines], Optional[str]]:
+        """
+        Load one file as lines, skipping oversized/binary/minified files
+
+        Returns:
+            (lines, skip_reason) - lines is [] when skipped or unreadable
+        """
+        try:
+            size = os.path.getsize(file_path)
+            with open(file_path, 'rb') as f:
+                head = f.read(SNIFF_BYTES)
+                reason = FileHandler.sniff_skip_reason(file_path, head, size, max_bytes)
+                if reason:
+                    return [], reason
+                if lazy:
+                    return LazyLines(file_path), None
+                data = head + f.read()
+            return data.decode('utf-8').splitlines(), None
+        except Exception as e:
+            logger.error(f"Error reading file {file_path}: {e}")
+            return [], f"unreadable: {e}"
+
+    @staticmethod
+    def load_files(
+        files: List[str],
+        max_workers: int = 8,
+        max_bytes: int = MAX_FILE_BYTES,
+        lazy: bool = False,
+    ) -> Dict[str, Union[List[str], LazyLines]]:
+        """
+        Load many files as lines in parallel, preserving input order
+
+        Args:
+            files: File paths
+            max_workers: Reader threads
+            max_bytes: Files larger than this are skipped
+            lazy: Return mmap-backed LazyLines views instead of decoded lists
+
+        Returns:
+            {file: lines}; skipped/unreadable files map to []
+        """
+        def _load(f):
+            return FileHandler.load_file_lines(f, max_bytes=max_bytes, lazy=lazy)
+
+        if max_workers > 1 and len(files) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                loaded = list(pool.map(_load, files))
+        else:
+            loaded = [_load(f) for f in files]
+
+        contents: Dict[str, Union[List[str], LazyLines]] = {}
+        skipped = 0
+        for f, (lines, reason) in zip(files, loaded):
+            contents[f] = lines
+            if reason:
+                skipped += 1
+                logger.debug(f"Skipped {f}: {reason}")
+        if skipped:
+            logger.info(f"Skipped {skipped} of {len(files)} files (oversized, binary, minified or unreadable)")
+        return contents
+
     @staticmethod
     def read_file_content(file_path: str) -> str:
         try: